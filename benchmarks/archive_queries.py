@@ -0,0 +1,118 @@
+"""
+Benchmark de consultas del día a día antes y después de archivar.
+
+Mide (mediana y p95 en ms) las consultas que hacen las vistas de analistas:
+historial, detalle de un caso vivo, detalle de un caso archivado, conteo de
+pendientes y búsqueda por cédula.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/archive_queries.py --sembrar 10000000 --archivar
+    DJANGO_DB=sqlite python benchmarks/archive_queries.py --archivar --dias 365
+
+--sembrar inserta filas sintéticas con credit_risk.seeding (fechas repartidas
+en --anios años) antes de medir; --archivar mide, ejecuta el archivo y vuelve a medir.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Max, Min  # noqa: E402
+
+from credit_risk.archive import archive_evaluations, get_evaluation_or_404  # noqa: E402
+from credit_risk.models import CreditEvaluation, CreditEvaluationArchive  # noqa: E402
+from credit_risk.seeding import seed_evaluations  # noqa: E402
+
+
+# =========================
+# MEDICIÓN
+# =========================
+def cronometrar(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(0.95 * (len(tiempos) - 1))]
+
+
+def muestra_pks(modelo, n, *campos):
+    """Muestra aleatoria de filas existentes sin ORDER BY RANDOM() sobre toda la tabla."""
+    rango = modelo.objects.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if rango['lo'] is None:
+        return []
+    candidatos = [random.randint(rango['lo'], rango['hi']) for _ in range(n * 20)]
+    return list(modelo.objects.filter(pk__in=candidatos).values_list('pk', *campos)[:n])
+
+
+def medir(repeticiones):
+    vivos = muestra_pks(CreditEvaluation, repeticiones, 'cliente_cedula')
+    archivados = [pk for pk, in muestra_pks(CreditEvaluationArchive, repeticiones)]
+
+    consultas = {
+        'historial (200 recientes)': lambda: list(
+            CreditEvaluation.objects.select_related('user').order_by('-created_at')[:200]
+        ),
+        'pendientes (conteo)': lambda: CreditEvaluation.objects.filter(estado_caso='PENDIENTE').count(),
+    }
+    if vivos:
+        consultas['detalle caso vivo'] = lambda: get_evaluation_or_404(random.choice(vivos)[0])
+        consultas['búsqueda por cédula'] = lambda: list(
+            CreditEvaluation.objects.filter(cliente_cedula=random.choice(vivos)[1])[:20]
+        )
+    if archivados:
+        consultas['detalle caso archivado'] = lambda: get_evaluation_or_404(random.choice(archivados))
+
+    return {nombre: cronometrar(fn, repeticiones) for nombre, fn in consultas.items()}
+
+
+def imprimir(titulo, resultados):
+    print(f'\n{titulo}')
+    print(f"  tabla viva: {CreditEvaluation.objects.count():,} filas | "
+          f"archivo: {CreditEvaluationArchive.objects.count():,} filas")
+    for nombre, (mediana, p95) in resultados.items():
+        print(f'  {nombre:<28} mediana {mediana:>9.2f} ms   p95 {p95:>9.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sembrar', type=int, default=0)
+    parser.add_argument('--anios', type=int, default=5)
+    parser.add_argument('--archivar', action='store_true')
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(42)
+    if args.sembrar:
+        print(f'Sembrando {args.sembrar:,} evaluaciones...')
+        seed_evaluations(args.sembrar, anios=args.anios, diferir_indices=True,
+                         progreso=lambda mensaje: print(f'  {mensaje}', flush=True))
+
+    imprimir('ANTES' if args.archivar else 'ESTADO ACTUAL', medir(args.repeticiones))
+
+    if args.archivar:
+        inicio = time.perf_counter()
+        total = archive_evaluations(dias=args.dias)
+        print(f'\nArchivadas {total:,} evaluaciones en {time.perf_counter() - inicio:.1f} s')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {CreditEvaluation._meta.db_table}')
+                cursor.execute(f'ANALYZE {CreditEvaluationArchive._meta.db_table}')
+        imprimir('DESPUÉS', medir(args.repeticiones))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Latencia y throughput por backend de inferencia según el tamaño del lote.
+
+Compara, para lotes de 1 a 100.000 solicitantes ya codificados:
+
+    logistica          -> artefacto actual (modelo_riesgo.pkl), SklearnBackend
+    random_forest      -> RandomForest entrenado aquí, SklearnBackend con DataFrame
+                          (como el del notebook, entrenado con nombres de columnas)
+    xgboost_sklearn    -> XGBClassifier.predict_proba sobre DataFrame
+    xgboost_nativo     -> XGBoostBackend: Booster.inplace_predict sobre NumPy
+
+Todas las variantes incluyen el escalado (inference.scale) y corren con el
+presupuesto interactivo (CREDIT_INFERENCE_THREADS).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/backend_latency.py
+    python benchmarks/backend_latency.py --lotes 1 100 10000 --repeticiones 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import warnings  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from credit_risk import inference  # noqa: E402
+from credit_risk.backends import SklearnBackend, XGBoostBackend  # noqa: E402
+from credit_risk.model_validation import build_estimator  # noqa: E402
+from credit_risk.synthetic import generate_applicants  # noqa: E402
+
+
+def entrenar(n, n_estimators):
+    df = generate_applicants(n, seed=1)
+    X = inference.scale(inference.encode(df))
+    y = df['riesgo_real'].to_numpy()
+
+    rf, _ = build_estimator('random_forest', n_estimators=n_estimators)
+    rf.fit(pd.DataFrame(X, columns=inference.model_columns), y)
+    xgb_clf, _ = build_estimator('xgboost', n_estimators=n_estimators)
+    xgb_clf.fit(X, y)
+    return rf, xgb_clf
+
+
+def variantes(rf, xgb_clf):
+    columnas = inference.model_columns
+    logistica = SklearnBackend(inference.modelo, columnas)
+    bosque = SklearnBackend(rf, columnas)
+    nativo = XGBoostBackend(xgb_clf)
+
+    def xgboost_sklearn(X):
+        return xgb_clf.predict_proba(pd.DataFrame(inference.scale(X), columns=columnas))[:, 1]
+
+    return {
+        'logistica': lambda X: logistica.predict_proba(inference.scale(X)),
+        'random_forest': lambda X: bosque.predict_proba(inference.scale(X)),
+        'xgboost_sklearn': xgboost_sklearn,
+        'xgboost_nativo': lambda X: nativo.predict_proba(inference.scale(X)),
+    }
+
+
+def medir(funcion, X, repeticiones, presupuesto_s):
+    funcion(X)  # calentamiento
+    tiempos = []
+    fin = time.perf_counter() + presupuesto_s
+    while len(tiempos) < repeticiones and (len(tiempos) < 3 or time.perf_counter() < fin):
+        inicio = time.perf_counter()
+        funcion(X)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos = np.asarray(tiempos) * 1000
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99), len(X) / (np.median(tiempos) / 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    parser.add_argument('--segundos', type=float, default=5, help='Tiempo máximo por medición')
+    parser.add_argument('--entrenamiento', type=int, default=20_000)
+    parser.add_argument('--n-estimators', dest='n_estimators', type=int, default=300)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', message='X has feature names')
+    print(f'Entrenando RandomForest y XGBoost de prueba ({args.n_estimators} árboles)...')
+    rf, xgb_clf = entrenar(args.entrenamiento, args.n_estimators)
+    funciones = variantes(rf, xgb_clf)
+
+    X_total = inference.encode(generate_applicants(max(args.lotes), seed=2))
+    referencia = funciones['xgboost_sklearn'](X_total[:1000])
+    diferencia = np.abs(funciones['xgboost_nativo'](X_total[:1000]) - referencia).max()
+    print(f'CPU: {os.cpu_count()} | máx. diferencia nativo vs sklearn: {diferencia:.2e}')
+
+    print(f"{'modelo':<16} {'filas':>8} {'p50 ms':>10} {'p99 ms':>10} {'filas/s':>14}")
+    for lote in args.lotes:
+        X = X_total[:lote]
+        for nombre, funcion in funciones.items():
+            p50, p99, rps = medir(funcion, X, args.repeticiones, args.segundos)
+            print(f'{nombre:<16} {lote:>8,} {p50:>10.3f} {p99:>10.3f} {rps:>14,.0f}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
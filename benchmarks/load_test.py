@@ -0,0 +1,427 @@
+"""
+Generador de carga concurrente para la aplicación Django de evaluación crediticia.
+
+Simula analistas reales contra un servidor local (SQLite o PostgreSQL):
+cada usuario virtual inicia sesión a través de CustomLoginView y ejecuta una
+mezcla configurable de operaciones:
+
+    prediccion  -> POST /                        (scoring individual)
+    lote        -> POST /batch/                  (carga masiva CSV)
+    historial   -> GET  /historial/              (navegación del historial)
+    detalle     -> GET  /evaluacion/<pk>/        (detalle de un caso)
+    decision    -> POST /evaluacion/<pk>/editar/ (decisión del analista)
+
+Al terminar reporta throughput, tasa de error y percentiles de latencia por
+endpoint. Solo usa la librería estándar (asyncio + urllib).
+
+Uso:
+    python benchmarks/load_test.py benchmarks/escenarios/base.json
+    python benchmarks/load_test.py benchmarks/escenarios/base.json --concurrencia 20 --duracion 120
+    python benchmarks/load_test.py --guardar benchmarks/escenarios/mio.json --concurrencia 5
+
+El usuario del escenario debe existir (python manage.py createsuperuser).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+
+# =========================
+# ESCENARIO POR DEFECTO
+# =========================
+ESCENARIO_BASE = {
+    'base_url': 'http://127.0.0.1:8000',
+    'usuario': 'admin',
+    'password': 'admin',
+    'concurrencia': 10,
+    'duracion_s': 60,
+    'max_peticiones': None,
+    'rampa_s': 5,
+    'pausa_ms': [0, 0],
+    'timeout_s': 30,
+    'semilla': 42,
+    'lote_filas': 100,
+    'mezcla': {
+        'prediccion': 50,
+        'lote': 5,
+        'historial': 20,
+        'detalle': 10,
+        'decision': 15,
+    },
+}
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+EVAL_ID_RE = re.compile(r'/evaluacion/(\d+)/')
+
+OPCIONES_CIVIL = ['Soltero', 'Casado', 'Divorciado', 'Viudo', 'UnionLibre']
+OPCIONES_GARANTIA = ['Personal', 'Prendaria', 'Hipotecaria', 'Autoliquidable']
+OPCIONES_SEGMENTO = ['Consumo', 'Microcrédito', 'Inmobiliario', 'Ahorros Suficientes']
+ESTADOS_DECISION = ['APROBADO', 'RECHAZADO', 'OBSERVADO']
+
+
+def cargar_escenario(path=None, overrides=None):
+    escenario = json.loads(json.dumps(ESCENARIO_BASE))
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            escenario.update(json.load(f))
+    for clave, valor in (overrides or {}).items():
+        if valor is not None:
+            escenario[clave] = valor
+    return escenario
+
+
+# =========================
+# DATOS SIMULADOS
+# =========================
+def solicitante_aleatorio(rnd):
+    """Solicitante con los mismos rangos que data/generar_dataset.py."""
+    ingreso = round(rnd.lognormvariate(6.5, 0.5), 2)
+    segmento = rnd.choice(OPCIONES_SEGMENTO)
+    if segmento == 'Inmobiliario':
+        monto, garantia = rnd.uniform(15000, 80000), 'Hipotecaria'
+    elif segmento == 'Ahorros Suficientes':
+        monto, garantia = rnd.uniform(500, 50000), 'Autoliquidable'
+    else:
+        monto, garantia = rnd.uniform(500, 20000), rnd.choice(['Personal', 'Prendaria'])
+
+    return {
+        'edad': int(rnd.triangular(19, 75, 35)),
+        'estado_civil': rnd.choice(OPCIONES_CIVIL),
+        'ingreso_mensual': ingreso,
+        'ventas_anuales': round(ingreso * 18, 2) if segmento == 'Microcrédito' else 0,
+        'monto_solicitado': round(monto, 2),
+        'plazo_meses': rnd.choice([12, 24, 36, 48, 60, 84]),
+        'dias_mora_prom': int(rnd.expovariate(1 / 5)),
+        'garantia': garantia,
+        'tiene_garante': rnd.random() < 0.5,
+        'propiedad_completa': rnd.random() < 0.8,
+        'estado_legal': rnd.random() < 0.05,
+    }
+
+
+def csv_lote(rnd, filas):
+    columnas = list(solicitante_aleatorio(rnd).keys())
+    buffer = io.StringIO()
+    buffer.write(','.join(columnas) + '\n')
+    for _ in range(filas):
+        fila = solicitante_aleatorio(rnd)
+        buffer.write(','.join(str(fila[c]) for c in columnas) + '\n')
+    return buffer.getvalue().encode('utf-8')
+
+
+def multipart(campos, archivo_campo, archivo_nombre, contenido):
+    boundary = uuid.uuid4().hex
+    partes = []
+    for nombre, valor in campos.items():
+        partes.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n{valor}\r\n'.encode()
+        )
+    partes.append(
+        (f'--{boundary}\r\nContent-Disposition: form-data; name="{archivo_campo}"; '
+         f'filename="{archivo_nombre}"\r\nContent-Type: text/csv\r\n\r\n').encode()
+    )
+    partes.append(contenido)
+    partes.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(partes), f'multipart/form-data; boundary={boundary}'
+
+
+# =========================
+# MÉTRICAS
+# =========================
+class Metricas:
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.detalle_errores = {}
+        # Operaciones que no se enviaron (sin muestra de latencia)
+        self.omitidas = {}
+
+    def omitir(self, endpoint, motivo):
+        clave = f'{endpoint}: {motivo}'
+        self.omitidas[clave] = self.omitidas.get(clave, 0) + 1
+
+    def registrar(self, endpoint, segundos, ok, motivo=None):
+        self.latencias.setdefault(endpoint, []).append(segundos)
+        self.errores.setdefault(endpoint, 0)
+        if not ok:
+            self.errores[endpoint] += 1
+            clave = f'{endpoint}: {motivo}'
+            self.detalle_errores[clave] = self.detalle_errores.get(clave, 0) + 1
+
+    @staticmethod
+    def percentil(valores_ordenados, p):
+        if not valores_ordenados:
+            return 0.0
+        k = (len(valores_ordenados) - 1) * p / 100
+        i = int(k)
+        j = min(i + 1, len(valores_ordenados) - 1)
+        return valores_ordenados[i] + (valores_ordenados[j] - valores_ordenados[i]) * (k - i)
+
+    def resumen(self, duracion):
+        filas = {}
+        todas = []
+        for endpoint, lat in sorted(self.latencias.items()):
+            ordenadas = sorted(lat)
+            todas.extend(ordenadas)
+            filas[endpoint] = self._fila(ordenadas, self.errores[endpoint], duracion)
+        filas['TOTAL'] = self._fila(sorted(todas), sum(self.errores.values()), duracion)
+        return filas
+
+    def _fila(self, ordenadas, errores, duracion):
+        n = len(ordenadas)
+        return {
+            'peticiones': n,
+            'errores': errores,
+            'tasa_error_%': round(100 * errores / n, 2) if n else 0.0,
+            'throughput_rps': round(n / duracion, 2) if duracion else 0.0,
+            'p50_ms': round(1000 * self.percentil(ordenadas, 50), 1),
+            'p90_ms': round(1000 * self.percentil(ordenadas, 90), 1),
+            'p95_ms': round(1000 * self.percentil(ordenadas, 95), 1),
+            'p99_ms': round(1000 * self.percentil(ordenadas, 99), 1),
+            'max_ms': round(1000 * ordenadas[-1], 1) if n else 0.0,
+        }
+
+
+# =========================
+# USUARIO VIRTUAL (ANALISTA)
+# =========================
+class Analista:
+    def __init__(self, idx, escenario, metricas, ids_compartidos):
+        self.idx = idx
+        self.esc = escenario
+        self.metricas = metricas
+        self.ids = ids_compartidos
+        self.rnd = random.Random(escenario['semilla'] + idx)
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+        self.base = escenario['base_url'].rstrip('/') + '/'
+
+    # ---- HTTP (bloqueante, se ejecuta en el pool de hilos) ----
+    def _request(self, path, data=None, content_type=None):
+        url = urljoin(self.base, path.lstrip('/'))
+        headers = {'Referer': url}
+        if content_type:
+            headers['Content-Type'] = content_type
+        req = Request(url, data=data, headers=headers)
+        with self.opener.open(req, timeout=self.esc['timeout_s']) as resp:
+            return resp.status, resp.geturl(), resp.read().decode('utf-8', errors='replace')
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def _post(self, path, campos):
+        campos = dict(campos, csrfmiddlewaretoken=self._csrf())
+        return self._request(path, urlencode(campos).encode(), 'application/x-www-form-urlencoded')
+
+    def login(self):
+        _, _, html = self._request('/login/')
+        match = CSRF_RE.search(html)
+        if not match:
+            raise RuntimeError('No se encontró el token CSRF en /login/')
+        status, url, _ = self._post('/login/', {
+            'username': self.esc['usuario'],
+            'password': self.esc['password'],
+        })
+        if url.rstrip('/').endswith('/login'):
+            raise RuntimeError('Credenciales rechazadas por CustomLoginView')
+        return status
+
+    # ---- Operaciones de la mezcla ----
+    def op_prediccion(self):
+        datos = solicitante_aleatorio(self.rnd)
+        # Los checkbox desmarcados no se envían
+        campos = {k: ('on' if v is True else v) for k, v in datos.items() if v is not False}
+        status, _, html = self._post('/', campos)
+        return status, 'Probabilidad de Impago' in html
+
+    def op_lote(self):
+        contenido = csv_lote(self.rnd, self.esc['lote_filas'])
+        cuerpo, content_type = multipart(
+            {'csrfmiddlewaretoken': self._csrf()}, 'file', 'lote.csv', contenido
+        )
+        status, _, html = self._request('/batch/', cuerpo, content_type)
+        return status, 'Error procesando' not in html and 'Faltan columnas' not in html
+
+    def op_historial(self):
+        status, _, html = self._request('/historial/')
+        ids = EVAL_ID_RE.findall(html)
+        if ids:
+            self.ids[:] = list(dict.fromkeys(int(i) for i in ids))
+        return status, True
+
+    def _pk(self):
+        if not self.ids:
+            self.op_historial()
+        return self.rnd.choice(self.ids) if self.ids else None
+
+    def op_detalle(self):
+        pk = self._pk()
+        if pk is None:
+            return None, 'sin evaluaciones'
+        status, _, _ = self._request(f'/evaluacion/{pk}/')
+        return status, True
+
+    def op_decision(self):
+        pk = self._pk()
+        if pk is None:
+            return None, 'sin evaluaciones'
+        estado = self.rnd.choice(ESTADOS_DECISION)
+        status, _, html = self._post(f'/evaluacion/{pk}/editar/', {
+            'estado_caso': estado,
+            'decision_final': estado,
+            'comentario_analista': f'Prueba de carga (analista {self.idx})',
+        })
+        # Si el formulario es válido la vista responde con el detalle del caso
+        return status, 'Evaluación #' in html
+
+    def ejecutar(self, operacion):
+        """Ejecuta una operación y la registra en las métricas."""
+        inicio = time.perf_counter()
+        motivo = None
+        try:
+            status, ok = getattr(self, f'op_{operacion}')()
+            if status is None:
+                # No hubo petición (p. ej. aún no hay evaluaciones): ok es el motivo
+                self.metricas.omitir(operacion, ok)
+                return
+            if not ok:
+                motivo = 'respuesta inesperada'
+        except HTTPError as e:
+            ok, motivo = False, f'HTTP {e.code}'
+        except (URLError, OSError, RuntimeError) as e:
+            ok, motivo = False, type(e).__name__
+        self.metricas.registrar(operacion, time.perf_counter() - inicio, ok, motivo)
+
+
+# =========================
+# ORQUESTACIÓN
+# =========================
+async def correr_analista(idx, escenario, metricas, ids, fin, contador):
+    loop = asyncio.get_running_loop()
+    analista = Analista(idx, escenario, metricas, ids)
+
+    # Rampa: los analistas entran escalonados
+    if escenario['concurrencia'] > 1:
+        await asyncio.sleep(escenario['rampa_s'] * idx / escenario['concurrencia'])
+
+    inicio = time.perf_counter()
+    try:
+        await loop.run_in_executor(None, analista.login)
+        metricas.registrar('login', time.perf_counter() - inicio, True)
+    except Exception as e:
+        metricas.registrar('login', time.perf_counter() - inicio, False, str(e))
+        return
+
+    mezcla = escenario['mezcla']
+    operaciones = [op for op, peso in mezcla.items() if peso > 0]
+    pesos = [mezcla[op] for op in operaciones]
+    pausa_min, pausa_max = escenario['pausa_ms']
+    maximo = escenario['max_peticiones']
+
+    while time.perf_counter() < fin:
+        if maximo is not None:
+            if contador[0] >= maximo:
+                break
+            contador[0] += 1
+        operacion = analista.rnd.choices(operaciones, weights=pesos)[0]
+        await loop.run_in_executor(None, analista.ejecutar, operacion)
+        if pausa_max:
+            await asyncio.sleep(analista.rnd.uniform(pausa_min, pausa_max) / 1000)
+
+
+async def correr_escenario(escenario):
+    metricas = Metricas()
+    ids = []
+    contador = [0]
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=escenario['concurrencia']))
+
+    inicio = time.perf_counter()
+    fin = inicio + escenario['rampa_s'] + escenario['duracion_s']
+    await asyncio.gather(*[
+        correr_analista(i, escenario, metricas, ids, fin, contador)
+        for i in range(escenario['concurrencia'])
+    ])
+    duracion = time.perf_counter() - inicio
+    return metricas, duracion
+
+
+def imprimir_reporte(resumen, errores, duracion, omitidas=None):
+    columnas = ['peticiones', 'errores', 'tasa_error_%', 'throughput_rps',
+                'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms']
+    print(f"\nDuración total: {duracion:.1f} s")
+    print(f"{'endpoint':<12}" + ''.join(f'{c:>15}' for c in columnas))
+    for endpoint, fila in resumen.items():
+        print(f'{endpoint:<12}' + ''.join(f'{fila[c]:>15}' for c in columnas))
+    if errores:
+        print('\nErrores:')
+        for motivo, n in sorted(errores.items(), key=lambda x: -x[1]):
+            print(f'  {n:>6}  {motivo}')
+    if omitidas:
+        print('\nOmitidas (sin petición):')
+        for motivo, n in sorted(omitidas.items(), key=lambda x: -x[1]):
+            print(f'  {n:>6}  {motivo}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga de la app de crédito')
+    parser.add_argument('escenario', nargs='?', help='Archivo JSON de escenario')
+    parser.add_argument('--base-url', dest='base_url')
+    parser.add_argument('--usuario')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrencia', type=int)
+    parser.add_argument('--duracion', dest='duracion_s', type=float)
+    parser.add_argument('--max-peticiones', dest='max_peticiones', type=int)
+    parser.add_argument('--semilla', type=int)
+    parser.add_argument('--lote-filas', dest='lote_filas', type=int)
+    parser.add_argument('--guardar', help='Guarda el escenario resultante y termina')
+    parser.add_argument('--salida', help='Guarda el reporte en JSON')
+    args = vars(parser.parse_args(argv))
+
+    guardar = args.pop('guardar')
+    salida = args.pop('salida')
+    escenario = cargar_escenario(args.pop('escenario'), args)
+
+    if guardar:
+        with open(guardar, 'w', encoding='utf-8') as f:
+            json.dump(escenario, f, indent=2, ensure_ascii=False)
+        print(f'Escenario guardado en: {guardar}')
+        return 0
+
+    print(f"Escenario: {escenario['concurrencia']} analistas contra {escenario['base_url']} "
+          f"durante {escenario['duracion_s']} s (mezcla {escenario['mezcla']})")
+    metricas, duracion = asyncio.run(correr_escenario(escenario))
+    resumen = metricas.resumen(duracion)
+    imprimir_reporte(resumen, metricas.detalle_errores, duracion, metricas.omitidas)
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'escenario': escenario,
+                'duracion_s': round(duracion, 2),
+                'resumen': resumen,
+                'errores': metricas.detalle_errores,
+                'omitidas': metricas.omitidas,
+            }, f, indent=2, ensure_ascii=False)
+        print(f'\nReporte guardado en: {salida}')
+
+    return 1 if resumen['TOTAL']['peticiones'] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
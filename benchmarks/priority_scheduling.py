@@ -0,0 +1,132 @@
+"""
+Latencia de la predicción individual mientras corre una carga masiva.
+
+Mide (p50/p95/p99 en ms) una predicción interactiva equivalente a predict_view
+(codificación y predicción de una fila) en reposo y durante un
+lote concurrente de --filas solicitantes sintéticos, en dos modos:
+
+    directo      -> el lote se puntúa de una sola vez, sin planificador
+    planificado  -> el lote va por bloques como trabajo de LOTE y la
+                    predicción individual pide turno INTERACTIVA
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/priority_scheduling.py --filas 500000
+    python benchmarks/priority_scheduling.py --modo planificado --bloque 2000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import warnings  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from credit_risk import inference  # noqa: E402
+from credit_risk.scheduler import INTERACTIVA, InferenceScheduler, score_frame  # noqa: E402
+from credit_risk.synthetic import generate_applicants  # noqa: E402
+
+
+SOLICITANTE = {
+    'edad': 40, 'estado_civil': 'Casado', 'ingreso_mensual': 1500.0, 'ventas_anuales': 0.0,
+    'monto_solicitado': 8000.0, 'plazo_meses': 24, 'dias_mora_prom': 3, 'garantia': 'Personal',
+    'tiene_garante': True, 'propiedad_completa': False, 'estado_legal': False,
+}
+
+
+def prediccion_individual():
+    X = inference.encode(pd.DataFrame([SOLICITANTE]))
+    inference.predict_labels(inference.predict_proba(X))
+
+
+def medir_interactivas(planificador, intervalo, mientras=None, n=None):
+    latencias = []
+    while (mientras is not None and mientras()) or (n is not None and len(latencias) < n):
+        inicio = time.perf_counter()
+        if planificador is None:
+            prediccion_individual()
+        else:
+            with planificador.slot(INTERACTIVA):
+                prediccion_individual()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        time.sleep(intervalo)
+    return latencias
+
+
+def resumen(latencias):
+    if not latencias:
+        return 'sin muestras'
+    p = np.percentile(latencias, [50, 95, 99])
+    return (f'n={len(latencias):<5} p50 {p[0]:7.2f} ms  p95 {p[1]:7.2f} ms  p99 {p[2]:7.2f} ms  '
+            f'máx {max(latencias):8.2f} ms')
+
+
+def correr(modo, df, intervalo, bloque):
+    planificador = None
+    if modo == 'planificado':
+        planificador = InferenceScheduler(
+            slots=settings.CREDIT_SCHED_SLOTS,
+            batch_slots=settings.CREDIT_SCHED_BATCH_SLOTS,
+            max_batch_rows=settings.CREDIT_SCHED_MAX_BATCH_ROWS,
+            interactive_p99_ms=settings.CREDIT_SCHED_INTERACTIVE_P99_MS,
+        )
+
+    reposo = medir_interactivas(planificador, intervalo, n=200)
+
+    duracion = {}
+
+    def lote():
+        inicio = time.perf_counter()
+        if planificador is None:
+            inference.predict_proba(inference.encode(df))
+        else:
+            with planificador.admit_batch(len(df)):
+                score_frame(df, chunk_rows=bloque, planificador=planificador)
+        duracion['lote'] = time.perf_counter() - inicio
+
+    hilo = threading.Thread(target=lote)
+    hilo.start()
+    durante = medir_interactivas(planificador, intervalo, mientras=hilo.is_alive)
+    hilo.join()
+
+    print(f'\n[{modo}]')
+    print(f'  reposo       {resumen(reposo)}')
+    print(f'  durante lote {resumen(durante)}')
+    print(f"  lote de {len(df):,} filas en {duracion['lote']:.2f} s")
+    if planificador is not None:
+        m = planificador.metrics()['lote']
+        print(f"  bloques de lote: {m['completadas']} | espera p99 {m['espera_ms']['p99']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=500_000)
+    parser.add_argument('--modo', choices=['directo', 'planificado', 'ambos'], default='ambos')
+    parser.add_argument('--bloque', type=int, default=settings.CREDIT_SCHED_BATCH_CHUNK_ROWS)
+    parser.add_argument('--intervalo-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', message='X has feature names')
+    print(f'Generando {args.filas:,} solicitantes sintéticos...')
+    df = generate_applicants(args.filas)
+    print(f'CPU: {os.cpu_count()} | turnos {settings.CREDIT_SCHED_SLOTS} '
+          f'(lote {settings.CREDIT_SCHED_BATCH_SLOTS}) | bloque {args.bloque} filas')
+
+    modos = ['directo', 'planificado'] if args.modo == 'ambos' else [args.modo]
+    for modo in modos:
+        correr(modo, df, args.intervalo_ms / 1000, args.bloque)
+
+
+if __name__ == '__main__':
+    main()
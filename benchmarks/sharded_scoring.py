@@ -0,0 +1,87 @@
+"""
+Throughput de la puntuación de un archivo de lote grande según la cantidad de
+procesos.
+
+Genera un CSV de --filas solicitantes sintéticos (por defecto 5M) y lo puntúa:
+
+    un proceso   -> como batch_predict_view con CREDIT_BATCH_WORKERS=1:
+                    pd.read_csv del archivo completo + score_frame
+    N workers    -> sharding.score_file con fragmentos por rangos de bytes
+
+Ambos escriben el CSV de resultado. La escalabilidad depende de los núcleos
+físicos disponibles (se informa os.cpu_count()).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/sharded_scoring.py
+    python benchmarks/sharded_scoring.py --filas 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+# Bloque de generación del CSV sintético
+BLOQUE_GENERACION = 500_000
+
+
+def generar_csv(ruta, filas):
+    from credit_risk.synthetic import generate_applicants
+    for i, inicio in enumerate(range(0, filas, BLOQUE_GENERACION)):
+        df = generate_applicants(min(BLOQUE_GENERACION, filas - inicio), seed=i)
+        df.drop(columns=['riesgo_real']).to_csv(ruta, mode='a', header=(i == 0), index=False)
+
+
+def un_proceso(ruta, salida):
+    import pandas as pd
+
+    from credit_risk.scheduler import InferenceScheduler, score_frame
+    from credit_risk.sharding import add_result_columns
+
+    df = pd.read_csv(ruta)
+    planificador = InferenceScheduler(slots=1, batch_slots=1, max_batch_rows=len(df), interactive_p99_ms=1e9)
+    add_result_columns(df, score_frame(df, planificador=planificador)).to_csv(salida, index=False)
+    return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=5_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--sin-base', action='store_true', help='Omite la medición de un solo proceso')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from credit_risk.sharding import score_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'cartera.csv')
+        salida = os.path.join(tmp, 'resultado.csv')
+        print(f'Generando {args.filas:,} solicitantes sintéticos...')
+        generar_csv(ruta, args.filas)
+        print(f'CSV de {os.path.getsize(ruta) / 1e6:,.0f} MB | CPU: {os.cpu_count()}')
+        print(f"{'modo':<14} {'segundos':>9} {'filas/s':>12} {'aceleración':>12}")
+
+        referencia = None
+        if not args.sin_base:
+            inicio = time.perf_counter()
+            filas = un_proceso(ruta, salida)
+            segundos = time.perf_counter() - inicio
+            referencia = filas / segundos
+            print(f"{'un proceso':<14} {segundos:>9.1f} {referencia:>12,.0f} {1:>11.2f}x", flush=True)
+
+        for workers in args.workers:
+            resumen = score_file(ruta, salida, n_workers=workers)
+            rps = resumen['filas'] / resumen['segundos']
+            referencia = referencia or rps
+            print(f"{f'{workers} workers':<14} {resumen['segundos']:>9.1f} {rps:>12,.0f} "
+                  f"{rps / referencia:>11.2f}x", flush=True)
+
+
+if __name__ == '__main__':
+    main()
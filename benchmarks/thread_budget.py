@@ -0,0 +1,129 @@
+"""
+Throughput de inferencia con 1/2/4/8 workers, con y sin presupuesto de hilos.
+
+Cada worker es un proceso (como un worker de gunicorn) que puntúa bloques de
+--filas solicitantes durante --segundos. Se compara:
+
+    con presupuesto -> CREDIT_INFERENCE_THREADS=--hilos (threadpoolctl + n_jobs)
+    sin presupuesto -> CREDIT_INFERENCE_THREADS=0: BLAS/OpenMP y n_jobs=-1 usan
+                       todos los núcleos en cada worker
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/thread_budget.py
+    python benchmarks/thread_budget.py --modelo random_forest --workers 1 2 4 8 --filas 5000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+# =========================
+# WORKER
+# =========================
+def _iniciar(hilos, ruta_modelo):
+    os.environ['CREDIT_INFERENCE_THREADS'] = str(hilos)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+    import warnings
+    warnings.filterwarnings('ignore', message='X has feature names')
+
+    from credit_risk import inference
+    if ruta_modelo:
+        import joblib
+
+        from credit_risk.backends import make_backend
+        inference.backend = make_backend(joblib.load(ruta_modelo), inference.model_columns)
+        inference.modelo = inference.backend.estimador
+        if not hilos:
+            inference.modelo.set_params(n_jobs=-1)
+
+
+def _trabajar(filas, segundos, inicio_en, seed):
+    from credit_risk import inference
+    from credit_risk.synthetic import generate_applicants
+
+    X = inference.encode(generate_applicants(filas, seed=seed))
+    while time.time() < inicio_en:
+        time.sleep(0.005)
+
+    latencias = []
+    fin = time.time() + segundos
+    while time.time() < fin:
+        t = time.perf_counter()
+        inference.predict_proba(X)
+        latencias.append(time.perf_counter() - t)
+    return len(latencias) * filas, latencias
+
+
+def medir(workers, hilos, ruta_modelo, filas, segundos):
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=contexto, initializer=_iniciar,
+                             initargs=(hilos, ruta_modelo)) as pool:
+        # Margen para que todos los workers carguen Django y el modelo
+        inicio_en = time.time() + 5 + workers
+        futuros = [pool.submit(_trabajar, filas, segundos, inicio_en, i) for i in range(workers)]
+        resultados = [f.result() for f in futuros]
+
+    total = sum(r[0] for r in resultados)
+    latencias = np.concatenate([r[1] for r in resultados]) * 1000
+    return total / segundos, np.percentile(latencias, 50), np.percentile(latencias, 99)
+
+
+# =========================
+# MODELO DE PRUEBA
+# =========================
+def entrenar_random_forest(ruta, n=20000):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+    import joblib
+
+    from credit_risk import inference
+    from credit_risk.model_validation import build_estimator
+    from credit_risk.synthetic import generate_applicants
+
+    df = generate_applicants(n)
+    modelo, _ = build_estimator('random_forest', n_estimators=200)
+    modelo.fit(inference.scale(inference.encode(df)), df['riesgo_real'].to_numpy())
+    joblib.dump(modelo, ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--hilos', type=int, default=1, help='Presupuesto por worker')
+    parser.add_argument('--modelo', choices=['actual', 'random_forest'], default='actual')
+    parser.add_argument('--filas', type=int, default=2000, help='Filas por llamada al modelo')
+    parser.add_argument('--segundos', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_modelo = None
+        if args.modelo == 'random_forest':
+            ruta_modelo = os.path.join(tmp, 'rf.pkl')
+            print('Entrenando RandomForest de prueba...')
+            entrenar_random_forest(ruta_modelo)
+
+        print(f'CPU: {os.cpu_count()} | modelo {args.modelo} | {args.filas} filas por llamada')
+        print(f"{'workers':>7} {'presupuesto':>12} {'filas/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+        for workers in args.workers:
+            for hilos, etiqueta in ((args.hilos, f'{args.hilos} hilo(s)'), (0, 'sin límite')):
+                rps, p50, p99 = medir(workers, hilos, ruta_modelo, args.filas, args.segundos)
+                print(f'{workers:>7} {etiqueta:>12} {rps:>12,.0f} {p50:>9.2f} {p99:>9.2f}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
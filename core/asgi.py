@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Tablas de TreeSHAP del modelo activo (las explicaciones se calculan al predecir)
+from credit_risk.explanations import warm_tree_tables  # noqa: E402
+
+warm_tree_tables()
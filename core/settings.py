@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -84,6 +85,19 @@ DATABASES = {
     }
 }
 
+# DJANGO_DB=sqlite permite levantar el servidor local sobre SQLite
+# (p. ej. para pruebas de carga) sin tocar la configuración de PostgreSQL.
+if os.environ.get('DJANGO_DB') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+            # Toma el bloqueo de escritura al abrir la transacción: evita
+            # "database is locked" entre analistas concurrentes
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,6 +140,57 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Archivo de evaluaciones cerradas (manage.py archive_evaluations)
+CREDIT_ARCHIVE_AFTER_DAYS = 365
+CREDIT_ARCHIVE_BATCH_SIZE = 5000
+# Solo PostgreSQL: crea la tabla de archivo particionada por created_at.
+# Debe definirse antes de aplicar la migración 0004.
+CREDIT_ARCHIVE_PARTITIONED = os.environ.get('CREDIT_ARCHIVE_PARTITIONED') == '1'
+
+# Actualización incremental del modelo (manage.py refresh_model)
+CREDIT_REFRESH_MIN_ROWS = 200
+# 1 de cada N casos decididos (por pk) se reserva como holdout y nunca se entrena
+CREDIT_REFRESH_HOLDOUT_MOD = 5
+CREDIT_REFRESH_HOLDOUT_MAX = 20000
+# Caída máxima de AUC aceptada frente al modelo activo en cada holdout
+CREDIT_REFRESH_MAX_AUC_DROP = 0.01
+
+# Re-puntuación de la cartera (manage.py rescore)
+CREDIT_RESCORE_BATCH_SIZE = 20000
+
+# Hilos nativos (BLAS/OpenMP) y n_jobs por llamada al modelo/scaler; 0 = sin límite.
+# Con N workers por máquina conviene N x CREDIT_INFERENCE_THREADS <= núcleos.
+CREDIT_INFERENCE_THREADS = int(os.environ.get('CREDIT_INFERENCE_THREADS', '1'))
+# Hilos de XGBoost (modelo_riesgo.ubj); 0 = los que permita el presupuesto OpenMP
+CREDIT_XGB_NTHREAD = int(os.environ.get('CREDIT_XGB_NTHREAD', '0'))
+
+# Planificación de inferencia (credit_risk/scheduler.py)
+CREDIT_SCHED_SLOTS = os.cpu_count() or 1
+# Turnos que puede ocupar a la vez la carga masiva (tope de CPU para lotes)
+CREDIT_SCHED_BATCH_SLOTS = max(1, CREDIT_SCHED_SLOTS // 2)
+# Hilos para cada bloque de carga masiva: con todos los turnos de lote
+# ocupados el total no supera los núcleos
+CREDIT_BATCH_THREADS = int(os.environ.get(
+    'CREDIT_BATCH_THREADS', str(max(1, (os.cpu_count() or 1) // CREDIT_SCHED_BATCH_SLOTS)),
+))
+CREDIT_SCHED_BATCH_CHUNK_ROWS = 5000
+# Admisión: filas de lote en proceso y p99 interactivo máximos
+CREDIT_SCHED_MAX_BATCH_ROWS = 1_000_000
+CREDIT_SCHED_INTERACTIVE_P99_MS = 1000
+# Filas del resultado de carga masiva que se muestran en pantalla
+CREDIT_BATCH_PREVIEW_ROWS = 1000
+# Carga masiva repartida entre procesos (credit_risk/sharding.py); 1 = en el proceso web.
+# El pool se crea una vez por proceso web y nunca puntúa más fragmentos a la vez
+# que CREDIT_SCHED_BATCH_SLOTS
+CREDIT_BATCH_WORKERS = int(os.environ.get('CREDIT_BATCH_WORKERS', '1'))
+CREDIT_BATCH_SHARD_ROWS = 250_000
+# Archivos subidos desde este tamaño se reparten entre CREDIT_BATCH_WORKERS procesos
+CREDIT_BATCH_SHARD_MIN_BYTES = 20 * 1024 * 1024
+
+# Cola de revisión: minutos que un caso queda reservado para el analista que lo tomó
+CREDIT_REVIEW_LEASE_MINUTES = 15
+CREDIT_REVIEW_PAGE_SIZE = 50
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
@@ -0,0 +1,223 @@
+"""
+Índice incremental de historial por solicitante (cliente_cedula).
+
+CreditEvaluation.save() y delete() actualizan el resumen mediante señales
+(signals.py); los bulk_create no emiten señales, por lo que quien inserte en bloque debe
+llamar a record_evaluations() con las evaluaciones insertadas.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ApplicantHistory, CreditEvaluation, CreditEvaluationArchive
+
+
+# Ids / cédulas por consulta en las actualizaciones por lista (límite de
+# parámetros de SQLite)
+LOTE_IN = 5000
+
+
+def get_applicant_history(cedula):
+    if not cedula:
+        return None
+    return ApplicantHistory.objects.filter(pk=cedula).first()
+
+
+def _como_ultima(e):
+    return {
+        'ultima_evaluacion_id': e.pk,
+        'ultima_evaluacion_at': e.created_at,
+        'ultima_prob_riesgo': e.prob_riesgo,
+        'ultimo_estado': e.estado_caso,
+        'ultima_decision': e.decision_final,
+    }
+
+
+# =========================
+# ACTUALIZACIÓN INCREMENTAL
+# =========================
+def record_evaluation(e, cantidad=1, max_prob=None):
+    """
+    Suma `cantidad` evaluaciones al resumen de e.cliente_cedula, tomando `e`
+    como la más reciente si lo es. Un solo UPDATE (o INSERT la primera vez).
+    """
+    if not e.cliente_cedula:
+        return
+    max_prob = e.prob_riesgo if max_prob is None else max_prob
+    es_mas_reciente = Q(ultima_evaluacion_at__isnull=True) | Q(ultima_evaluacion_at__lte=e.created_at)
+
+    cambios = {
+        campo: Case(
+            When(es_mas_reciente, then=Value(valor)),
+            default=F(campo),
+            output_field=ApplicantHistory._meta.get_field(campo),
+        )
+        for campo, valor in _como_ultima(e).items()
+    }
+    cambios['total_evaluaciones'] = F('total_evaluaciones') + cantidad
+    cambios['max_prob_riesgo'] = Greatest(Coalesce(F('max_prob_riesgo'), Value(max_prob)), Value(max_prob))
+    # update() no aplica auto_now
+    cambios['updated_at'] = timezone.now()
+
+    if ApplicantHistory.objects.filter(pk=e.cliente_cedula).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            ApplicantHistory.objects.create(
+                cliente_cedula=e.cliente_cedula,
+                total_evaluaciones=cantidad,
+                max_prob_riesgo=max_prob,
+                **_como_ultima(e),
+            )
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        ApplicantHistory.objects.filter(pk=e.cliente_cedula).update(**cambios)
+
+
+def refresh_last_state(e):
+    """Propaga estado/decisión si `e` es la evaluación más reciente del cliente."""
+    if not e.cliente_cedula:
+        return
+    ApplicantHistory.objects.filter(pk=e.cliente_cedula, ultima_evaluacion_id=e.pk).update(
+        ultimo_estado=e.estado_caso,
+        ultima_decision=e.decision_final,
+        ultima_prob_riesgo=e.prob_riesgo,
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_last_states(ids, estado, decision):
+    """Versión de refresh_last_state para decisiones en bloque (ids o subconsulta)."""
+    return ApplicantHistory.objects.filter(ultima_evaluacion_id__in=ids).update(
+        ultimo_estado=estado,
+        ultima_decision=decision,
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_scores(modelo_bd, ids, cedulas):
+    """
+    Tras re-puntuar las evaluaciones `ids` de `modelo_bd` (rescore): última
+    probabilidad de los resúmenes que apuntan a ellas y máximo de las
+    `cedulas` afectadas, recalculado sobre las tablas viva y de archivo.
+    """
+    ahora = timezone.now()
+    ultima = Subquery(modelo_bd.objects.filter(pk=OuterRef('ultima_evaluacion_id')).values('prob_riesgo')[:1])
+    maximos = [
+        Subquery(
+            modelo.objects.filter(cliente_cedula=OuterRef('pk'))
+            .values('cliente_cedula').annotate(m=Max('prob_riesgo')).values('m')
+        )
+        for modelo in (CreditEvaluation, CreditEvaluationArchive)
+    ]
+    # Una cédula puede no tener filas en una de las dos tablas (subconsulta NULL)
+    maximo = Greatest(Coalesce(*maximos), Coalesce(*reversed(maximos)))
+
+    ids, cedulas = list(ids), list(cedulas)
+    for i in range(0, len(ids), LOTE_IN):
+        ApplicantHistory.objects.filter(ultima_evaluacion_id__in=ids[i:i + LOTE_IN]).update(
+            ultima_prob_riesgo=ultima, updated_at=ahora,
+        )
+    for i in range(0, len(cedulas), LOTE_IN):
+        ApplicantHistory.objects.filter(pk__in=cedulas[i:i + LOTE_IN]).update(
+            max_prob_riesgo=maximo, updated_at=ahora,
+        )
+
+
+def forget_evaluation(e):
+    """
+    Quita una evaluación borrada del resumen: la cédula se recalcula desde las
+    tablas viva y de archivo (el máximo y la última no se pueden descontar).
+    """
+    if e.cliente_cedula:
+        recompute_applicant(e.cliente_cedula)
+
+
+def record_evaluations(evaluaciones):
+    """Versión para inserciones en bloque: un upsert por cédula distinta."""
+    por_cedula = {}
+    for e in evaluaciones:
+        if not e.cliente_cedula:
+            continue
+        grupo = por_cedula.setdefault(e.cliente_cedula, [0, None, None])
+        grupo[0] += 1
+        if grupo[1] is None or e.created_at >= grupo[1].created_at:
+            grupo[1] = e
+        grupo[2] = e.prob_riesgo if grupo[2] is None else max(grupo[2], e.prob_riesgo)
+
+    for cantidad, ultima, max_prob in por_cedula.values():
+        record_evaluation(ultima, cantidad=cantidad, max_prob=max_prob)
+
+
+# =========================
+# RECONSTRUCCIÓN
+# =========================
+def recompute_applicant(cedula):
+    """Recalcula el resumen de una sola cédula; lo elimina si ya no tiene evaluaciones."""
+    filas = []
+    for modelo in (CreditEvaluation, CreditEvaluationArchive):
+        filas += modelo.objects.filter(cliente_cedula=cedula).values_list(
+            'created_at', 'id', 'prob_riesgo', 'estado_caso', 'decision_final',
+        )
+    if not filas:
+        ApplicantHistory.objects.filter(pk=cedula).delete()
+        return None
+
+    created_at, pk, prob, estado, decision = max(filas, key=lambda f: f[:2])
+    historial, _ = ApplicantHistory.objects.update_or_create(
+        cliente_cedula=cedula,
+        defaults={
+            'total_evaluaciones': len(filas),
+            'max_prob_riesgo': max(f[2] for f in filas),
+            'ultima_evaluacion_at': created_at,
+            'ultima_evaluacion_id': pk,
+            'ultima_prob_riesgo': prob,
+            'ultimo_estado': estado,
+            'ultima_decision': decision,
+        },
+    )
+    return historial
+
+
+def rebuild_applicant_history(batch_size=5000):
+    """
+    Recalcula el índice desde cero con una sola pasada sobre las tablas viva
+    y de archivo. Útil tras cargas masivas o para reparar desvíos.
+    """
+    resumen = {}
+    for modelo in (CreditEvaluation, CreditEvaluationArchive):
+        filas = (
+            modelo.objects.exclude(cliente_cedula__isnull=True).exclude(cliente_cedula='')
+            .values_list('cliente_cedula', 'created_at', 'id', 'prob_riesgo', 'estado_caso', 'decision_final')
+        )
+        for cedula, *ultima in filas.iterator(chunk_size=batch_size):
+            r = resumen.get(cedula)
+            if r is None:
+                resumen[cedula] = [1, ultima[2], ultima]
+                continue
+            r[0] += 1
+            r[1] = max(r[1], ultima[2])
+            if ultima[:2] > r[2][:2]:
+                r[2] = ultima
+
+    with transaction.atomic():
+        ApplicantHistory.objects.all().delete()
+        ApplicantHistory.objects.bulk_create(
+            (
+                ApplicantHistory(
+                    cliente_cedula=cedula,
+                    total_evaluaciones=n,
+                    max_prob_riesgo=max_prob,
+                    ultima_evaluacion_at=created_at,
+                    ultima_evaluacion_id=pk,
+                    ultima_prob_riesgo=prob,
+                    ultimo_estado=estado,
+                    ultima_decision=decision,
+                )
+                for cedula, (n, max_prob, (created_at, pk, prob, estado, decision)) in resumen.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(resumen)
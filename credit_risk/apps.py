@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CreditRiskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'credit_risk'
+
+    def ready(self):
+        from . import signals  # noqa: F401
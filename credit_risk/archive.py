@@ -0,0 +1,144 @@
+"""
+Archivo de evaluaciones cerradas (almacenamiento caliente / frío).
+
+Las evaluaciones APROBADO/RECHAZADO con más de CREDIT_ARCHIVE_AFTER_DAYS días
+se mueven por lotes a CreditEvaluationArchive; cada lote es una transacción
+(insertar en el archivo + borrar de la tabla viva). Las vistas del día a día
+solo consultan CreditEvaluation; el detalle usa get_evaluation_or_404, que
+busca primero en la tabla viva y luego en el archivo.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .models import CreditEvaluation, CreditEvaluationArchive
+
+
+CLOSED_STATES = ('APROBADO', 'RECHAZADO')
+
+ARCHIVED_FIELDS = [
+    f.attname for f in CreditEvaluationArchive._meta.concrete_fields
+    if f.attname != 'archived_at'
+]
+
+
+# =========================
+# LECTURA TRANSPARENTE
+# =========================
+def get_evaluation_or_404(pk):
+    """Busca la evaluación en la tabla viva y, si no está, en el archivo."""
+    for modelo in (CreditEvaluation, CreditEvaluationArchive):
+        evaluacion = modelo.objects.select_related('user').filter(pk=pk).first()
+        if evaluacion is not None:
+            return evaluacion
+    raise Http404("Evaluación no encontrada")
+
+
+# =========================
+# PARTICIONES (POSTGRESQL)
+# =========================
+def archive_is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [CreditEvaluationArchive._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def _meses(desde, hasta):
+    actual = desde.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while actual <= hasta:
+        siguiente = (actual + timedelta(days=32)).replace(day=1)
+        yield actual, siguiente
+        actual = siguiente
+
+
+def ensure_monthly_partitions(desde, hasta):
+    """Crea las particiones mensuales que cubren [desde, hasta] si no existen."""
+    tabla = CreditEvaluationArchive._meta.db_table
+    with connection.cursor() as cursor:
+        for inicio, fin in _meses(desde, hasta):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{tabla}_p{inicio:%Y%m}" PARTITION OF "{tabla}" '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [inicio, fin],
+            )
+
+
+# =========================
+# MOVIMIENTO POR LOTES
+# =========================
+def archivable_queryset(dias=None):
+    dias = settings.CREDIT_ARCHIVE_AFTER_DAYS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    return CreditEvaluation.objects.filter(estado_caso__in=CLOSED_STATES, created_at__lt=limite)
+
+
+def _delete_live(ids):
+    # DELETE directo, sin post_delete por fila: las evaluaciones siguen en el
+    # archivo, así que el historial por cédula no cambia
+    tabla = connection.ops.quote_name(CreditEvaluation._meta.db_table)
+    with connection.cursor() as cursor:
+        for i in range(0, len(ids), 1000):
+            parte = ids[i:i + 1000]
+            cursor.execute(f'DELETE FROM {tabla} WHERE id IN ({", ".join(["%s"] * len(parte))})', parte)
+
+
+def archive_batch(ids, particionado=False, dias=None):
+    """
+    Mueve al archivo, en una sola transacción, las evaluaciones de `ids` que
+    siguen siendo archivables al bloquearlas (un caso reabierto entre el
+    listado y el bloqueo se queda en la tabla viva). Devuelve cuántas movió.
+    """
+    with transaction.atomic():
+        filas = list(
+            archivable_queryset(dias)
+            .select_for_update(skip_locked=True)
+            .filter(pk__in=ids)
+            .values(*ARCHIVED_FIELDS)
+        )
+        if not filas:
+            return 0
+
+        if particionado:
+            fechas = [f['created_at'] for f in filas]
+            ensure_monthly_partitions(min(fechas), max(fechas))
+
+        ahora = timezone.now()
+        CreditEvaluationArchive.objects.bulk_create(
+            [CreditEvaluationArchive(archived_at=ahora, **f) for f in filas],
+            batch_size=1000,
+        )
+        _delete_live([f['id'] for f in filas])
+        return len(filas)
+
+
+def archive_evaluations(dias=None, batch_size=None, limite=None, progreso=None):
+    """
+    Archiva todas las evaluaciones cerradas más antiguas que `dias`.
+
+    Recorre por pk ascendente en lotes de batch_size; devuelve el total movido.
+    """
+    batch_size = batch_size or settings.CREDIT_ARCHIVE_BATCH_SIZE
+    qs = archivable_queryset(dias).order_by('pk')
+    particionado = archive_is_partitioned()
+
+    total = 0
+    ultimo_pk = 0
+    while limite is None or total < limite:
+        tam = batch_size if limite is None else min(batch_size, limite - total)
+        ids = list(qs.filter(pk__gt=ultimo_pk).values_list('pk', flat=True)[:tam])
+        if not ids:
+            break
+        ultimo_pk = ids[-1]
+        total += archive_batch(ids, particionado=particionado, dias=dias)
+        if progreso:
+            progreso(total)
+    return total
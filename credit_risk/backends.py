@@ -0,0 +1,125 @@
+"""
+Backends de inferencia: cómo se carga y se consulta cada tipo de artefacto.
+
+    SklearnBackend -> estimadores de sklearn guardados con joblib (.pkl)
+    XGBoostBackend -> Booster nativo de XGBoost (.ubj): inplace_predict sobre
+                      NumPy, sin DataFrame ni DMatrix en el camino
+
+Ambos reciben la matriz ya escalada (filas x features.json) y devuelven la
+probabilidad de impago. Si en el directorio del modelo existe
+modelo_riesgo.ubj tiene prioridad sobre modelo_riesgo.pkl.
+"""
+
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+try:
+    import xgboost as xgb
+except ImportError:  # XGBoost es opcional para servir modelos de sklearn
+    xgb = None
+
+
+MODEL_PKL = 'modelo_riesgo.pkl'
+MODEL_XGB = 'modelo_riesgo.ubj'
+# Atributo del Booster con los parámetros de entrenamiento: el .ubj guarda los
+# árboles pero no eta/max_depth, que refresh_model necesita para seguir entrenando
+XGB_PARAMS_ATTR = 'parametros_entrenamiento'
+# Dependen de la máquina que entrena, no del modelo
+XGB_PARAMS_EXCLUIDOS = ('n_jobs', 'nthread')
+
+
+def configure_estimator(estimador):
+    """
+    Deja n_jobs=None en estimadores de sklearn para que el presupuesto de cada
+    llamada (parallel_config) decida; otras librerías reciben el presupuesto fijo.
+    """
+    if 'n_jobs' in getattr(estimador, 'get_params', dict)():
+        if type(estimador).__module__.startswith('sklearn'):
+            estimador.set_params(n_jobs=None)
+        else:
+            estimador.set_params(n_jobs=settings.CREDIT_INFERENCE_THREADS or None)
+    return estimador
+
+
+class SklearnBackend:
+    nombre = 'sklearn'
+
+    def __init__(self, estimador, columnas):
+        self.estimador = configure_estimator(estimador)
+        self.columnas = columnas
+
+    def model_input(self, X_scaled):
+        if hasattr(self.estimador, 'feature_names_in_'):
+            # Modelos entrenados con DataFrame (p. ej. RandomForest del notebook)
+            return pd.DataFrame(X_scaled, columns=self.columnas)
+        return X_scaled
+
+    def predict_proba(self, X_scaled):
+        return self.estimador.predict_proba(self.model_input(X_scaled))[:, 1]
+
+
+class XGBoostBackend:
+    nombre = 'xgboost'
+
+    def __init__(self, booster):
+        if not isinstance(booster, xgb.Booster):
+            booster = booster.get_booster()  # XGBClassifier
+        # nthread=0 sigue el límite OpenMP del presupuesto de hilos (threadpoolctl)
+        booster.set_param({'nthread': settings.CREDIT_XGB_NTHREAD})
+        self.estimador = booster
+
+    def predict_proba(self, X_scaled):
+        X = np.ascontiguousarray(X_scaled, dtype=np.float32)
+        # binary:logistic -> inplace_predict ya devuelve la probabilidad
+        return self.estimador.inplace_predict(X, validate_features=False)
+
+
+def is_xgboost(estimador):
+    return xgb is not None and (
+        isinstance(estimador, xgb.Booster) or isinstance(estimador, xgb.XGBModel)
+    )
+
+
+def xgb_training_params(estimador):
+    """Parámetros de entrenamiento de un XGBClassifier o los guardados en el Booster."""
+    if isinstance(estimador, xgb.XGBModel):
+        return {
+            clave: valor for clave, valor in estimador.get_xgb_params().items()
+            if valor is not None and clave not in XGB_PARAMS_EXCLUIDOS
+        }
+    return json.loads(estimador.attr(XGB_PARAMS_ATTR) or '{}')
+
+
+def make_backend(estimador, columnas):
+    if is_xgboost(estimador):
+        return XGBoostBackend(estimador)
+    return SklearnBackend(estimador, columnas)
+
+
+def load_backend(directorio, columnas):
+    ruta_xgb = os.path.join(directorio, MODEL_XGB)
+    if os.path.exists(ruta_xgb):
+        if xgb is None:
+            raise ImportError(f"{ruta_xgb} requiere el paquete xgboost")
+        booster = xgb.Booster()
+        booster.load_model(ruta_xgb)
+        return XGBoostBackend(booster)
+    return make_backend(joblib.load(os.path.join(directorio, MODEL_PKL)), columnas)
+
+
+def save_model(estimador, directorio):
+    """Guarda el artefacto en el formato de su backend; devuelve la ruta."""
+    if is_xgboost(estimador):
+        booster = estimador if isinstance(estimador, xgb.Booster) else estimador.get_booster()
+        booster.set_attr(**{XGB_PARAMS_ATTR: json.dumps(xgb_training_params(estimador))})
+        ruta = os.path.join(directorio, MODEL_XGB)
+        booster.save_model(ruta)
+    else:
+        ruta = os.path.join(directorio, MODEL_PKL)
+        joblib.dump(estimador, ruta)
+    return ruta
@@ -0,0 +1,298 @@
+"""
+Contribuciones por variable para cada predicción.
+
+- Regresión logística: coeficiente x valor escalado (unidades de log-odds);
+  base = intercepto.
+- Ensambles de árboles (RandomForest / ExtraTrees): TreeSHAP exacto
+  (path-dependent) en unidades de probabilidad; base = valor medio de la raíz.
+- XGBoost: TreeSHAP nativo del Booster (pred_contribs) en log-odds; base =
+  última columna.
+
+Ambos se calculan para lotes completos con operaciones NumPy. Para los árboles
+se usa la identidad
+
+    sum_j  j!(d-1-j)!/d! * c_j  =  ∫_0^1  prod_{k != i} (o_k t + z_k (1 - t)) dt
+
+(o_k: la fila cumple las condiciones del camino para la variable k; z_k:
+fracción de cobertura del camino), que se integra exactamente con cuadratura
+de Gauss-Legendre. Como o_k vale 0 o 1, cada factor es uno de dos valores
+precalculados por hoja y nodo de cuadratura: el producto sale de una suma de
+logaritmos y la contribución de cada posición de un producto matricial por
+hoja. Las tablas de caminos de todos los árboles se construyen una vez por
+modelo cargado y quedan en el backend (tree_tables).
+
+Las contribuciones se calculan al puntuar (predicción individual, rescore,
+seed_evaluations) y se guardan en CreditEvaluation.contribuciones como float32
+(4 bytes por variable), junto con la base y la unidad del modelo que las
+produjo; el detalle del caso solo las lee.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from . import inference
+from .backends import is_xgboost, make_backend, xgb
+
+
+# Tamaño máximo de cada arreglo intermedio de TreeSHAP (filas x hojas x variables)
+MAX_BLOCK_ELEMENTS = 2_000_000
+MAX_BLOCK_ROWS = 256
+
+_tablas_lock = threading.Lock()
+
+
+# =========================
+# MODELO LINEAL
+# =========================
+def explain_linear(modelo, X_scaled):
+    coef = np.ravel(modelo.coef_)
+    base = float(np.ravel(modelo.intercept_)[0])
+    return base, X_scaled * coef
+
+
+# =========================
+# ÁRBOLES: TreeSHAP
+# =========================
+def _leaf_paths(estimator, peso):
+    """Por hoja: (valor x peso, {variable: (lo, hi, z)}) y el valor de la raíz."""
+    t = estimator.tree_
+    valores = t.value[:, 0, :]
+    valores = valores[:, 1] / valores.sum(axis=1)
+    cobertura = t.weighted_n_node_samples
+
+    hojas = []
+    pila = [(0, {})]
+    while pila:
+        nodo, condiciones = pila.pop()
+        izq, der = t.children_left[nodo], t.children_right[nodo]
+        if izq == -1:
+            hojas.append((valores[nodo] * peso, condiciones))
+            continue
+        f, umbral = t.feature[nodo], t.threshold[nodo]
+        lo, hi, z = condiciones.get(f, (-np.inf, np.inf, 1.0))
+        for hijo, rango in ((izq, (lo, min(hi, umbral))), (der, (max(lo, umbral), hi))):
+            nuevas = dict(condiciones)
+            nuevas[f] = (*rango, z * cobertura[hijo] / cobertura[nodo])
+            pila.append((hijo, nuevas))
+    return hojas, valores[0]
+
+
+def _tabla(hojas, D, n_features):
+    """Arreglos de un grupo de hojas con D variables distintas en el camino."""
+    L = len(hojas)
+    feats = np.zeros((L, D), dtype=np.int64)
+    lo, hi, z, v = np.empty((L, D)), np.empty((L, D)), np.empty((L, D)), np.empty(L)
+    for l, (valor, condiciones) in enumerate(hojas):
+        v[l] = valor
+        for k, (f, (a, b, c)) in enumerate(condiciones.items()):
+            feats[l, k], lo[l, k], hi[l, k], z[l, k] = f, a, b, c
+
+    # Gauss-Legendre en [0, 1], exacto para el integrando de grado D-1
+    t, w = np.polynomial.legendre.leggauss((D + 1) // 2)
+    t, w = (t + 1) / 2, w / 2
+    zq = z[..., None]
+    a = zq + (1 - zq) * t  # factor si la fila cumple la condición (o = 1)
+    b = zq * (1 - t)       # factor si no la cumple (o = 0)
+    return {
+        'feats': feats, 'lo': lo[..., None], 'hi': hi[..., None],
+        # log P_q = sum_k log b + sum_k o_k (log a - log b)
+        'log_b': np.log(b).sum(axis=1)[..., None],
+        'dlog': np.swapaxes(np.log(a) - np.log(b), 1, 2),
+        # contribución de la posición k: sum_q P_q * (o_k ? ca : cb)
+        'ca': v[:, None, None] * (1 - zq) * w / a,
+        'cb': -v[:, None, None] * zq * w / b,
+        # variable x (hoja, posición), para acumular con un producto disperso
+        'mapa': sparse.csc_matrix(
+            (np.ones(L * D), (feats.ravel(), np.arange(L * D))), shape=(n_features, L * D),
+        ),
+    }
+
+
+def build_tree_tables(modelo, n_features):
+    """
+    Tablas de caminos de todos los árboles del ensamble, agrupadas por la
+    cantidad de variables distintas del camino (sin relleno). Se construyen una
+    vez por modelo cargado (tree_tables).
+    """
+    estimadores = getattr(modelo, 'estimators_', [modelo])
+    por_largo, base = {}, 0.0
+    for estimador in estimadores:
+        hojas, raiz = _leaf_paths(estimador, 1 / len(estimadores))
+        base += raiz / len(estimadores)
+        for hoja in hojas:
+            # Un árbol de una sola hoja solo aporta a la base
+            if hoja[1]:
+                por_largo.setdefault(len(hoja[1]), []).append(hoja)
+    grupos = [_tabla(hojas, D, n_features) for D, hojas in sorted(por_largo.items())]
+    return {'base': base, 'n_features': n_features, 'grupos': grupos}
+
+
+def tree_tables(backend):
+    """Tablas del modelo del backend; quedan en el backend (un modelo nuevo trae las suyas)."""
+    with _tablas_lock:
+        if getattr(backend, 'tablas_arbol', None) is None:
+            backend.tablas_arbol = build_tree_tables(backend.estimador, len(inference.model_columns))
+        return backend.tablas_arbol
+
+
+def warm_tree_tables():
+    """
+    Construye en segundo plano las tablas del modelo activo si es un ensamble
+    de árboles, para que la primera predicción del servidor no las espere.
+    """
+    modelo = inference.modelo
+    if is_xgboost(modelo) or not (hasattr(modelo, 'estimators_') or hasattr(modelo, 'tree_')):
+        return None
+    hilo = threading.Thread(target=tree_tables, args=(inference.backend,), name='tablas-treeshap', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def _tree_shap(grupo, X, phi):
+    L, D = grupo['feats'].shape
+    # Bloques de filas x hojas: cada temporal (hojas x D x filas) queda por
+    # debajo de MAX_BLOCK_ELEMENTS y cada producto por hoja cubre varias filas
+    filas = min(X.shape[0], MAX_BLOCK_ROWS)
+    paso = max(1, MAX_BLOCK_ELEMENTS // (filas * D))
+    for inicio in range(0, X.shape[0], filas):
+        XT = np.ascontiguousarray(X[inicio:inicio + filas].T, dtype=np.float64)
+        for h in range(0, L, paso):
+            hojas = slice(h, h + paso)
+            xv = XT[grupo['feats'][hojas]]  # hojas x D x filas
+            o = (xv > grupo['lo'][hojas]) & (xv <= grupo['hi'][hojas])
+            del xv
+
+            P = np.exp(grupo['log_b'][hojas] + grupo['dlog'][hojas] @ o.astype(np.float64))
+            contrib = np.where(o, grupo['ca'][hojas] @ P, grupo['cb'][hojas] @ P)
+            del P, o
+            mapa = grupo['mapa'][:, h * D:(h + len(contrib)) * D]
+            phi[inicio:inicio + filas] += (mapa @ contrib.reshape(-1, XT.shape[1])).T
+
+
+def explain_tree_ensemble(modelo, X, tablas=None):
+    """TreeSHAP (base, filas x variables) con las tablas ya construidas si se pasan."""
+    tablas = build_tree_tables(modelo, X.shape[1]) if tablas is None else tablas
+    phi = np.zeros(X.shape, dtype=np.float64)
+    for grupo in tablas['grupos']:
+        _tree_shap(grupo, X, phi)
+    return tablas['base'], phi
+
+
+# =========================
+# XGBOOST
+# =========================
+def explain_xgboost(modelo, X_scaled):
+    booster = modelo if isinstance(modelo, xgb.Booster) else modelo.get_booster()
+    contribuciones = booster.predict(
+        xgb.DMatrix(np.asarray(X_scaled, dtype=np.float32)), pred_contribs=True, validate_features=False,
+    )
+    return float(contribuciones[0, -1]), contribuciones[:, :-1].astype(np.float64)
+
+
+# =========================
+# API
+# =========================
+def explain(X, modelo=None):
+    """
+    Contribuciones (filas x variables) para una matriz codificada sin escalar.
+    Devuelve (base, contribuciones).
+    """
+    backend = inference.backend if modelo is None else make_backend(modelo, inference.model_columns)
+    modelo = backend.estimador
+    with inference.default_thread_budget():
+        X_modelo = inference.scale(X)
+        if is_xgboost(modelo):
+            return explain_xgboost(modelo, X_modelo)
+        if hasattr(modelo, 'coef_'):
+            return explain_linear(modelo, X_modelo)
+        if hasattr(modelo, 'estimators_') or hasattr(modelo, 'tree_'):
+            # sklearn evalúa los umbrales de los árboles sobre X en float32
+            return explain_tree_ensemble(
+                modelo, np.asarray(X_modelo, dtype=np.float32), tablas=tree_tables(backend),
+            )
+    raise TypeError(f"No hay explicador para {type(modelo).__name__}")
+
+
+def contribution_units(modelo=None):
+    """Unidades de las contribuciones que produce `modelo` (por defecto el activo)."""
+    modelo = inference.modelo if modelo is None else modelo
+    return 'log-odds' if is_xgboost(modelo) or hasattr(modelo, 'coef_') else 'probabilidad'
+
+
+def stored_units(evaluacion):
+    """Unidades guardadas con las contribuciones de la evaluación."""
+    if evaluacion.contribuciones is None:
+        return None
+    # Filas explicadas antes de guardar la unidad: se asume el modelo activo
+    return evaluacion.contribucion_unidad or contribution_units()
+
+
+def contribution_values(X):
+    """
+    (contribuciones empaquetadas por fila, base, unidad) para una matriz
+    codificada sin escalar: lo que se guarda junto con la puntuación.
+    """
+    base, contrib = explain(X)
+    return [pack_contributions(c) for c in contrib], base, contribution_units()
+
+
+def pack_contributions(fila) -> bytes:
+    return np.asarray(fila, dtype=np.float32).tobytes()
+
+
+def unpack_contributions(blob):
+    if not blob:
+        return None
+    return np.frombuffer(bytes(blob), dtype=np.float32)
+
+
+def top_contributions(evaluacion, k=8):
+    """[(variable, contribución), ...] ordenadas por magnitud, desde lo guardado."""
+    valores = unpack_contributions(evaluacion.contribuciones)
+    columnas = inference.model_columns
+    if valores is None or len(valores) != len(columnas):
+        return []
+    orden = np.argsort(-np.abs(valores))[:k]
+    return [(columnas[i], float(valores[i])) for i in orden if valores[i] != 0]
+
+
+# =========================
+# RELLENO EN BLOQUE
+# =========================
+def explain_missing(modelo_bd, batch_size=5000, limite=None, progreso=None):
+    """
+    Calcula y guarda las contribuciones de las evaluaciones que no las tienen
+    (filas anteriores a que se guardaran al puntuar o sembradas sin ellas).
+
+    Recorre por rangos de pk; cada lote se reconstruye como una matriz de diseño
+    desde las columnas guardadas, se explica con una sola llamada y se escribe
+    con bulk_update.
+    """
+    pendientes = modelo_bd.objects.filter(contribuciones__isnull=True)
+    total, ultimo_pk = 0, None
+    while limite is None or total < limite:
+        lote = pendientes.order_by('pk')
+        if ultimo_pk is not None:
+            lote = lote.filter(pk__gt=ultimo_pk)
+        tam = batch_size if limite is None else min(batch_size, limite - total)
+        filas = list(lote.values('pk', *inference.INPUT_FIELDS)[:tam])
+        if not filas:
+            break
+
+        contrib, base, unidad = contribution_values(inference.encode(pd.DataFrame(filas)))
+        objetos = [
+            modelo_bd(pk=f['pk'], contribuciones=c, contribucion_base=base, contribucion_unidad=unidad)
+            for f, c in zip(filas, contrib)
+        ]
+        modelo_bd.objects.bulk_update(
+            objetos, ['contribuciones', 'contribucion_base', 'contribucion_unidad'], batch_size=1000,
+        )
+
+        total += len(filas)
+        ultimo_pk = filas[-1]['pk']
+        if progreso:
+            progreso(total)
+    return total
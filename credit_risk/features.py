@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# DEFINICIÓN DE VARIABLES
+# =========================
+NUMERIC_COLUMNS = [
+    'dias_mora_prom', 'edad', 'ingreso_mensual', 'ventas_anuales',
+    'monto_solicitado', 'plazo_meses',
+]
+BOOLEAN_COLUMNS = ['tiene_garante', 'propiedad_completa', 'estado_legal', 'rastreo_instalado']
+CATEGORICAL_COLUMNS = ['segmento_credito', 'producto', 'garantia', 'estado_civil']
+
+# Codificación ordinal del score (misma que 01_limpieza_datos.ipynb)
+SCORE_ORDINAL = {'AAA': 1, 'AA': 2, 'A': 3, 'Rechazado': 4}
+
+# Valores del formulario que difieren de los usados en entrenamiento
+CATEGORY_ALIASES = {
+    'estado_civil': {'UnionLibre': 'Unión Libre'},
+}
+
+TRUE_VALUES = {'1', '1.0', 'true', 'si', 'sí', 'on', 'yes'}
+
+
+def load_feature_columns(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _as_flags(serie: pd.Series) -> np.ndarray:
+    if serie.dtype == object or isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(str).str.strip().str.lower().isin(TRUE_VALUES).to_numpy()
+    return pd.to_numeric(serie, errors='coerce').fillna(0).to_numpy() != 0
+
+
+def encode_frame(df: pd.DataFrame, columns, dtype=np.float64) -> np.ndarray:
+    """
+    Construye la matriz de diseño (filas x columns) de forma vectorizada.
+
+    Acepta tanto datos crudos (score_interno, garantia, estado_civil, ...) como
+    datos ya codificados (columnas one-hot presentes en df). Las columnas que
+    no se pueden derivar (p. ej. score_ordinal en el formulario) quedan en 0.
+    """
+    n = len(df)
+    X = np.zeros((n, len(columns)), dtype=dtype)
+    idx = {c: i for i, c in enumerate(columns)}
+
+    # Columnas ya presentes con el mismo nombre (datasets codificados)
+    for col in columns:
+        if col in df.columns and col not in BOOLEAN_COLUMNS:
+            X[:, idx[col]] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy()
+
+    # Booleanas
+    for col in BOOLEAN_COLUMNS:
+        if col in idx and col in df.columns:
+            X[:, idx[col]] = _as_flags(df[col])
+
+    # Score ordinal
+    if 'score_ordinal' in idx and 'score_interno' in df.columns:
+        categorico = pd.Categorical(df['score_interno'])
+        ordinales = np.array([SCORE_ORDINAL.get(c, 0) for c in categorico.categories] + [0])
+        X[:, idx['score_ordinal']] = ordinales[categorico.codes]
+
+    # Categóricas (one-hot sobre los códigos para no comparar cadenas fila a fila)
+    for cat in CATEGORICAL_COLUMNS:
+        if cat not in df.columns:
+            continue
+        # Los alias se aplican sobre las categorías (no fila a fila): dos
+        # categorías con el mismo alias marcan la misma columna
+        alias = CATEGORY_ALIASES.get(cat, {})
+        categorico = pd.Categorical(df[cat])
+        codigos = categorico.codes
+        for k, categoria in enumerate(categorico.categories):
+            col = f'{cat}_{alias.get(categoria, categoria)}'
+            if col in idx:
+                X[codigos == k, idx[col]] = 1
+
+    return X
@@ -17,6 +17,25 @@ class CreditForm(forms.Form):
         ('UnionLibre', 'Unión Libre')
     ]
 
+    # Identificación del cliente (opcional; habilita el historial por cédula)
+    cliente_cedula = forms.CharField(
+        label="Cédula",
+        max_length=10,
+        required=False
+    )
+
+    cliente_nombres = forms.CharField(
+        label="Nombres",
+        max_length=120,
+        required=False
+    )
+
+    cliente_apellidos = forms.CharField(
+        label="Apellidos",
+        max_length=120,
+        required=False
+    )
+
     # Datos demográficos
     edad = forms.IntegerField(
         label="Edad",
@@ -78,7 +97,7 @@ class CreditForm(forms.Form):
 
 class FileUploadForm(forms.Form):
     file = forms.FileField(
-        label='Selecciona un archivo (Excel .xlsx o CSV .csv)',
+        label='Selecciona un archivo (CSV .csv, Excel .xlsx o Parquet .parquet)',
         help_text='El archivo debe contener las columnas requeridas por el modelo.'
     )
 
@@ -89,3 +108,45 @@ class DecisionForm(forms.ModelForm):
     class Meta:
         model = CreditEvaluation
         fields = ['estado_caso', 'decision_final', 'comentario_analista']
+
+
+class BulkDecisionForm(forms.Form):
+    decision = forms.ChoiceField(
+        label="Decisión",
+        choices=[(e, e.capitalize()) for e in ('APROBADO', 'RECHAZADO', 'OBSERVADO')],
+    )
+    comentario = forms.CharField(label="Comentario", required=False, widget=forms.Textarea(attrs={'rows': 2}))
+
+
+class WhatIfForm(CreditForm):
+    OPCIONES_PLAZO = [(p, f"{p} meses") for p in (12, 24, 36, 48, 60, 72, 84)]
+
+    # El monto y el plazo los define la grilla
+    monto_solicitado = None
+    plazo_meses = None
+
+    monto_min = forms.FloatField(label="Monto mínimo ($)", min_value=0, initial=1000)
+    monto_max = forms.FloatField(label="Monto máximo ($)", min_value=0, initial=50000)
+    monto_pasos = forms.IntegerField(label="Pasos de monto", min_value=2, max_value=200, initial=50)
+
+    plazos = forms.TypedMultipleChoiceField(
+        choices=OPCIONES_PLAZO,
+        coerce=int,
+        label="Plazos a evaluar",
+        initial=[p for p, _ in OPCIONES_PLAZO],
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    garantias = forms.MultipleChoiceField(
+        choices=CreditForm.OPCIONES_GARANTIA,
+        label="Comparar garantías (opcional)",
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('monto_min') is not None and cleaned.get('monto_max') is not None:
+            if cleaned['monto_min'] >= cleaned['monto_max']:
+                raise forms.ValidationError("El monto mínimo debe ser menor que el máximo.")
+        return cleaned
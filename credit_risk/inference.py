@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from joblib import parallel_config
+from threadpoolctl import ThreadpoolController
+
+from .backends import MODEL_PKL, MODEL_XGB, load_backend, make_backend
+from .features import encode_frame, load_feature_columns
+
+
+# =========================
+# CARGA DE MODELO AL INICIAR
+# =========================
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'credit_risk', 'ml_models')
+MODEL_PATH = os.path.join(MODEL_DIR, MODEL_PKL)
+XGB_MODEL_PATH = os.path.join(MODEL_DIR, MODEL_XGB)
+SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
+FEATURES_PATH = os.path.join(MODEL_DIR, 'features.json')
+# Versión publicada por refresh_model (ausente = modelo original de los notebooks)
+VERSION_PATH = os.path.join(MODEL_DIR, 'version.json')
+VERSIONS_DIR = os.path.join(MODEL_DIR, 'versions')
+
+
+def read_model_version():
+    if not os.path.exists(VERSION_PATH):
+        return 'base'
+    with open(VERSION_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)['version']
+
+
+model_columns = load_feature_columns(FEATURES_PATH)
+backend = load_backend(MODEL_DIR, model_columns)
+# Objeto subyacente (estimador de sklearn o Booster de XGBoost)
+modelo = backend.estimador
+scaler = joblib.load(SCALER_PATH) if os.path.exists(SCALER_PATH) else None
+model_version = read_model_version()
+
+# Campos de CreditEvaluation que forman la entrada del modelo
+INPUT_FIELDS = [
+    'edad', 'estado_civil', 'ingreso_mensual', 'ventas_anuales', 'monto_solicitado',
+    'plazo_meses', 'dias_mora_prom', 'garantia', 'tiene_garante', 'propiedad_completa',
+    'estado_legal',
+]
+
+
+# =========================
+# PRESUPUESTO DE HILOS
+# =========================
+# Pools nativos (BLAS/OpenMP) ya cargados junto con el modelo. El presupuesto
+# interactivo queda fijo para todo el worker; thread_budget() lo sube mientras
+# haya bloques de lote en curso.
+_controller = ThreadpoolController()
+if settings.CREDIT_INFERENCE_THREADS:
+    _controller.limit(limits=settings.CREDIT_INFERENCE_THREADS)
+_local = threading.local()
+
+# Los límites de threadpoolctl son del proceso y los bloques de lote de varios
+# turnos entran y salen en cualquier orden: un solo dueño, bajo lock, con la
+# cuenta de bloques activos por presupuesto. Con el último bloque se restaura
+# el límite del worker.
+_budget_lock = threading.Lock()
+_budgets = Counter()
+_budget_state = {'limitador': None, 'hilos': None}
+
+
+def _apply_budget():
+    hilos = max(_budgets) if _budgets else None
+    if hilos == _budget_state['hilos']:
+        return
+    if hilos is None:
+        _budget_state['limitador'].restore_original_limits()
+        _budget_state['limitador'] = None
+    elif _budget_state['limitador'] is None:
+        # Guarda los límites del worker para restaurarlos al final
+        _budget_state['limitador'] = _controller.limit(limits=hilos)
+    else:
+        _controller.limit(limits=hilos)
+    _budget_state['hilos'] = hilos
+
+
+@contextmanager
+def thread_budget(hilos):
+    """
+    Limita a `hilos` los pools BLAS/OpenMP (threadpoolctl) y el n_jobs de
+    joblib para el código dentro del bloque; 0 = sin límite.
+
+    El límite nativo es del proceso: con varios bloques a la vez rige el
+    mayor presupuesto pedido, y las llamadas concurrentes del mismo proceso
+    también lo ven. El n_jobs de joblib es por hilo.
+    """
+    previo = getattr(_local, 'hilos', None)
+    _local.hilos = hilos
+    try:
+        if not hilos:
+            yield
+            return
+        with _budget_lock:
+            _budgets[hilos] += 1
+            _apply_budget()
+        try:
+            with parallel_config(n_jobs=hilos):
+                yield
+        finally:
+            with _budget_lock:
+                _budgets[hilos] -= 1
+                if not _budgets[hilos]:
+                    del _budgets[hilos]
+                _apply_budget()
+    finally:
+        _local.hilos = previo
+
+
+def default_thread_budget():
+    # Dentro de un thread_budget explícito (p. ej. lote) no se vuelve a limitar;
+    # fuera, los pools nativos ya tienen el límite del worker y basta con joblib
+    if getattr(_local, 'hilos', None) is not None or not settings.CREDIT_INFERENCE_THREADS:
+        return nullcontext()
+    return parallel_config(n_jobs=settings.CREDIT_INFERENCE_THREADS)
+
+
+# =========================
+# MATRIZ DE DISEÑO
+# =========================
+def encode(df: pd.DataFrame) -> np.ndarray:
+    """Codifica un DataFrame de solicitantes con el orden de columnas del modelo."""
+    return encode_frame(df, model_columns)
+
+
+def scale(X: np.ndarray) -> np.ndarray:
+    if scaler is None:
+        return X
+    # StandardScaler: se aplica directo sobre NumPy (sin ida y vuelta por DataFrame)
+    if hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_'):
+        X = X - scaler.mean_ if scaler.with_mean else X
+        return X / scaler.scale_ if scaler.with_std else X
+    with default_thread_budget():
+        return scaler.transform(pd.DataFrame(X, columns=model_columns))
+
+
+# =========================
+# PREDICCIÓN
+# =========================
+def predict_proba(X: np.ndarray, estimador=None) -> np.ndarray:
+    """Probabilidad de impago para una matriz codificada (sin escalar)."""
+    b = backend if estimador is None else make_backend(estimador, model_columns)
+    with default_thread_budget():
+        return b.predict_proba(scale(X))
+
+
+def predict_labels(probs) -> np.ndarray:
+    # Equivale a modelo.predict() para clasificadores binarios de sklearn
+    return (np.asarray(probs) > 0.5).astype(np.int64)
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from credit_risk.archive import archivable_queryset, archive_evaluations, archive_is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Mueve las evaluaciones cerradas (APROBADO/RECHAZADO) antiguas a la tabla de archivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.CREDIT_ARCHIVE_AFTER_DAYS,
+                            help='Antigüedad mínima en días (created_at)')
+        parser.add_argument('--lote', type=int, default=settings.CREDIT_ARCHIVE_BATCH_SIZE,
+                            help='Filas por transacción')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de filas a mover')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los casos archivables')
+
+    def handle(self, *args, **opts):
+        if opts['dry_run']:
+            n = archivable_queryset(opts['dias']).count()
+            self.stdout.write(f"{n} evaluaciones cerradas con más de {opts['dias']} días serían archivadas.")
+            return
+
+        if archive_is_partitioned():
+            self.stdout.write("Archivo particionado por created_at (PostgreSQL).")
+
+        inicio = time.perf_counter()
+
+        def progreso(total):
+            self.stdout.write(f"  {total} archivadas ({total / (time.perf_counter() - inicio):.0f} filas/s)")
+
+        total = archive_evaluations(
+            dias=opts['dias'],
+            batch_size=opts['lote'],
+            limite=opts['limite'],
+            progreso=progreso if opts['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} evaluaciones archivadas en {time.perf_counter() - inicio:.1f} s"
+        ))
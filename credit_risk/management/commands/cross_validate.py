@@ -0,0 +1,84 @@
+import json
+import os
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from credit_risk.features import encode_frame, load_feature_columns
+from credit_risk.model_validation import ESQUEMAS, MODELOS, cross_validate
+from credit_risk.synthetic import generate_applicants
+
+
+class Command(BaseCommand):
+    help = "Validación cruzada / backtesting en paralelo de los modelos candidatos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datos', default=os.path.join(settings.BASE_DIR, 'data', 'datos_credito_simulados.csv'),
+                            help='CSV crudo o ya codificado con la columna riesgo_real')
+        parser.add_argument('--sintetico', type=int, default=0,
+                            help='Genera N filas sintéticas en lugar de leer --datos')
+        parser.add_argument('--modelos', nargs='+', choices=MODELOS, default=MODELOS)
+        parser.add_argument('--esquema', choices=ESQUEMAS, default='kfold')
+        parser.add_argument('--folds', type=int, default=5)
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--columna-fecha', dest='columna_fecha',
+                            help='Columna de fecha para el esquema temporal')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos (por defecto: núcleos)')
+        parser.add_argument('--n-estimators', dest='n_estimators', type=int, default=300)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--salida', help='Guarda el detalle por fold en JSON')
+
+    def handle(self, *args, **opts):
+        columnas = load_feature_columns(os.path.join(settings.BASE_DIR, 'credit_risk', 'ml_models', 'features.json'))
+
+        if opts['sintetico']:
+            df = generate_applicants(opts['sintetico'], seed=opts['semilla'])
+        else:
+            if not os.path.exists(opts['datos']):
+                raise CommandError(f"No existe el archivo: {opts['datos']}")
+            df = pd.read_csv(opts['datos'])
+        if 'riesgo_real' not in df.columns:
+            raise CommandError("El dataset debe contener la columna 'riesgo_real'")
+
+        fechas = None
+        if opts['columna_fecha']:
+            if opts['columna_fecha'] not in df.columns:
+                raise CommandError(f"No existe la columna de fecha: {opts['columna_fecha']}")
+            fechas = pd.to_datetime(df[opts['columna_fecha']]).to_numpy()
+        elif opts['esquema'] == 'temporal':
+            raise CommandError("El esquema temporal requiere --columna-fecha")
+
+        X = encode_frame(df, columnas)
+        y = df['riesgo_real'].to_numpy()
+        self.stdout.write(f"Dataset: {X.shape[0]} filas x {X.shape[1]} columnas | esquema: {opts['esquema']}")
+
+        resultado = cross_validate(
+            X, y,
+            modelos=opts['modelos'],
+            esquema=opts['esquema'],
+            n_splits=opts['folds'],
+            n_repeats=opts['repeticiones'],
+            fechas=fechas,
+            n_workers=opts['workers'],
+            n_estimators=opts['n_estimators'],
+            seed=opts['semilla'],
+        )
+
+        for nombre, r in resultado['resumen'].items():
+            self.stdout.write(
+                f"\n{nombre}: AUC {r['auc_media']:.4f} ± {r['auc_std']:.4f} "
+                f"[{r['auc_min']:.4f}, {r['auc_max']:.4f}] en {r['folds']} folds | "
+                f"Brier {r['brier_media']:.4f} | ECE {r['ece_media']:.4f}"
+            )
+            for banda, c in r['bandas'].items():
+                total = c['buenos'] + c['malos']
+                tasa = 100 * c['malos'] / total if total else 0
+                self.stdout.write(f"  {banda:<6} buenos={c['buenos']:<8} malos={c['malos']:<8} mora={tasa:.1f}%")
+
+        self.stdout.write(self.style.SUCCESS(f"\nTiempo total: {resultado['segundos']} s"))
+
+        if opts['salida']:
+            with open(opts['salida'], 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Detalle guardado en: {opts['salida']}")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from credit_risk.explanations import explain_missing
+from credit_risk.models import CreditEvaluation, CreditEvaluationArchive
+
+
+class Command(BaseCommand):
+    help = "Calcula en bloque las contribuciones por variable de las evaluaciones que no las tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por lote')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de filas por tabla')
+        parser.add_argument('--incluir-archivo', action='store_true',
+                            help='También rellena la tabla de archivo')
+
+    def handle(self, *args, **opts):
+        tablas = [CreditEvaluation]
+        if opts['incluir_archivo']:
+            tablas.append(CreditEvaluationArchive)
+
+        for tabla in tablas:
+            inicio = time.perf_counter()
+
+            def progreso(total):
+                self.stdout.write(f"  {total} explicadas ({total / (time.perf_counter() - inicio):.0f} filas/s)")
+
+            total = explain_missing(
+                tabla,
+                batch_size=opts['lote'],
+                limite=opts['limite'],
+                progreso=progreso if opts['verbosity'] > 1 else None,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {tabla.__name__}: {total} evaluaciones explicadas en {time.perf_counter() - inicio:.1f} s"
+            ))
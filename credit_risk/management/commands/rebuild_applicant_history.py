@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from credit_risk.applicant_history import rebuild_applicant_history
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero el resumen de historial por cédula."
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        total = rebuild_applicant_history()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} cédulas indexadas en {time.perf_counter() - inicio:.1f} s"
+        ))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from credit_risk import inference
+from credit_risk.models import ModelVersion
+from credit_risk.refresh import activate_version, refresh_model
+
+
+class Command(BaseCommand):
+    help = "Actualiza el modelo con las decisiones de analistas posteriores a la última versión publicada."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Evalúa el candidato sin publicarlo')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Ignora CREDIT_REFRESH_MIN_ROWS (basta con una fila por clase)')
+        parser.add_argument('--activar', metavar='VERSION', help='Activa una versión ya publicada (rollback)')
+        parser.add_argument('--listar', action='store_true', help='Lista las versiones registradas')
+
+    def handle(self, *args, **opts):
+        if opts['listar']:
+            self.stdout.write(f"Versión activa: {inference.model_version}")
+            for v in ModelVersion.objects.order_by('-created_at')[:20]:
+                self.stdout.write(
+                    f"  {v.version}  {'publicado' if v.publicado else 'rechazado':<10} "
+                    f"nuevas={v.filas_nuevas:<7} desde={v.version_anterior}  {v.motivo}"
+                )
+            return
+
+        if opts['activar']:
+            try:
+                activate_version(opts['activar'])
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Versión {opts['activar']} activa. Reinicia el servidor para cargarla."
+            ))
+            return
+
+        inicio = time.perf_counter()
+        registro = refresh_model(dry_run=opts['dry_run'], forzar=opts['forzar'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f"Versión activa: {registro.version_anterior} ({registro.tipo_modelo})")
+        self.stdout.write(f"Filas nuevas desde la marca de agua: {registro.filas_nuevas}")
+        for nombre, m in registro.metricas.items():
+            actual, candidato = m['actual'], m['candidato']
+            self.stdout.write(
+                f"  holdout {nombre:<11} n={actual['filas']:<6} "
+                f"AUC {actual['auc']:.4f} -> {candidato['auc']:.4f} | "
+                f"Brier {actual['brier']:.4f} -> {candidato['brier']:.4f}"
+            )
+
+        if not registro.publicado:
+            self.stdout.write(self.style.WARNING(f"No se publica: {registro.motivo} ({duracion:.1f} s)"))
+        elif opts['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"El candidato cumple las métricas (dry-run, {duracion:.1f} s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Publicada {registro.version} en {duracion:.1f} s. Reinicia el servidor para cargarla."
+            ))
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from credit_risk import inference
+from credit_risk.applicant_history import rebuild_applicant_history
+from credit_risk.models import CreditEvaluation, CreditEvaluationArchive
+from credit_risk.rescoring import rescore
+from credit_risk.scoring import RISK_BANDS
+
+
+class Command(BaseCommand):
+    help = ("Re-puntúa las evaluaciones guardadas con el modelo activo. "
+            "Retoma la última ejecución incompleta de la misma versión.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='No escribe; solo cuenta los cambios de banda')
+        parser.add_argument('--lote', type=int, default=None, help='Filas por bloque')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos (por defecto: núcleos)')
+        parser.add_argument('--limite', type=int, default=None,
+                            help='Detiene la ejecución tras ~N filas (se retoma después)')
+        parser.add_argument('--reiniciar', action='store_true',
+                            help='Descarta el punto de control y empieza desde el primer pk')
+        parser.add_argument('--incluir-archivo', action='store_true',
+                            help='También re-puntúa la tabla de archivo')
+        parser.add_argument('--reconstruir-historial', action='store_true',
+                            help='Recalcula todo el historial por cédula al terminar (el de las filas '
+                                 're-puntuadas ya se actualiza en cada bloque)')
+
+    def handle(self, *args, **opts):
+        tablas = [CreditEvaluation]
+        if opts['incluir_archivo']:
+            tablas.append(CreditEvaluationArchive)
+
+        self.stdout.write(f"Modelo activo: {inference.model_version} ({inference.backend.nombre})")
+        for tabla in tablas:
+            inicio = time.perf_counter()
+
+            def progreso(run):
+                self.stdout.write(
+                    f"  pk {run.ultimo_pk}/{run.hasta_pk}: {run.filas} filas "
+                    f"({run.actualizadas} con cambios)"
+                )
+
+            run = rescore(
+                tabla,
+                dry_run=opts['dry_run'],
+                batch_size=opts['lote'],
+                n_workers=opts['workers'],
+                reiniciar=opts['reiniciar'],
+                limite=opts['limite'],
+                progreso=progreso if opts['verbosity'] > 1 else None,
+            )
+            duracion = time.perf_counter() - inicio
+
+            self.stdout.write(f"{tabla.__name__}: banda anterior -> nueva")
+            self.stdout.write("          " + "".join(f"{b:>10}" for b in RISK_BANDS))
+            for banda, fila in zip(RISK_BANDS, run.cambios_banda):
+                self.stdout.write(f"  {banda:<8}" + "".join(f"{n:>10}" for n in fila))
+            total = sum(map(sum, run.cambios_banda))
+            cambian = total - sum(run.cambios_banda[i][i] for i in range(len(RISK_BANDS)))
+            verbo = 'cambiarían' if opts['dry_run'] else 'cambiaron'
+            self.stdout.write(f"  {cambian} de {total} evaluaciones {verbo} de banda")
+
+            estado = 'completa' if run.completado else f'pausada en pk {run.ultimo_pk}'
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {tabla.__name__}: {run.actualizadas} con probabilidad nueva, ejecución {estado} "
+                f"({duracion:.1f} s)"
+            ))
+
+        if opts['reconstruir_historial'] and not opts['dry_run']:
+            self.stdout.write(f"Historial: {rebuild_applicant_history()} cédulas recalculadas")
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from credit_risk import inference
+from credit_risk.sharding import plan_shards, score_file
+
+
+class Command(BaseCommand):
+    help = ("Puntúa un archivo de lote grande (CSV, Parquet o XLSX) repartido en fragmentos "
+            "entre varios procesos y escribe un CSV con los resultados en el orden original.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--salida', help='CSV de resultado (por defecto: <archivo>_puntuado.csv)')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos (por defecto: núcleos)')
+        parser.add_argument('--filas-por-fragmento', dest='filas_por_fragmento', type=int, default=None)
+
+    def handle(self, *args, **opts):
+        ruta = opts['archivo']
+        if not os.path.exists(ruta):
+            raise CommandError(f"No existe el archivo: {ruta}")
+        salida = opts['salida'] or f"{os.path.splitext(ruta)[0]}_puntuado.csv"
+        n_workers = opts['workers'] or os.cpu_count() or 1
+
+        try:
+            plan = plan_shards(ruta, n_workers, opts['filas_por_fragmento'])
+            self.stdout.write(
+                f"{plan['formato'].upper()}: ~{plan['filas']} filas en {len(plan['fragmentos'])} fragmentos | "
+                f"{n_workers} workers | modelo {inference.model_version}"
+            )
+            resumen = score_file(
+                ruta, salida, n_workers=n_workers, plan=plan,
+                progreso=(lambda total: self.stdout.write(f"  {total} filas")) if opts['verbosity'] > 1 else None,
+            )
+        except (ValueError, ImportError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resumen['filas']} filas puntuadas en {resumen['segundos']} s "
+            f"({resumen['filas'] / max(resumen['segundos'], 1e-9):,.0f} filas/s) -> {salida}"
+        ))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from credit_risk.seeding import seed_evaluations
+
+
+class Command(BaseCommand):
+    help = ("Inserta evaluaciones sintéticas puntuadas con el modelo activo para pruebas de rendimiento "
+            "(COPY en PostgreSQL, INSERT por lotes en SQLite).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('filas', type=int)
+        parser.add_argument('--anios', type=int, default=3, help='Años en que se reparten las fechas')
+        parser.add_argument('--lote', type=int, default=100_000, help='Filas por bloque')
+        parser.add_argument('--cedulas', type=int, default=None,
+                            help='Solicitantes distintos (por defecto: filas / 3)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--diferir-indices', action='store_true',
+                            help='Elimina los índices secundarios durante la carga y los recrea al final')
+        parser.add_argument('--sin-historial', action='store_true',
+                            help='No reconstruye el historial por cédula al terminar')
+        parser.add_argument('--sin-contribuciones', action='store_true',
+                            help='No calcula las contribuciones por variable (explain_evaluations las rellena)')
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+
+        def progreso(mensaje):
+            self.stdout.write(f"  {mensaje} ({time.perf_counter() - inicio:.1f} s)")
+
+        total = seed_evaluations(
+            opts['filas'],
+            anios=opts['anios'],
+            batch_size=opts['lote'],
+            seed=opts['semilla'],
+            n_cedulas=opts['cedulas'],
+            diferir_indices=opts['diferir_indices'],
+            historial=not opts['sin_historial'],
+            contribuciones=not opts['sin_contribuciones'],
+            progreso=progreso if opts['verbosity'] > 0 else None,
+        )
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} evaluaciones insertadas en {duracion:.1f} s ({total / max(duracion, 1e-9):,.0f} filas/s)"
+        ))
@@ -0,0 +1,88 @@
+import os
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from sklearn.model_selection import train_test_split
+
+from credit_risk import inference
+from credit_risk.model_validation import MODELOS, build_estimator
+from credit_risk.models import ModelVersion
+from credit_risk.refresh import holdout_metrics, new_version_name, publish_version
+from credit_risk.synthetic import generate_applicants
+
+
+class Command(BaseCommand):
+    help = ("Entrena un modelo candidato (logística, RandomForest o XGBoost) con el layout de "
+            "features.json y el scaler activo, y opcionalmente lo publica como nueva versión.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', choices=MODELOS, default='xgboost')
+        parser.add_argument('--datos', default=os.path.join(settings.BASE_DIR, 'data', 'datos_credito_simulados.csv'),
+                            help='CSV crudo con la columna riesgo_real')
+        parser.add_argument('--sintetico', type=int, default=0,
+                            help='Genera N filas sintéticas en lugar de leer --datos')
+        parser.add_argument('--prueba', type=float, default=0.3, help='Fracción estratificada de prueba')
+        parser.add_argument('--n-estimators', dest='n_estimators', type=int, default=300)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--publicar', action='store_true',
+                            help='Publica y activa el modelo como nueva versión')
+
+    def handle(self, *args, **opts):
+        if opts['sintetico']:
+            df = generate_applicants(opts['sintetico'], seed=opts['semilla'])
+        else:
+            if not os.path.exists(opts['datos']):
+                raise CommandError(f"No existe el archivo: {opts['datos']}")
+            df = pd.read_csv(opts['datos'])
+        if 'riesgo_real' not in df.columns:
+            raise CommandError("El dataset debe contener la columna 'riesgo_real'")
+
+        X = inference.encode(df)
+        y = df['riesgo_real'].to_numpy()
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=opts['prueba'], stratify=y, random_state=opts['semilla'],
+        )
+        self.stdout.write(f"Dataset: {len(y_train)} filas de entrenamiento / {len(y_test)} de prueba")
+
+        # Se entrena sobre la salida del scaler activo, igual que se sirve
+        modelo, _ = build_estimator(opts['modelo'], n_estimators=opts['n_estimators'], seed=opts['semilla'])
+        inicio = time.perf_counter()
+        with inference.thread_budget(settings.CREDIT_BATCH_THREADS):
+            modelo.fit(inference.scale(X_train), y_train)
+        duracion = time.perf_counter() - inicio
+
+        metricas = {'prueba': {
+            'actual': holdout_metrics(inference.modelo, X_test, y_test),
+            'candidato': holdout_metrics(modelo, X_test, y_test),
+        }}
+        actual, candidato = metricas['prueba']['actual'], metricas['prueba']['candidato']
+        self.stdout.write(
+            f"{opts['modelo']} entrenado en {duracion:.1f} s | "
+            f"AUC {candidato['auc']:.4f} (activo {actual['auc']:.4f}) | "
+            f"Brier {candidato['brier']:.4f} (activo {actual['brier']:.4f})"
+        )
+
+        if not opts['publicar']:
+            return
+
+        registro = ModelVersion(
+            version=new_version_name(),
+            tipo_modelo=type(modelo).__name__,
+            version_anterior=inference.model_version,
+            filas_holdout=len(y_test),
+            metricas=metricas,
+            publicado=True,
+            motivo=f"Entrenamiento completo ({opts['modelo']}, {len(y_train)} filas)",
+        )
+        publish_version(modelo, registro.version, {
+            'version_anterior': registro.version_anterior,
+            'tipo_modelo': registro.tipo_modelo,
+            'filas_entrenamiento': len(y_train),
+            'metricas': metricas,
+        })
+        registro.save()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Publicada {registro.version}. Reinicia el servidor para cargarla."
+        ))
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+ARCHIVE_TABLE = 'credit_risk_creditevaluationarchive'
+
+
+def partition_archive_table(apps, schema_editor):
+    """
+    Recrea la tabla de archivo como particionada por rango de created_at.
+
+    Solo aplica en PostgreSQL con CREDIT_ARCHIVE_PARTITIONED = True. La clave
+    primaria pasa a ser (id, created_at), requisito de las tablas particionadas;
+    las particiones mensuales se crean al archivar (credit_risk.archive).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if not getattr(settings, 'CREDIT_ARCHIVE_PARTITIONED', False):
+        return
+
+    t = ARCHIVE_TABLE
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+            [t],
+        )
+        indices = [row[0] for row in cursor.fetchall()]
+
+    schema_editor.execute(f'CREATE TABLE "{t}_new" (LIKE "{t}" INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    schema_editor.execute(f'DROP TABLE "{t}"')
+    schema_editor.execute(f'ALTER TABLE "{t}_new" RENAME TO "{t}"')
+    schema_editor.execute(f'ALTER TABLE "{t}" ADD PRIMARY KEY (id, created_at)')
+    schema_editor.execute(f'CREATE TABLE "{t}_default" PARTITION OF "{t}" DEFAULT')
+    for indexdef in indices:
+        schema_editor.execute(indexdef)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0003_creditevaluation_cliente_apellidos_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditEvaluationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('edad', models.SmallIntegerField()),
+                ('estado_civil', models.CharField(max_length=20)),
+                ('ingreso_mensual', models.FloatField()),
+                ('ventas_anuales', models.FloatField(default=0)),
+                ('monto_solicitado', models.FloatField()),
+                ('plazo_meses', models.SmallIntegerField()),
+                ('dias_mora_prom', models.IntegerField(default=0)),
+                ('garantia', models.CharField(max_length=20)),
+                ('tiene_garante', models.BooleanField(default=False)),
+                ('propiedad_completa', models.BooleanField(default=False)),
+                ('estado_legal', models.BooleanField(default=False)),
+                ('prob_riesgo', models.FloatField()),
+                ('prediccion', models.SmallIntegerField()),
+                ('recomendacion', models.CharField(max_length=10)),
+                ('estado_caso', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('APROBADO', 'Aprobado'), ('RECHAZADO', 'Rechazado'), ('OBSERVADO', 'Observado')], max_length=12)),
+                ('decision_final', models.CharField(blank=True, choices=[('PENDIENTE', 'Pendiente'), ('APROBADO', 'Aprobado'), ('RECHAZADO', 'Rechazado'), ('OBSERVADO', 'Observado')], max_length=12, null=True)),
+                ('comentario_analista', models.TextField(blank=True, null=True)),
+                ('cliente_nombres', models.CharField(blank=True, max_length=120, null=True)),
+                ('cliente_apellidos', models.CharField(blank=True, max_length=120, null=True)),
+                ('cliente_cedula', models.CharField(blank=True, db_index=True, max_length=10, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='creditevaluation',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='creditevaluation',
+            index=models.Index(fields=['estado_caso', 'created_at'], name='eval_estado_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='creditevaluationarchive',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(partition_archive_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:52
+
+from django.db import migrations, models
+
+
+def backfill_applicant_history(apps, schema_editor):
+    CreditEvaluation = apps.get_model('credit_risk', 'CreditEvaluation')
+    CreditEvaluationArchive = apps.get_model('credit_risk', 'CreditEvaluationArchive')
+    ApplicantHistory = apps.get_model('credit_risk', 'ApplicantHistory')
+
+    resumen = {}
+    for modelo in (CreditEvaluation, CreditEvaluationArchive):
+        filas = (
+            modelo.objects.exclude(cliente_cedula__isnull=True).exclude(cliente_cedula='')
+            .values_list('cliente_cedula', 'created_at', 'id', 'prob_riesgo', 'estado_caso', 'decision_final')
+        )
+        for cedula, *ultima in filas.iterator(chunk_size=5000):
+            r = resumen.setdefault(cedula, [0, ultima[2], ultima])
+            r[0] += 1
+            r[1] = max(r[1], ultima[2])
+            if ultima[:2] > r[2][:2]:
+                r[2] = ultima
+
+    ApplicantHistory.objects.bulk_create(
+        (
+            ApplicantHistory(
+                cliente_cedula=cedula,
+                total_evaluaciones=n,
+                max_prob_riesgo=max_prob,
+                ultima_evaluacion_at=created_at,
+                ultima_evaluacion_id=pk,
+                ultima_prob_riesgo=prob,
+                ultimo_estado=estado,
+                ultima_decision=decision,
+            )
+            for cedula, (n, max_prob, (created_at, pk, prob, estado, decision)) in resumen.items()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0004_creditevaluationarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicantHistory',
+            fields=[
+                ('cliente_cedula', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('total_evaluaciones', models.IntegerField(default=0)),
+                ('ultima_evaluacion_id', models.BigIntegerField(blank=True, null=True)),
+                ('ultima_evaluacion_at', models.DateTimeField(blank=True, null=True)),
+                ('ultima_prob_riesgo', models.FloatField(blank=True, null=True)),
+                ('ultimo_estado', models.CharField(blank=True, choices=[('PENDIENTE', 'Pendiente'), ('APROBADO', 'Aprobado'), ('RECHAZADO', 'Rechazado'), ('OBSERVADO', 'Observado')], max_length=12, null=True)),
+                ('ultima_decision', models.CharField(blank=True, choices=[('PENDIENTE', 'Pendiente'), ('APROBADO', 'Aprobado'), ('RECHAZADO', 'Rechazado'), ('OBSERVADO', 'Observado')], max_length=12, null=True)),
+                ('max_prob_riesgo', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_applicant_history, migrations.RunPython.noop),
+    ]
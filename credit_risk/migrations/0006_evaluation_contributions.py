@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0005_applicanthistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditevaluation',
+            name='contribucion_base',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditevaluation',
+            name='contribuciones',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditevaluationarchive',
+            name='contribucion_base',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditevaluationarchive',
+            name='contribuciones',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0006_evaluation_contributions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tipo_modelo', models.CharField(max_length=60)),
+                ('version_anterior', models.CharField(max_length=32)),
+                ('watermark_at', models.DateTimeField(blank=True, null=True)),
+                ('watermark_id', models.BigIntegerField(blank=True, null=True)),
+                ('filas_nuevas', models.IntegerField(default=0)),
+                ('filas_holdout', models.IntegerField(default=0)),
+                ('metricas', models.JSONField(default=dict)),
+                ('publicado', models.BooleanField(default=False)),
+                ('motivo', models.CharField(blank=True, max_length=200)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='creditevaluation',
+            index=models.Index(fields=['updated_at', 'id'], name='eval_updated_idx'),
+        ),
+    ]
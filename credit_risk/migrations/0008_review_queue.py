@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0007_modelversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditevaluation',
+            name='asignado_a',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='casos_asignados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='creditevaluation',
+            name='asignado_hasta',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='creditevaluation',
+            index=models.Index(condition=models.Q(('estado_caso', 'PENDIENTE')), fields=['created_at', 'id'], name='eval_pendientes_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0008_review_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescoreRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version_modelo', models.CharField(max_length=32)),
+                ('tabla', models.CharField(max_length=64)),
+                ('dry_run', models.BooleanField(default=False)),
+                ('iniciado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('hasta_pk', models.BigIntegerField()),
+                ('ultimo_pk', models.BigIntegerField(default=0)),
+                ('filas', models.BigIntegerField(default=0)),
+                ('actualizadas', models.BigIntegerField(default=0)),
+                ('cambios_banda', models.JSONField(default=list)),
+                ('completado', models.BooleanField(default=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit_risk', '0009_rescorerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditevaluation',
+            name='contribucion_unidad',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditevaluationarchive',
+            name='contribucion_unidad',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+    ]
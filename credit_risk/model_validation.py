@@ -0,0 +1,245 @@
+"""
+Validación cruzada y backtesting en paralelo para los modelos de riesgo.
+
+Reemplaza la partición única 70/30 de 03_modelado.ipynb por:
+
+    kfold     -> StratifiedKFold
+    repetido  -> RepeatedStratifiedKFold
+    temporal  -> backtest con ventana creciente ordenado por una columna de fecha
+
+Cada fold se entrena en un proceso distinto. La matriz codificada, el objetivo
+y la asignación de folds se guardan una sola vez como .npy en un directorio
+temporal y los workers los abren con mmap_mode='r', de modo que ningún proceso
+recibe una copia serializada de X.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, roc_auc_score
+from sklearn.model_selection import RepeatedStratifiedKFold, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from .scoring import RISK_BANDS, risk_band_codes
+
+
+ESQUEMAS = ['kfold', 'repetido', 'temporal']
+CALIBRATION_BINS = 10
+
+
+# =========================
+# CANDIDATOS (los de 03_modelado.ipynb + gradient boosting)
+# =========================
+def build_estimator(nombre, n_estimators=300, seed=42):
+    """Devuelve (modelo, usa_scaler)."""
+    if nombre == 'logistica':
+        return LogisticRegression(max_iter=1000, class_weight='balanced'), True
+    if nombre == 'random_forest':
+        return RandomForestClassifier(
+            n_estimators=n_estimators,
+            random_state=seed,
+            class_weight='balanced',
+            n_jobs=1,
+        ), False
+    if nombre == 'xgboost':
+        from xgboost import XGBClassifier  # dependencia opcional
+        return XGBClassifier(
+            n_estimators=n_estimators,
+            max_depth=4,
+            learning_rate=0.1,
+            tree_method='hist',
+            random_state=seed,
+            n_jobs=1,
+        ), False
+    raise ValueError(f"Modelo desconocido: {nombre}")
+
+
+MODELOS = ['logistica', 'random_forest', 'xgboost']
+
+
+# =========================
+# PARTICIONES
+# =========================
+def fold_assignments(y, esquema='kfold', n_splits=5, n_repeats=1, seed=42, fechas=None):
+    """
+    Matriz (repeticiones x filas) con el número de fold de test de cada fila.
+
+    En 'temporal' las filas se ordenan por fecha y se dividen en n_splits + 1
+    bloques consecutivos; el fold k entrena con los bloques < k y evalúa en k
+    (el bloque 0 solo entrena).
+    """
+    n = len(y)
+    if esquema == 'temporal':
+        if fechas is None:
+            raise ValueError("El esquema temporal requiere una columna de fecha")
+        orden = np.argsort(np.asarray(fechas), kind='stable')
+        bloques = np.array_split(orden, n_splits + 1)
+        asignacion = np.empty((1, n), dtype=np.int16)
+        for k, filas in enumerate(bloques):
+            asignacion[0, filas] = k
+        return asignacion
+
+    if esquema == 'kfold':
+        n_repeats = 1
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        particiones = [splitter.split(np.zeros(n), y)]
+    elif esquema == 'repetido':
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=seed)
+        todas = list(splitter.split(np.zeros(n), y))
+        particiones = [todas[r * n_splits:(r + 1) * n_splits] for r in range(n_repeats)]
+    else:
+        raise ValueError(f"Esquema desconocido: {esquema}")
+
+    asignacion = np.empty((n_repeats, n), dtype=np.int16)
+    for r, splits in enumerate(particiones):
+        for k, (_, test_idx) in enumerate(splits):
+            asignacion[r, test_idx] = k
+    return asignacion
+
+
+def _tareas(asignacion, esquema, modelos):
+    n_folds = int(asignacion.max()) + 1
+    primero = 1 if esquema == 'temporal' else 0
+    return [
+        (modelo, r, k)
+        for modelo in modelos
+        for r in range(asignacion.shape[0])
+        for k in range(primero, n_folds)
+    ]
+
+
+# =========================
+# MÉTRICAS POR FOLD
+# =========================
+def band_confusion(y_true, y_prob):
+    """Conteo de filas por banda (BAJO/MEDIO/ALTO) y clase real (0/1)."""
+    bandas = risk_band_codes(y_prob)
+    matriz = np.zeros((len(RISK_BANDS), 2), dtype=np.int64)
+    np.add.at(matriz, (bandas, np.asarray(y_true, dtype=np.int64)), 1)
+    return matriz
+
+
+def calibration_table(y_true, y_prob, bins=CALIBRATION_BINS):
+    cortes = np.minimum((np.asarray(y_prob) * bins).astype(np.int64), bins - 1)
+    conteo = np.bincount(cortes, minlength=bins)
+    suma_prob = np.bincount(cortes, weights=y_prob, minlength=bins)
+    suma_real = np.bincount(cortes, weights=y_true, minlength=bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        prob_media = np.where(conteo > 0, suma_prob / conteo, np.nan)
+        tasa_real = np.where(conteo > 0, suma_real / conteo, np.nan)
+    ece = float(np.nansum(conteo * np.abs(prob_media - tasa_real)) / max(conteo.sum(), 1))
+    return {
+        'conteo': conteo.tolist(),
+        'prob_media': [None if np.isnan(v) else round(float(v), 4) for v in prob_media],
+        'tasa_real': [None if np.isnan(v) else round(float(v), 4) for v in tasa_real],
+        'ece': round(ece, 4),
+    }
+
+
+def _evaluar_fold(directorio, esquema, tarea, n_estimators, seed):
+    nombre, repeticion, fold = tarea
+    inicio = time.perf_counter()
+
+    X = np.load(os.path.join(directorio, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(directorio, 'y.npy'), mmap_mode='r')
+    asignacion = np.load(os.path.join(directorio, 'folds.npy'), mmap_mode='r')[repeticion]
+
+    test = asignacion == fold
+    train = (asignacion < fold) if esquema == 'temporal' else ~test
+
+    # Un hilo nativo por proceso: el paralelismo lo dan los folds
+    with threadpool_limits(limits=1):
+        modelo, usa_scaler = build_estimator(nombre, n_estimators=n_estimators, seed=seed)
+        X_train, X_test = X[train], X[test]
+        if usa_scaler:
+            scaler = StandardScaler()
+            X_train = scaler.fit_transform(X_train)
+            X_test = scaler.transform(X_test)
+        modelo.fit(X_train, y[train])
+        y_prob = modelo.predict_proba(X_test)[:, 1]
+
+    y_test = np.asarray(y[test])
+    auc = roc_auc_score(y_test, y_prob) if len(np.unique(y_test)) > 1 else float('nan')
+    return {
+        'modelo': nombre,
+        'repeticion': repeticion,
+        'fold': fold,
+        'n_train': int(train.sum()),
+        'n_test': int(test.sum()),
+        'auc': float(auc),
+        'brier': float(brier_score_loss(y_test, y_prob)),
+        'bandas': band_confusion(y_test, y_prob).tolist(),
+        'calibracion': calibration_table(y_test, y_prob),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+# =========================
+# MOTOR
+# =========================
+def cross_validate(X, y, modelos=MODELOS, esquema='kfold', n_splits=5, n_repeats=1,
+                   fechas=None, n_workers=None, n_estimators=300, seed=42, tmp_dir=None):
+    """
+    Evalúa cada modelo en todos los folds del esquema, con un proceso por fold.
+
+    Devuelve {'folds': [...], 'resumen': {modelo: {...}}, 'segundos': float}.
+    """
+    y = np.asarray(y, dtype=np.int8)
+    asignacion = fold_assignments(y, esquema, n_splits, n_repeats, seed, fechas)
+    tareas = _tareas(asignacion, esquema, modelos)
+    n_workers = n_workers or os.cpu_count() or 1
+
+    inicio = time.perf_counter()
+    directorio = tempfile.mkdtemp(prefix='cv_', dir=tmp_dir)
+    try:
+        np.save(os.path.join(directorio, 'X.npy'), np.ascontiguousarray(X, dtype=np.float64))
+        np.save(os.path.join(directorio, 'y.npy'), y)
+        np.save(os.path.join(directorio, 'folds.npy'), asignacion)
+
+        if n_workers == 1:
+            folds = [_evaluar_fold(directorio, esquema, t, n_estimators, seed) for t in tareas]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(tareas))) as pool:
+                futuros = [
+                    pool.submit(_evaluar_fold, directorio, esquema, t, n_estimators, seed)
+                    for t in tareas
+                ]
+                folds = [f.result() for f in futuros]
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return {
+        'esquema': esquema,
+        'folds': folds,
+        'resumen': summarize(folds),
+        'segundos': round(time.perf_counter() - inicio, 2),
+    }
+
+
+def summarize(folds):
+    resumen = {}
+    for nombre in dict.fromkeys(f['modelo'] for f in folds):
+        propios = [f for f in folds if f['modelo'] == nombre]
+        aucs = np.array([f['auc'] for f in propios])
+        bandas = np.sum([f['bandas'] for f in propios], axis=0)
+        resumen[nombre] = {
+            'folds': len(propios),
+            'auc_media': round(float(np.nanmean(aucs)), 4),
+            'auc_std': round(float(np.nanstd(aucs)), 4),
+            'auc_min': round(float(np.nanmin(aucs)), 4),
+            'auc_max': round(float(np.nanmax(aucs)), 4),
+            'brier_media': round(float(np.mean([f['brier'] for f in propios])), 4),
+            'ece_media': round(float(np.mean([f['calibracion']['ece'] for f in propios])), 4),
+            'bandas': {
+                banda: {'buenos': int(bandas[i, 0]), 'malos': int(bandas[i, 1])}
+                for i, banda in enumerate(RISK_BANDS)
+            },
+        }
+    return resumen
@@ -11,7 +11,7 @@ class CreditEvaluation(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     # Inputs
@@ -33,6 +33,11 @@ class CreditEvaluation(models.Model):
     prediccion = models.IntegerField()  # 0/1
     recomendacion = models.CharField(max_length=10)  # BAJO/MEDIO/ALTO
 
+    # Contribución por variable (float32 en el orden de features.json), base y unidad
+    contribuciones = models.BinaryField(null=True, blank=True, editable=False)
+    contribucion_base = models.FloatField(null=True, blank=True)
+    contribucion_unidad = models.CharField(max_length=12, null=True, blank=True)  # log-odds / probabilidad
+
     # Auditoría / Decisión humana
     estado_caso = models.CharField(max_length=12, choices=ESTADOS, default='PENDIENTE')
     decision_final = models.CharField(max_length=12, choices=ESTADOS, null=True, blank=True)
@@ -42,6 +47,156 @@ class CreditEvaluation(models.Model):
     cliente_apellidos = models.CharField(max_length=120, null=True, blank=True)
     cliente_cedula = models.CharField(max_length=10, null=True, blank=True, db_index=True)
 
+    # Cola de revisión: analista que tomó el caso y vencimiento de la reserva
+    asignado_a = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='casos_asignados',
+    )
+    asignado_hasta = models.DateTimeField(null=True, blank=True)
+
+    is_archived = False
+
+    class Meta:
+        indexes = [
+            # Selección de casos cerrados antiguos para archivar
+            models.Index(fields=['estado_caso', 'created_at'], name='eval_estado_created_idx'),
+            # Marca de agua del reentrenamiento incremental (refresh_model)
+            models.Index(fields=['updated_at', 'id'], name='eval_updated_idx'),
+            # Cola de revisión: solo los casos pendientes, en orden de llegada
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(estado_caso='PENDIENTE'),
+                name='eval_pendientes_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Eval #{self.id} - {self.estado_caso} - {self.created_at:%Y-%m-%d}"
+
+
+class CreditEvaluationArchive(models.Model):
+    """
+    Evaluaciones cerradas (APROBADO/RECHAZADO) movidas fuera de la tabla viva.
+
+    Conserva el id original para que /evaluacion/<pk>/ siga funcionando, y usa
+    tipos más compactos que CreditEvaluation. En PostgreSQL puede crearse
+    particionada por rango de created_at (CREDIT_ARCHIVE_PARTITIONED).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, null=True, blank=True,
+        db_constraint=False, related_name='+',
+    )
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Inputs
+    edad = models.SmallIntegerField()
+    estado_civil = models.CharField(max_length=20)
+    ingreso_mensual = models.FloatField()
+    ventas_anuales = models.FloatField(default=0)
+    monto_solicitado = models.FloatField()
+    plazo_meses = models.SmallIntegerField()
+    dias_mora_prom = models.IntegerField(default=0)
+
+    garantia = models.CharField(max_length=20)
+    tiene_garante = models.BooleanField(default=False)
+    propiedad_completa = models.BooleanField(default=False)
+    estado_legal = models.BooleanField(default=False)
+
+    # Outputs ML
+    prob_riesgo = models.FloatField()
+    prediccion = models.SmallIntegerField()
+    recomendacion = models.CharField(max_length=10)
+
+    contribuciones = models.BinaryField(null=True, blank=True, editable=False)
+    contribucion_base = models.FloatField(null=True, blank=True)
+    contribucion_unidad = models.CharField(max_length=12, null=True, blank=True)  # log-odds / probabilidad
+
+    # Auditoría / Decisión humana
+    estado_caso = models.CharField(max_length=12, choices=CreditEvaluation.ESTADOS)
+    decision_final = models.CharField(max_length=12, choices=CreditEvaluation.ESTADOS, null=True, blank=True)
+    comentario_analista = models.TextField(null=True, blank=True)
+
+    cliente_nombres = models.CharField(max_length=120, null=True, blank=True)
+    cliente_apellidos = models.CharField(max_length=120, null=True, blank=True)
+    cliente_cedula = models.CharField(max_length=10, null=True, blank=True, db_index=True)
+
+    is_archived = True
+
+    def __str__(self):
+        return f"Eval #{self.id} (archivo) - {self.estado_caso} - {self.created_at:%Y-%m-%d}"
+
+
+class ApplicantHistory(models.Model):
+    """
+    Resumen por cédula de todas las evaluaciones del solicitante.
+
+    Se actualiza de forma incremental (credit_risk.applicant_history) al guardar
+    o insertar evaluaciones, de modo que la consulta es una lectura por clave
+    primaria en lugar de agregar la tabla de evaluaciones.
+    """
+    cliente_cedula = models.CharField(max_length=10, primary_key=True)
+    total_evaluaciones = models.IntegerField(default=0)
+
+    ultima_evaluacion_id = models.BigIntegerField(null=True, blank=True)
+    ultima_evaluacion_at = models.DateTimeField(null=True, blank=True)
+    ultima_prob_riesgo = models.FloatField(null=True, blank=True)
+    ultimo_estado = models.CharField(max_length=12, choices=CreditEvaluation.ESTADOS, null=True, blank=True)
+    ultima_decision = models.CharField(max_length=12, choices=CreditEvaluation.ESTADOS, null=True, blank=True)
+    max_prob_riesgo = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.cliente_cedula} - {self.total_evaluaciones} evaluaciones"
+
+
+class ModelVersion(models.Model):
+    """
+    Registro de cada actualización incremental del modelo (refresh_model).
+
+    La marca de agua (watermark_at, watermark_id) es la última evaluación
+    decidida incorporada; la siguiente ejecución parte de la última versión
+    publicada.
+    """
+    version = models.CharField(max_length=32, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    tipo_modelo = models.CharField(max_length=60)
+    version_anterior = models.CharField(max_length=32)
+
+    watermark_at = models.DateTimeField(null=True, blank=True)
+    watermark_id = models.BigIntegerField(null=True, blank=True)
+
+    filas_nuevas = models.IntegerField(default=0)
+    filas_holdout = models.IntegerField(default=0)
+    metricas = models.JSONField(default=dict)
+    publicado = models.BooleanField(default=False)
+    motivo = models.CharField(max_length=200, blank=True)
+
+    def __str__(self):
+        return f"{self.version} ({'publicado' if self.publicado else 'rechazado'})"
+
+
+class RescoreRun(models.Model):
+    """
+    Punto de control de manage.py rescore: una ejecución por versión de modelo
+    y tabla. ultimo_pk es el último bloque ya escrito; una ejecución incompleta
+    se retoma desde ahí hasta hasta_pk (máximo pk al iniciar).
+    """
+    version_modelo = models.CharField(max_length=32)
+    tabla = models.CharField(max_length=64)
+    dry_run = models.BooleanField(default=False)
+    iniciado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    hasta_pk = models.BigIntegerField()
+    ultimo_pk = models.BigIntegerField(default=0)
+    filas = models.BigIntegerField(default=0)
+    actualizadas = models.BigIntegerField(default=0)
+    # Matriz 3x3 de conteos: banda anterior (fila) x banda nueva (columna)
+    cambios_banda = models.JSONField(default=list)
+    completado = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.tabla} @ {self.version_modelo} ({self.ultimo_pk}/{self.hasta_pk})"
@@ -0,0 +1,131 @@
+"""
+Pool de procesos para puntuar en paralelo fuera del ciclo de una petición.
+
+Los workers se crean con spawn y cargan Django y el modelo activo una sola vez
+(init_worker); cada uno usa un hilo nativo, el paralelismo lo dan los
+procesos. Este módulo no importa Django al cargarse: el proceso hijo lo
+importa para resolver init_worker antes de django.setup().
+
+Los comandos crean un pool por ejecución; el servidor usa shared_pool(), que
+mantiene un pool por proceso y lo reutiliza entre peticiones.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Tareas en vuelo por worker (la lectura del siguiente bloque se solapa)
+TAREAS_POR_WORKER = 2
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _nuevo_pool(n_workers):
+    return ProcessPoolExecutor(n_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker)
+
+
+def shared_pool(n_workers):
+    """Pool de `n_workers` procesos de larga vida, creado en el primer uso."""
+    with _pools_lock:
+        if n_workers not in _pools:
+            _pools[n_workers] = _nuevo_pool(n_workers)
+        return _pools[n_workers]
+
+
+def _descartar(pool):
+    # Un pool roto (worker muerto) no acepta más tareas: el siguiente uso crea otro
+    with _pools_lock:
+        for n, actual in list(_pools.items()):
+            if actual is pool:
+                del _pools[n]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def init_worker(hilos=1):
+    os.environ['CREDIT_INFERENCE_THREADS'] = str(hilos)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from credit_risk import inference  # noqa: F401  (carga el modelo)
+
+
+def score_chunk(entrada):
+    """(versión del modelo, probabilidades) para un DataFrame de solicitantes."""
+    from credit_risk import inference
+    return inference.model_version, inference.predict_proba(inference.encode(entrada))
+
+
+def score_explain_chunk(entrada):
+    """Como score_chunk, más (contribuciones empaquetadas, base, unidad) por fila."""
+    from credit_risk import explanations, inference
+    X = inference.encode(entrada)
+    return inference.model_version, inference.predict_proba(X), explanations.contribution_values(X)
+
+
+def imap_ordered(funcion, items, n_workers, entrada=None, pool=None, reservar=None):
+    """
+    Aplica `funcion` a cada item en un pool de `n_workers` procesos y produce
+    pares (item, resultado) en el orden de `items`, con a lo sumo
+    n_workers * TAREAS_POR_WORKER tareas pendientes. `entrada(item)` (en el
+    proceso principal) da el argumento que se envía al worker.
+
+    `pool` reutiliza un pool existente (shared_pool) en vez de crear uno.
+    `reservar()` se llama antes de enviar cada tarea y devuelve la función que
+    la libera cuando la tarea termina (turnos del planificador).
+    Con n_workers <= 1 y sin `pool` todo corre en el proceso actual.
+    """
+    entrada = entrada or (lambda item: item)
+    if n_workers <= 1 and pool is None:
+        for item in items:
+            if reservar is None:
+                yield item, funcion(entrada(item))
+                continue
+            liberar = reservar()
+            try:
+                resultado = funcion(entrada(item))
+            finally:
+                liberar()
+            yield item, resultado
+        return
+
+    if pool is None:
+        with _nuevo_pool(n_workers) as propio:
+            yield from imap_ordered(funcion, items, n_workers, entrada, propio, reservar)
+        return
+
+    en_vuelo = deque()
+    try:
+        for item in items:
+            argumento = entrada(item)
+            liberar = reservar() if reservar else None
+            try:
+                futuro = pool.submit(funcion, argumento)
+            except BaseException:
+                if liberar:
+                    liberar()
+                raise
+            if liberar:
+                futuro.add_done_callback(lambda _, liberar=liberar: liberar())
+            en_vuelo.append((item, futuro))
+            if len(en_vuelo) >= n_workers * TAREAS_POR_WORKER:
+                item, futuro = en_vuelo.popleft()
+                yield item, futuro.result()
+        while en_vuelo:
+            item, futuro = en_vuelo.popleft()
+            yield item, futuro.result()
+    except BrokenProcessPool:
+        _descartar(pool)
+        raise
+    finally:
+        # Si el consumidor se detiene antes (error, generador cerrado), las
+        # tareas pendientes no deben seguir ocupando el pool compartido
+        for _, futuro in en_vuelo:
+            futuro.cancel()
+        wait([futuro for _, futuro in en_vuelo])
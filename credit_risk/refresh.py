@@ -0,0 +1,294 @@
+"""
+Actualización incremental del modelo con las decisiones de los analistas.
+
+Cada ejecución toma solo las evaluaciones decididas después de la marca de
+agua de la versión activa (updated_at, id), las codifica con el mismo layout
+de features.json y actualiza el modelo sin reentrenar desde cero:
+
+    LogisticRegression      -> SGD (log_loss) partiendo de coef_/intercept_
+    RandomForest/ExtraTrees -> warm_start: se agregan árboles entrenados
+                               con las filas nuevas
+    XGBoost                 -> se continúa el boosting con rondas nuevas
+
+El candidato se compara con el modelo activo sobre dos holdouts (casos
+decididos reservados por pk y el dataset de referencia del notebook) y solo
+se publica como nueva versión si el AUC no cae más de lo permitido.
+
+Etiqueta: decision_final RECHAZADO = 1, APROBADO = 0.
+"""
+
+import copy
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import brier_score_loss, roc_auc_score
+
+from . import inference
+from .backends import SklearnBackend, is_xgboost, save_model, xgb, xgb_training_params
+from .features import encode_frame
+from .models import CreditEvaluation, ModelVersion
+
+
+ETIQUETAS = {'RECHAZADO': 1, 'APROBADO': 0}
+REFERENCE_PATH = os.path.join(settings.BASE_DIR, 'data', 'datos_credito_simulados.csv')
+
+# Parámetros de la actualización
+SGD_ALPHA = 1e-4
+SGD_ETA0 = 0.01
+SGD_EPOCAS = 5
+ARBOLES_NUEVOS = 20
+
+
+# =========================
+# DATOS
+# =========================
+def _decididas():
+    return (
+        CreditEvaluation.objects.filter(decision_final__in=list(ETIQUETAS))
+        .annotate(resto_holdout=F('pk') % settings.CREDIT_REFRESH_HOLDOUT_MOD)
+    )
+
+
+def _a_matriz(filas):
+    if not filas:
+        return np.empty((0, len(inference.model_columns))), np.empty(0, dtype=np.int64)
+    df = pd.DataFrame(filas)
+    y = df['decision_final'].map(ETIQUETAS).to_numpy(dtype=np.int64)
+    return inference.encode(df), y
+
+
+def new_decisions(watermark_at=None, watermark_id=None, batch_size=5000):
+    """
+    Casos decididos después de la marca de agua (sin los reservados al holdout).
+    Devuelve (X, y, (updated_at, id) de la última fila).
+    """
+    qs = _decididas().exclude(resto_holdout=0)
+    if watermark_at is not None:
+        qs = qs.filter(Q(updated_at__gt=watermark_at) | Q(updated_at=watermark_at, pk__gt=watermark_id))
+    filas = list(
+        qs.order_by('updated_at', 'pk')
+        .values('pk', 'updated_at', 'decision_final', *inference.INPUT_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+    marca = (filas[-1]['updated_at'], filas[-1]['pk']) if filas else (watermark_at, watermark_id)
+    return (*_a_matriz(filas), marca)
+
+
+def decision_holdout():
+    """Los casos decididos más recientes con pk % CREDIT_REFRESH_HOLDOUT_MOD == 0."""
+    filas = list(
+        _decididas().filter(resto_holdout=0)
+        .order_by('-updated_at', '-pk')
+        .values('decision_final', *inference.INPUT_FIELDS)[:settings.CREDIT_REFRESH_HOLDOUT_MAX]
+    )
+    return _a_matriz(filas)
+
+
+def reference_holdout():
+    if not os.path.exists(REFERENCE_PATH):
+        return None
+    df = pd.read_csv(REFERENCE_PATH)
+    return encode_frame(df, inference.model_columns), df['riesgo_real'].to_numpy(dtype=np.int64)
+
+
+# =========================
+# ACTUALIZACIÓN
+# =========================
+def incremental_update(estimador, X_scaled, y):
+    """Copia del estimador actualizada solo con (X_scaled, y)."""
+    if hasattr(estimador, 'coef_'):
+        sgd = SGDClassifier(
+            loss='log_loss',
+            alpha=SGD_ALPHA,
+            learning_rate='constant',
+            eta0=SGD_ETA0,
+            max_iter=SGD_EPOCAS,
+            tol=None,
+            class_weight=getattr(estimador, 'class_weight', None),
+            random_state=42,
+        )
+        # SGD actualiza coef_init en su lugar: se parte de copias
+        sgd.fit(X_scaled, y, coef_init=estimador.coef_.copy(), intercept_init=estimador.intercept_.copy())
+        candidato = copy.deepcopy(estimador)
+        candidato.coef_ = sgd.coef_
+        candidato.intercept_ = sgd.intercept_
+        return candidato
+
+    if hasattr(estimador, 'estimators_') and 'warm_start' in estimador.get_params():
+        candidato = copy.deepcopy(estimador)
+        candidato.set_params(warm_start=True, n_estimators=len(estimador.estimators_) + ARBOLES_NUEVOS)
+        candidato.fit(SklearnBackend(candidato, inference.model_columns).model_input(X_scaled), y)
+        return candidato
+
+    if is_xgboost(estimador):
+        booster = estimador if isinstance(estimador, xgb.Booster) else estimador.get_booster()
+        # Los árboles nuevos usan los parámetros con que se entrenó el modelo
+        # (guardados en el Booster); xgb.train parte de una copia de xgb_model
+        parametros = {'objective': 'binary:logistic', 'tree_method': 'hist', **xgb_training_params(estimador)}
+        return xgb.train(
+            {**parametros, 'nthread': settings.CREDIT_XGB_NTHREAD},
+            xgb.DMatrix(np.asarray(X_scaled, dtype=np.float32), label=y),
+            num_boost_round=ARBOLES_NUEVOS,
+            xgb_model=booster,
+        )
+
+    raise TypeError(f"{type(estimador).__name__} no admite actualización incremental")
+
+
+def holdout_metrics(estimador, X, y):
+    if len(y) == 0 or len(np.unique(y)) < 2:
+        return None
+    prob = inference.predict_proba(X, estimador)
+    return {
+        'filas': int(len(y)),
+        'auc': round(float(roc_auc_score(y, prob)), 4),
+        'brier': round(float(brier_score_loss(y, prob)), 4),
+    }
+
+
+# =========================
+# VERSIONES DE ARTEFACTOS
+# =========================
+ARTEFACTOS = (inference.MODEL_PATH, inference.XGB_MODEL_PATH, inference.SCALER_PATH, inference.FEATURES_PATH)
+
+
+def _version_dir(version):
+    return os.path.join(inference.VERSIONS_DIR, version)
+
+
+def new_version_name():
+    """
+    v<AAAAMMDDhhmmss>; si ya existe (dos ejecuciones en el mismo segundo) se
+    agrega un sufijo -2, -3, ...
+    """
+    base = timezone.now().strftime('v%Y%m%d%H%M%S')
+    version, n = base, 1
+    while os.path.exists(_version_dir(version)) or ModelVersion.objects.filter(version=version).exists():
+        n += 1
+        version = f'{base}-{n}'
+    return version
+
+
+def _reemplazar(origen, destino):
+    # Copia a un temporal en el mismo directorio y os.replace (atómico)
+    temporal = f'{destino}.tmp'
+    shutil.copyfile(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def snapshot_active_version():
+    """Guarda los artefactos activos en versions/<versión> si aún no existen."""
+    directorio = _version_dir(inference.read_model_version())
+    if os.path.isdir(directorio):
+        return
+    os.makedirs(directorio)
+    for ruta in ARTEFACTOS:
+        if os.path.exists(ruta):
+            shutil.copyfile(ruta, os.path.join(directorio, os.path.basename(ruta)))
+
+
+def activate_version(version):
+    """Instala versions/<version>/ como modelo activo (también sirve para rollback)."""
+    directorio = _version_dir(version)
+    if not os.path.isdir(directorio):
+        raise FileNotFoundError(f"No existe la versión {version} en {inference.VERSIONS_DIR}")
+    snapshot_active_version()
+    for ruta in ARTEFACTOS:
+        origen = os.path.join(directorio, os.path.basename(ruta))
+        if os.path.exists(origen):
+            _reemplazar(origen, ruta)
+        elif ruta == inference.XGB_MODEL_PATH and os.path.exists(ruta):
+            # Versión de sklearn: el .ubj activo tendría prioridad sobre su .pkl
+            os.remove(ruta)
+
+    temporal = f'{inference.VERSION_PATH}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'activada': timezone.now().isoformat()}, f)
+    os.replace(temporal, inference.VERSION_PATH)
+
+
+def publish_version(estimador, version, metadatos):
+    snapshot_active_version()
+    directorio = _version_dir(version)
+    os.makedirs(directorio)
+    save_model(estimador, directorio)
+    for ruta in (inference.SCALER_PATH, inference.FEATURES_PATH):
+        if os.path.exists(ruta):
+            shutil.copyfile(ruta, os.path.join(directorio, os.path.basename(ruta)))
+    with open(os.path.join(directorio, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2, default=str)
+    activate_version(version)
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+def refresh_model(dry_run=False, forzar=False):
+    """
+    Ejecuta una actualización incremental. Devuelve el ModelVersion (guardado
+    salvo en dry_run o si no hubo filas suficientes).
+    """
+    activa = inference.model_version
+    previa = ModelVersion.objects.filter(version=activa, publicado=True).first()
+    watermark = (previa.watermark_at, previa.watermark_id) if previa else (None, None)
+
+    X_nuevo, y_nuevo, (marca_at, marca_id) = new_decisions(*watermark)
+    registro = ModelVersion(
+        version=new_version_name(),
+        tipo_modelo=type(inference.modelo).__name__,
+        version_anterior=activa,
+        watermark_at=marca_at,
+        watermark_id=marca_id,
+        filas_nuevas=len(y_nuevo),
+    )
+
+    minimo = 1 if forzar else settings.CREDIT_REFRESH_MIN_ROWS
+    if len(y_nuevo) < minimo or len(np.unique(y_nuevo)) < 2:
+        registro.motivo = f"Filas nuevas insuficientes ({len(y_nuevo)}; mínimo {minimo} y ambas clases)"
+        return registro
+
+    candidato = incremental_update(inference.modelo, inference.scale(X_nuevo), y_nuevo)
+
+    holdouts = {'decisiones': decision_holdout(), 'referencia': reference_holdout()}
+    metricas, rechazos = {}, []
+    for nombre, datos in holdouts.items():
+        if datos is None:
+            continue
+        actual = holdout_metrics(inference.modelo, *datos)
+        nuevo = holdout_metrics(candidato, *datos)
+        if actual is None:
+            continue
+        metricas[nombre] = {'actual': actual, 'candidato': nuevo}
+        registro.filas_holdout += actual['filas']
+        if nuevo['auc'] < actual['auc'] - settings.CREDIT_REFRESH_MAX_AUC_DROP:
+            rechazos.append(f"AUC {nombre} {actual['auc']} -> {nuevo['auc']}")
+    registro.metricas = metricas
+
+    if not metricas:
+        registro.motivo = "Sin holdout válido para comparar"
+    elif rechazos:
+        registro.motivo = "; ".join(rechazos)
+    else:
+        registro.publicado = True
+
+    if dry_run:
+        return registro
+
+    if registro.publicado:
+        publish_version(candidato, registro.version, {
+            'version_anterior': activa,
+            'tipo_modelo': registro.tipo_modelo,
+            'watermark_at': registro.watermark_at,
+            'watermark_id': registro.watermark_id,
+            'filas_nuevas': registro.filas_nuevas,
+            'metricas': metricas,
+        })
+    registro.save()
+    return registro
@@ -0,0 +1,181 @@
+"""
+Re-puntuación de la cartera con el modelo activo (manage.py rescore).
+
+Tras publicar un modelo, prob_riesgo / prediccion / recomendacion de las
+evaluaciones guardadas corresponden al modelo anterior. rescore las recalcula:
+
+- recorre la tabla por rangos de pk en bloques de CREDIT_RESCORE_BATCH_SIZE;
+- cada bloque se reconstruye como matriz de diseño desde las columnas
+  guardadas (inference.encode) y se puntúa en un pool de procesos que carga
+  el modelo una vez por worker; los resultados vuelven en orden de pk;
+- solo se escriben las filas cuya probabilidad cambió, con un UPDATE por
+  bloque (unnest en PostgreSQL, executemany en otros motores). updated_at no
+  se toca: es la marca de agua de refresh_model y no hubo decisión nueva;
+- el historial por cédula de las filas cambiadas (última probabilidad y
+  máximo) se actualiza junto con cada bloque, así que nunca queda desfasado;
+- cada bloque se escribe en la misma transacción que el punto de control
+  (RescoreRun), así que una ejecución interrumpida se retoma sin repetir ni
+  perder filas;
+- en dry-run no se escribe nada y solo se cuenta la matriz de cambios de banda.
+
+Los workers también calculan las contribuciones por variable de cada bloque
+(explanations.contribution_values), que se escriben en el mismo UPDATE que la
+nueva puntuación.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+
+from . import inference
+from .applicant_history import refresh_scores
+from .models import CreditEvaluation, RescoreRun
+from .parallel import imap_ordered, score_chunk, score_explain_chunk
+from .scoring import RISK_BANDS, risk_band_codes
+
+
+_CAMPOS = ['pk', 'prob_riesgo', 'recomendacion', 'cliente_cedula', *inference.INPUT_FIELDS]
+_CODIGO_BANDA = {banda: i for i, banda in enumerate(RISK_BANDS)}
+
+
+# =========================
+# LECTURA
+# =========================
+def _bloques(modelo_bd, desde_pk, hasta_pk, batch_size):
+    ultimo = desde_pk
+    while True:
+        filas = list(
+            modelo_bd.objects
+            .filter(pk__gt=ultimo, pk__lte=hasta_pk)
+            .order_by('pk')
+            .values_list(*_CAMPOS)[:batch_size]
+        )
+        if not filas:
+            return
+        bloque = pd.DataFrame.from_records(filas, columns=_CAMPOS)
+        ultimo = int(bloque['pk'].iat[-1])
+        yield bloque
+
+
+# =========================
+# ESCRITURA
+# =========================
+def write_scores(modelo_bd, pks, probs, preds, bandas, contribuciones, base, unidad):
+    """
+    Un UPDATE por bloque con las nuevas puntuaciones y sus contribuciones (sin
+    tocar updated_at).
+    """
+    tabla = connection.ops.quote_name(modelo_bd._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"UPDATE {tabla} AS e SET prob_riesgo = v.prob, prediccion = v.pred, recomendacion = v.banda, "
+                f"contribuciones = v.contrib, contribucion_base = %s, contribucion_unidad = %s "
+                f"FROM (SELECT unnest(%s::bigint[]) AS id, unnest(%s::double precision[]) AS prob, "
+                f"unnest(%s::integer[]) AS pred, unnest(%s::varchar[]) AS banda, "
+                f"unnest(%s::bytea[]) AS contrib) AS v "
+                f"WHERE e.id = v.id",
+                [base, unidad, list(pks), list(probs), list(preds), list(bandas), list(contribuciones)],
+            )
+        else:
+            cursor.executemany(
+                f"UPDATE {tabla} SET prob_riesgo = %s, prediccion = %s, recomendacion = %s, "
+                f"contribuciones = %s, contribucion_base = %s, contribucion_unidad = %s WHERE id = %s",
+                [
+                    (prob, pred, banda, contrib, base, unidad, pk)
+                    for prob, pred, banda, contrib, pk in zip(probs, preds, bandas, contribuciones, pks)
+                ],
+            )
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+def _checkpoint(modelo_bd, dry_run, reiniciar):
+    tabla = modelo_bd._meta.db_table
+    pendientes = RescoreRun.objects.filter(
+        version_modelo=inference.model_version, tabla=tabla, dry_run=dry_run, completado=False,
+    )
+    if reiniciar:
+        pendientes.delete()
+    run = pendientes.order_by('-iniciado').first()
+    if run is None:
+        run = RescoreRun.objects.create(
+            version_modelo=inference.model_version,
+            tabla=tabla,
+            dry_run=dry_run,
+            hasta_pk=modelo_bd.objects.aggregate(m=Max('pk'))['m'] or 0,
+            cambios_banda=np.zeros((len(RISK_BANDS), len(RISK_BANDS)), dtype=np.int64).tolist(),
+        )
+    return run
+
+
+def rescore(modelo_bd=CreditEvaluation, dry_run=False, batch_size=None, n_workers=None,
+            reiniciar=False, limite=None, progreso=None):
+    """
+    Re-puntúa `modelo_bd` con el modelo activo, retomando la última ejecución
+    incompleta para esta versión (salvo `reiniciar`). `limite` corta después
+    de ~N filas dejando el punto de control para continuar. Devuelve el RescoreRun.
+    """
+    batch_size = batch_size or settings.CREDIT_RESCORE_BATCH_SIZE
+    n_workers = n_workers or os.cpu_count() or 1
+    run = _checkpoint(modelo_bd, dry_run, reiniciar)
+    cambios = np.asarray(run.cambios_banda, dtype=np.int64)
+    procesadas = 0
+
+    # En seco no se escribe nada: no hace falta explicar
+    puntuados = imap_ordered(
+        score_chunk if dry_run else score_explain_chunk,
+        _bloques(modelo_bd, run.ultimo_pk, run.hasta_pk, batch_size),
+        n_workers,
+        entrada=lambda bloque: bloque[inference.INPUT_FIELDS],
+    )
+    try:
+        for bloque, (version, probs, *explicacion) in puntuados:
+            if version != run.version_modelo:
+                raise RuntimeError(
+                    f"El modelo activo cambió durante la re-puntuación ({run.version_modelo} -> {version})"
+                )
+            nuevas = risk_band_codes(probs)
+            previas = bloque['recomendacion'].map(_CODIGO_BANDA).fillna(-1).to_numpy(dtype=np.int64)
+            conocidas = previas >= 0
+            np.add.at(cambios, (previas[conocidas], nuevas[conocidas]), 1)
+
+            distintas = bloque['prob_riesgo'].to_numpy() != probs
+            with transaction.atomic():
+                if not dry_run and distintas.any():
+                    pks = bloque['pk'].to_numpy()[distintas].tolist()
+                    contribuciones, base, unidad = explicacion[0]
+                    write_scores(
+                        modelo_bd,
+                        pks,
+                        probs[distintas].tolist(),
+                        inference.predict_labels(probs[distintas]).tolist(),
+                        np.asarray(RISK_BANDS)[nuevas[distintas]].tolist(),
+                        [contribuciones[i] for i in np.flatnonzero(distintas)],
+                        base,
+                        unidad,
+                    )
+                    refresh_scores(modelo_bd, pks, bloque['cliente_cedula'][distintas].dropna().unique())
+                run.ultimo_pk = int(bloque['pk'].iat[-1])
+                run.filas += len(bloque)
+                run.actualizadas += int(distintas.sum())
+                run.cambios_banda = cambios.tolist()
+                run.save()
+
+            procesadas += len(bloque)
+            if progreso:
+                progreso(run)
+            if limite is not None and procesadas >= limite:
+                return run
+    finally:
+        # Cierra el pool (si lo hay) también al cortar por `limite`
+        puntuados.close()
+
+    run.completado = True
+    run.save(update_fields=['completado', 'actualizado'])
+    return run
@@ -0,0 +1,142 @@
+"""
+Cola de revisión de casos PENDIENTE sin contención entre analistas.
+
+- claim_next_case: el analista toma el caso pendiente más antiguo que no esté
+  reservado. SELECT ... FOR UPDATE SKIP LOCKED sobre el índice parcial de
+  pendientes: dos analistas nunca esperan ni reciben el mismo caso. La reserva
+  vence a los CREDIT_REVIEW_LEASE_MINUTES y el caso vuelve a la cola.
+- bulk_decide: decisión para varios casos seleccionados en un solo UPDATE.
+
+En SQLite no existe FOR UPDATE; la reserva se confirma con un UPDATE
+condicional y, si otro analista ganó la carrera, se intenta con el siguiente.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .applicant_history import refresh_last_states
+from .models import CreditEvaluation
+
+
+DECISIONES = ['APROBADO', 'RECHAZADO', 'OBSERVADO']
+MAX_INTENTOS = 5
+
+
+def pending_cases():
+    return CreditEvaluation.objects.filter(estado_caso='PENDIENTE')
+
+
+def _libres(ahora, user=None):
+    libres = Q(asignado_hasta__isnull=True) | Q(asignado_hasta__lt=ahora)
+    if user is not None:
+        libres |= Q(asignado_a=user)
+    return libres
+
+
+def available_cases():
+    """Pendientes sin reserva vigente, en orden de llegada (índice parcial)."""
+    return pending_cases().filter(_libres(timezone.now())).order_by('created_at', 'id')
+
+
+def claimed_case(user):
+    """Caso con reserva vigente del analista, si tiene uno."""
+    return pending_cases().filter(asignado_a=user, asignado_hasta__gte=timezone.now()).first()
+
+
+# =========================
+# TOMAR CASO
+# =========================
+def claim_next_case(user, minutos=None):
+    """
+    Reserva y devuelve el siguiente caso pendiente para `user` (o el que ya
+    tiene reservado, renovando la reserva). None si la cola está vacía.
+    """
+    minutos = settings.CREDIT_REVIEW_LEASE_MINUTES if minutos is None else minutos
+
+    propio = claimed_case(user)
+    if propio is not None:
+        # Renovación condicional: si entretanto la reserva venció y otro la
+        # tomó, o el caso se decidió, se sigue con la cola normal
+        ahora = timezone.now()
+        renovado = pending_cases().filter(
+            pk=propio.pk, asignado_a=user, asignado_hasta__gte=ahora,
+        ).update(asignado_hasta=ahora + timedelta(minutes=minutos))
+        if renovado:
+            propio.asignado_hasta = ahora + timedelta(minutes=minutos)
+            return propio
+
+    for _ in range(MAX_INTENTOS):
+        ahora = timezone.now()
+        with transaction.atomic():
+            caso = (
+                pending_cases()
+                .filter(_libres(ahora))
+                .order_by('created_at', 'id')
+                .select_for_update(skip_locked=True)
+                .only('id')
+                .first()
+            )
+            if caso is None:
+                return None
+
+            # Confirmación condicional (necesaria donde FOR UPDATE no existe)
+            tomado = pending_cases().filter(_libres(ahora), pk=caso.pk).update(
+                asignado_a=user, asignado_hasta=ahora + timedelta(minutes=minutos),
+            )
+        if tomado:
+            return CreditEvaluation.objects.get(pk=caso.pk)
+    return None
+
+
+def release_case(evaluacion, user):
+    """Devuelve a la cola un caso reservado por `user` sin decidirlo."""
+    return CreditEvaluation.objects.filter(pk=evaluacion.pk, asignado_a=user).update(
+        asignado_a=None, asignado_hasta=None,
+    )
+
+
+def lease_holder(evaluacion, user):
+    """Analista (distinto de `user`) con reserva vigente sobre el caso, o None."""
+    if (
+        evaluacion.asignado_a_id
+        and evaluacion.asignado_a_id != user.pk
+        and evaluacion.asignado_hasta
+        and evaluacion.asignado_hasta >= timezone.now()
+    ):
+        return evaluacion.asignado_a
+    return None
+
+
+# =========================
+# DECISIÓN EN BLOQUE
+# =========================
+def bulk_decide(ids, decision, user, comentario=None):
+    """
+    Aplica `decision` a los casos seleccionados con un solo UPDATE. Se omiten
+    los que ya no están pendientes o están reservados por otro analista.
+    Devuelve la cantidad actualizada.
+    """
+    if decision not in DECISIONES:
+        raise ValueError(f"Decisión inválida: {decision}")
+    ahora = timezone.now()
+    cambios = {
+        'estado_caso': decision,
+        'decision_final': decision,
+        'asignado_a': None,
+        'asignado_hasta': None,
+        # update() no aplica auto_now; refresh_model usa updated_at como marca de agua
+        'updated_at': ahora,
+    }
+    if comentario:
+        cambios['comentario_analista'] = comentario
+
+    with transaction.atomic():
+        total = pending_cases().filter(_libres(ahora, user), pk__in=ids).update(**cambios)
+        # Filas tocadas por este UPDATE: mismas ids con el updated_at recién fijado
+        decididas = CreditEvaluation.objects.filter(pk__in=ids, updated_at=ahora, estado_caso=decision)
+        refresh_last_states(decididas.values('pk'), decision, decision)
+    return total
@@ -0,0 +1,190 @@
+"""
+Planificación de la inferencia dentro del proceso con dos clases de prioridad.
+
+    interactiva -> predicción individual / what-if: pasa siempre primero
+    lote        -> carga masiva: se divide en bloques de filas y cede el turno
+                   entre bloques; usa como máximo CREDIT_SCHED_BATCH_SLOTS de
+                   los CREDIT_SCHED_SLOTS turnos de inferencia
+
+Un bloque de lote nunca empieza mientras haya trabajo interactivo en cola, así
+que la espera interactiva queda acotada por la duración de un bloque.
+
+Control de admisión: un lote nuevo se rechaza (Overloaded) si las filas de
+lote ya admitidas superan CREDIT_SCHED_MAX_BATCH_ROWS o si el p99 interactivo
+reciente supera CREDIT_SCHED_INTERACTIVE_P99_MS.
+
+La coordinación es por proceso: con varios workers de gunicorn cada uno tiene
+su propio planificador.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from . import inference
+
+
+INTERACTIVA = 'interactiva'
+LOTE = 'lote'
+CLASES = [INTERACTIVA, LOTE]
+
+# Ventana de latencias para percentiles y admisión
+VENTANA_SEGUNDOS = 60
+VENTANA_MUESTRAS = 5000
+
+
+class Overloaded(Exception):
+    """El planificador no admite más trabajo de lote por ahora."""
+
+
+class _Metricas:
+    def __init__(self):
+        self.en_cola = 0
+        self.en_ejecucion = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        # (instante de fin, espera, latencia total) en segundos
+        self.muestras = deque(maxlen=VENTANA_MUESTRAS)
+
+    def recientes(self, ahora):
+        limite = ahora - VENTANA_SEGUNDOS
+        return [(espera, total) for fin, espera, total in self.muestras if fin >= limite]
+
+
+def _percentiles_ms(valores):
+    if not valores:
+        return {'p50': None, 'p95': None, 'p99': None}
+    p = np.percentile(np.asarray(valores) * 1000, [50, 95, 99])
+    return {'p50': round(float(p[0]), 2), 'p95': round(float(p[1]), 2), 'p99': round(float(p[2]), 2)}
+
+
+class InferenceScheduler:
+    def __init__(self, slots, batch_slots, max_batch_rows, interactive_p99_ms):
+        self.slots = max(1, slots)
+        self.batch_slots = max(1, min(batch_slots, self.slots))
+        self.max_batch_rows = max_batch_rows
+        self.interactive_p99_ms = interactive_p99_ms
+
+        self._cond = threading.Condition()
+        self._metricas = {clase: _Metricas() for clase in CLASES}
+        self._filas_lote = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            slots=settings.CREDIT_SCHED_SLOTS,
+            batch_slots=settings.CREDIT_SCHED_BATCH_SLOTS,
+            max_batch_rows=settings.CREDIT_SCHED_MAX_BATCH_ROWS,
+            interactive_p99_ms=settings.CREDIT_SCHED_INTERACTIVE_P99_MS,
+        )
+
+    # =========================
+    # TURNOS
+    # =========================
+    def _puede_ejecutar(self, clase):
+        interactiva, lote = self._metricas[INTERACTIVA], self._metricas[LOTE]
+        if interactiva.en_ejecucion + lote.en_ejecucion >= self.slots:
+            return False
+        if clase == LOTE:
+            return interactiva.en_cola == 0 and lote.en_ejecucion < self.batch_slots
+        return True
+
+    def acquire(self, clase=INTERACTIVA):
+        """Espera un turno de `clase`; devuelve el testigo para release()."""
+        m = self._metricas[clase]
+        llegada = time.perf_counter()
+        with self._cond:
+            m.en_cola += 1
+            try:
+                self._cond.wait_for(lambda: self._puede_ejecutar(clase))
+            finally:
+                m.en_cola -= 1
+            m.en_ejecucion += 1
+        return clase, llegada, time.perf_counter()
+
+    def release(self, turno):
+        clase, llegada, inicio = turno
+        m = self._metricas[clase]
+        fin = time.perf_counter()
+        with self._cond:
+            m.en_ejecucion -= 1
+            m.completadas += 1
+            m.muestras.append((fin, inicio - llegada, fin - llegada))
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, clase=INTERACTIVA):
+        turno = self.acquire(clase)
+        try:
+            yield
+        finally:
+            self.release(turno)
+
+    # =========================
+    # ADMISIÓN DE LOTES
+    # =========================
+    def _motivo_rechazo(self, filas):
+        if self._filas_lote + filas > self.max_batch_rows:
+            return (f"Hay {self._filas_lote} filas de lote en proceso; "
+                    f"el máximo es {self.max_batch_rows}.")
+        recientes = self._metricas[INTERACTIVA].recientes(time.perf_counter())
+        if len(recientes) >= 20:
+            p99 = _percentiles_ms([total for _, total in recientes])['p99']
+            if p99 > self.interactive_p99_ms:
+                return f"Latencia interactiva alta (p99 {p99:.0f} ms)."
+        return None
+
+    @contextmanager
+    def admit_batch(self, filas):
+        with self._cond:
+            motivo = self._motivo_rechazo(filas)
+            if motivo:
+                self._metricas[LOTE].rechazadas += 1
+                raise Overloaded(motivo)
+            self._filas_lote += filas
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._filas_lote -= filas
+
+    def metrics(self):
+        ahora = time.perf_counter()
+        with self._cond:
+            datos = {'filas_lote_admitidas': self._filas_lote, 'slots': self.slots, 'batch_slots': self.batch_slots}
+            for clase, m in self._metricas.items():
+                recientes = m.recientes(ahora)
+                datos[clase] = {
+                    'en_cola': m.en_cola,
+                    'en_ejecucion': m.en_ejecucion,
+                    'completadas': m.completadas,
+                    'rechazadas': m.rechazadas,
+                    'latencia_ms': _percentiles_ms([total for _, total in recientes]),
+                    'espera_ms': _percentiles_ms([espera for espera, _ in recientes]),
+                }
+        return datos
+
+
+scheduler = InferenceScheduler.from_settings()
+
+
+# =========================
+# PUNTUACIÓN POR BLOQUES
+# =========================
+def score_frame(df, chunk_rows=None, planificador=None):
+    """
+    Probabilidad de impago para un DataFrame de solicitantes como trabajo de
+    lote: cada bloque se codifica y puntúa en su propio turno.
+    """
+    planificador = scheduler if planificador is None else planificador
+    chunk_rows = chunk_rows or settings.CREDIT_SCHED_BATCH_CHUNK_ROWS
+    probs = np.empty(len(df))
+    for inicio in range(0, len(df), chunk_rows):
+        with planificador.slot(LOTE), inference.thread_budget(settings.CREDIT_BATCH_THREADS):
+            bloque = df.iloc[inicio:inicio + chunk_rows]
+            probs[inicio:inicio + len(bloque)] = inference.predict_proba(inference.encode(bloque))
+    return probs
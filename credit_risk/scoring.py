@@ -0,0 +1,18 @@
+import numpy as np
+
+
+# =========================
+# BANDAS DE RIESGO
+# =========================
+UMBRAL_RIESGO_MEDIO = 0.40
+UMBRAL_RIESGO_ALTO = 0.70
+RISK_BANDS = ['BAJO', 'MEDIO', 'ALTO']
+
+
+def risk_band_codes(probs) -> np.ndarray:
+    """0 = BAJO, 1 = MEDIO, 2 = ALTO para un arreglo de probabilidades."""
+    return np.searchsorted([UMBRAL_RIESGO_MEDIO, UMBRAL_RIESGO_ALTO], probs, side='right')
+
+
+def risk_band(prob: float) -> str:
+    return RISK_BANDS[int(risk_band_codes([prob])[0])]
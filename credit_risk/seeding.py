@@ -0,0 +1,227 @@
+"""
+Carga masiva de evaluaciones sintéticas para pruebas de rendimiento
+(manage.py seed_evaluations).
+
+- Solicitantes con las reglas de data/generar_dataset.py (synthetic.py) y
+  puntuados con el modelo activo por bloques vectorizados, con sus
+  contribuciones por variable (opcional: con árboles es lo más costoso).
+- created_at crece con el pk y se reparte en los últimos `anios` años; los
+  casos PENDIENTE se concentran en los últimos DIAS_PENDIENTES días y la
+  decisión de los casos cerrados sigue a la probabilidad de impago.
+- Usuarios repartidos entre los existentes; cédulas con solicitantes que
+  repiten (ApplicantHistory se reconstruye al final en una sola pasada).
+- PostgreSQL: COPY FROM STDIN (CSV en memoria). Otros motores: INSERT con
+  executemany; bulk_create no sirve aquí porque auto_now_add / auto_now
+  reemplazarían las fechas repartidas.
+- Opcionalmente se eliminan los índices secundarios antes de cargar y se
+  recrean al final con su DDL original.
+"""
+
+import io
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import inference
+from .applicant_history import rebuild_applicant_history
+from .explanations import contribution_values
+from .models import CreditEvaluation
+from .scoring import RISK_BANDS, risk_band_codes
+from .synthetic import generate_applicants
+
+
+DIAS_PENDIENTES = 30
+# Proporción de casos PENDIENTE (solo recientes) y OBSERVADO
+P_PENDIENTE_RECIENTE = 0.6
+P_OBSERVADO = 0.08
+# Demora de la decisión (horas) para casos cerrados
+HORAS_DECISION_MAX = 72
+
+NOMBRES = ['María', 'José', 'Ana', 'Luis', 'Carmen', 'Jorge', 'Rosa', 'Carlos', 'Lucía', 'Miguel']
+APELLIDOS = ['Pozo', 'Chamorro', 'Benavides', 'Rosero', 'Cuaspud', 'Guerrero', 'Ruano', 'Narváez']
+
+COLUMNAS = [
+    'user_id', 'created_at', 'updated_at', *inference.INPUT_FIELDS,
+    'prob_riesgo', 'prediccion', 'recomendacion', 'contribuciones', 'contribucion_base',
+    'contribucion_unidad', 'estado_caso', 'decision_final',
+    'cliente_nombres', 'cliente_apellidos', 'cliente_cedula',
+]
+
+
+# =========================
+# GENERACIÓN
+# =========================
+def synthetic_evaluations(atras, ahora, usuarios, n_cedulas, rng, contribuciones=True):
+    """
+    DataFrame con las columnas de COLUMNAS; una evaluación por elemento de
+    `atras` (segundos antes de `ahora` en que se creó). Con `contribuciones`
+    se guardan las de cada fila, como al puntuar un caso real.
+    """
+    n = len(atras)
+    df = generate_applicants(n, seed=int(rng.integers(2**31)))
+    df['estado_civil'] = df['estado_civil'].cat.rename_categories({'Unión Libre': 'UnionLibre'})
+    for col in ('tiene_garante', 'propiedad_completa', 'estado_legal'):
+        df[col] = df[col].astype(bool)
+
+    # Solo las columnas guardadas: lo mismo que verá rescore al releer la fila
+    salida = df[inference.INPUT_FIELDS].copy()
+    X = inference.encode(salida)
+    with inference.thread_budget(settings.CREDIT_BATCH_THREADS):
+        probs = inference.predict_proba(X)
+        explicacion = contribution_values(X) if contribuciones else ([None] * n, None, None)
+
+    ahora = pd.Timestamp(ahora)
+    created = (ahora - pd.to_timedelta(atras, unit='s')).floor('us')
+
+    # Estado del caso: pendientes recientes; los cerrados según la probabilidad
+    reciente = atras < DIAS_PENDIENTES * 86400
+    sorteo = rng.random(n)
+    estado = np.where(rng.random(n) < probs, 'RECHAZADO', 'APROBADO').astype(object)
+    estado[sorteo < P_OBSERVADO] = 'OBSERVADO'
+    estado[reciente & (sorteo < P_PENDIENTE_RECIENTE)] = 'PENDIENTE'
+    pendiente = estado == 'PENDIENTE'
+
+    demora = np.where(pendiente, 0.0, rng.random(n) * HORAS_DECISION_MAX * 3600)
+    updated = (created + pd.to_timedelta(demora, unit='s')).floor('us')
+    updated = updated.where(updated <= ahora, ahora)
+
+    salida.insert(0, 'user_id', rng.choice(usuarios, size=n) if usuarios else None)
+    salida.insert(1, 'created_at', created)
+    salida.insert(2, 'updated_at', updated)
+    salida['prob_riesgo'] = probs
+    salida['prediccion'] = inference.predict_labels(probs)
+    salida['recomendacion'] = np.asarray(RISK_BANDS)[risk_band_codes(probs)]
+    salida['contribuciones'], salida['contribucion_base'], salida['contribucion_unidad'] = explicacion
+    salida['estado_caso'] = estado
+    salida['decision_final'] = np.where(pendiente, None, estado)
+    salida['cliente_nombres'] = np.asarray(NOMBRES)[rng.integers(len(NOMBRES), size=n)]
+    salida['cliente_apellidos'] = np.asarray(APELLIDOS)[rng.integers(len(APELLIDOS), size=n)]
+    salida['cliente_cedula'] = pd.Series(rng.integers(0, n_cedulas, size=n)).map('{:010d}'.format).to_numpy()
+    return salida[COLUMNAS]
+
+
+# =========================
+# CARGA
+# =========================
+def _tabla():
+    return connection.ops.quote_name(CreditEvaluation._meta.db_table)
+
+
+def copy_rows(df):
+    """Carga un bloque con COPY FROM STDIN (PostgreSQL, psycopg2)."""
+    # bytea en formato hex dentro del CSV
+    df = df.assign(contribuciones=df['contribuciones'].map(lambda c: None if c is None else '\\x' + c.hex()))
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False, date_format='%Y-%m-%d %H:%M:%S.%f%z')
+    buffer.seek(0)
+    columnas = ', '.join(connection.ops.quote_name(c) for c in df.columns)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {_tabla()} ({columnas}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _valores(serie):
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.tolist()
+    if connection.vendor == 'sqlite':
+        # Mismo texto que guarda el ORM en SQLite: UTC sin zona ni 'T'
+        utc = serie.dt.tz_convert(None).to_numpy().astype('datetime64[us]')
+        return [v.replace('T', ' ') for v in np.datetime_as_string(utc, unit='us').tolist()]
+    return [connection.ops.adapt_datetimefield_value(d) for d in serie.dt.to_pydatetime()]
+
+
+def insert_rows(df):
+    """Carga un bloque con INSERT + executemany (SQLite y otros motores)."""
+    columnas = ', '.join(connection.ops.quote_name(c) for c in df.columns)
+    marcas = ', '.join(['%s'] * len(df.columns))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {_tabla()} ({columnas}) VALUES ({marcas})",
+            zip(*(_valores(df[c]) for c in df.columns)),
+        )
+
+
+# =========================
+# ÍNDICES
+# =========================
+def secondary_indexes():
+    """(nombre, DDL) de los índices de CreditEvaluation que no respaldan una restricción."""
+    tabla = CreditEvaluation._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+                "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+                [tabla, tabla],
+            )
+        elif connection.vendor == 'sqlite':
+            # Los autoindex de SQLite (pk/unique) no tienen DDL propio
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+                [tabla],
+            )
+        else:
+            return []
+        return cursor.fetchall()
+
+
+@contextmanager
+def deferred_indexes(activo=True, progreso=None):
+    """Elimina los índices secundarios durante el bloque y los recrea al salir."""
+    indices = secondary_indexes() if activo else []
+    with connection.cursor() as cursor:
+        for nombre, _ in indices:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(nombre)}")
+    try:
+        yield indices
+    finally:
+        with connection.cursor() as cursor:
+            for nombre, ddl in indices:
+                inicio = time.perf_counter()
+                cursor.execute(ddl)
+                if progreso:
+                    progreso(f"índice {nombre} recreado en {time.perf_counter() - inicio:.1f} s")
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+def seed_evaluations(n, anios=3, batch_size=100_000, seed=42, n_cedulas=None,
+                     diferir_indices=False, historial=True, contribuciones=True, progreso=None):
+    """
+    Inserta `n` evaluaciones sintéticas repartidas en los últimos `anios` años
+    (las más antiguas primero). Devuelve la cantidad insertada.
+    """
+    rng = np.random.default_rng(seed)
+    ahora = timezone.now()
+    paso = anios * 365 * 86400 / max(n, 1)
+    usuarios = list(User.objects.values_list('pk', flat=True))
+    n_cedulas = n_cedulas or max(n // 3, 1)
+    cargar = copy_rows if connection.vendor == 'postgresql' else insert_rows
+
+    hechas = 0
+    with deferred_indexes(diferir_indices, progreso):
+        while hechas < n:
+            tam = min(batch_size, n - hechas)
+            # La fila más antigua va primero: el pk crece con created_at
+            atras = (n - hechas - np.arange(tam) - rng.random(tam)) * paso
+            bloque = synthetic_evaluations(atras, ahora, usuarios, n_cedulas, rng, contribuciones)
+            with transaction.atomic():
+                cargar(bloque)
+            hechas += tam
+            if progreso:
+                progreso(f"{hechas}/{n} evaluaciones")
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {_tabla()}")
+    if historial:
+        total = rebuild_applicant_history()
+        if progreso:
+            progreso(f"historial reconstruido: {total} cédulas")
+    return hechas
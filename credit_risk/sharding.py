@@ -0,0 +1,240 @@
+"""
+Puntuación de un archivo de lote grande repartido entre varios procesos.
+
+El archivo se divide en fragmentos sin leerlo completo en el proceso principal:
+
+    CSV      -> rangos de bytes alineados al inicio de una línea; cada worker
+                lee solo su rango (seek + read)
+    Parquet  -> rangos de filas; cada worker lee solo los row groups que los
+                cubren (requiere pyarrow)
+    XLSX     -> se convierte una vez a CSV en el proceso principal y se reparte
+                como CSV: openpyxl en modo read_only no puede saltar filas, así
+                que cada fragmento volvería a leer la hoja desde el inicio
+
+Cada worker (credit_risk.parallel: modelo cargado una vez por proceso)
+codifica y puntúa su fragmento y lo escribe como CSV parcial con las columnas
+de resultado; el proceso principal concatena las partes en el orden original
+del archivo.
+
+En CSV no se admiten campos entre comillas con saltos de línea (las columnas
+del modelo no los tienen). Los fragmentos CSV se leen como texto (sin inferir
+tipos por fragmento), así que cada columna se devuelve tal como venía en el
+archivo; encode convierte las columnas del modelo.
+"""
+
+import csv
+import io
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from . import inference
+from .parallel import imap_ordered
+from .scoring import RISK_BANDS, risk_band_codes
+
+
+FORMATOS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.xlsx': 'xlsx'}
+# Formatos de la carga masiva puntuada en el proceso web (.xls no se fragmenta)
+FORMATOS_CARGA = {**FORMATOS, '.xls': 'xls'}
+RESULT_COLUMNS = ['Prediccion_Riesgo', 'Probabilidad_Impago', 'Recomendacion']
+
+# Líneas leídas para estimar el largo medio de una fila CSV
+MUESTRA_LINEAS = 1000
+
+
+def shard_format(nombre):
+    return FORMATOS.get(os.path.splitext(nombre)[1].lower())
+
+
+def upload_format(nombre):
+    return FORMATOS_CARGA.get(os.path.splitext(nombre)[1].lower())
+
+
+def read_table(origen, formato):
+    """Archivo completo (ruta o archivo subido) como DataFrame."""
+    if formato == 'csv':
+        return pd.read_csv(origen)
+    if formato == 'parquet':
+        return pd.read_parquet(origen)  # requiere pyarrow
+    return pd.read_excel(origen)
+
+
+def add_result_columns(df, probs):
+    """Columnas de resultado de la carga masiva (las mismas de batch_predict_view)."""
+    df['Prediccion_Riesgo'] = np.where(inference.predict_labels(probs) == 1, "RIESGO ALTO", "RIESGO BAJO")
+    df['Probabilidad_Impago'] = np.round(probs * 100, 2)
+    df['Recomendacion'] = np.asarray(RISK_BANDS)[risk_band_codes(probs)]
+    return df
+
+
+# =========================
+# PLAN DE FRAGMENTOS
+# =========================
+def _cantidad(filas, n_workers, filas_por_fragmento):
+    # Al menos un fragmento por worker; más si son grandes (mejor reparto)
+    return max(1, min(max(n_workers, math.ceil(filas / filas_por_fragmento)), filas or 1))
+
+
+def _plan_csv(ruta, n_workers, filas_por_fragmento):
+    tamano = os.path.getsize(ruta)
+    with open(ruta, 'rb') as f:
+        encabezado = f.readline()
+        datos = f.tell()
+        muestra = [f.readline() for _ in range(MUESTRA_LINEAS)]
+        muestra = [linea for linea in muestra if linea]
+        largo = max(1.0, sum(map(len, muestra)) / max(len(muestra), 1))
+        filas = int((tamano - datos) / largo) if muestra else 0
+
+        n = _cantidad(filas, n_workers, filas_por_fragmento)
+        cortes = [datos]
+        for k in range(1, n):
+            f.seek(datos + (tamano - datos) * k // n)
+            f.readline()  # avanza hasta el inicio de la siguiente línea
+            cortes.append(max(f.tell(), cortes[-1]))
+        cortes.append(tamano)
+
+    columnas = list(pd.read_csv(io.BytesIO(encabezado), nrows=0, encoding='utf-8-sig').columns)
+    rangos = [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+    return columnas, filas, rangos
+
+
+def _plan_parquet(ruta, n_workers, filas_por_fragmento):
+    import pyarrow.parquet as pq  # dependencia opcional
+    archivo = pq.ParquetFile(ruta)
+    filas = archivo.metadata.num_rows
+    return archivo.schema_arrow.names, filas, _rangos_filas(filas, n_workers, filas_por_fragmento)
+
+
+def _plan_xlsx(ruta, n_workers, filas_por_fragmento):
+    from openpyxl import load_workbook
+    libro = load_workbook(ruta, read_only=True)
+    try:
+        hoja = libro.active
+        columnas = [c for c in next(hoja.iter_rows(min_row=1, max_row=1, values_only=True))]
+        filas = hoja.max_row - 1 if hoja.max_row else sum(1 for _ in hoja.iter_rows(min_row=2))
+    finally:
+        libro.close()
+    return columnas, filas, _rangos_filas(filas, n_workers, filas_por_fragmento)
+
+
+def _rangos_filas(filas, n_workers, filas_por_fragmento):
+    n = _cantidad(filas, n_workers, filas_por_fragmento)
+    cortes = [filas * k // n for k in range(n + 1)]
+    return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+
+def plan_shards(ruta, n_workers, filas_por_fragmento=None):
+    """
+    {'formato', 'columnas', 'filas', 'fragmentos': [(inicio, fin), ...]}. En
+    CSV los rangos son de bytes y 'filas' es una estimación por el largo medio
+    de las primeras líneas; en Parquet/XLSX son rangos de filas de datos (en
+    XLSX, score_file vuelve a planificar sobre la hoja convertida a CSV).
+    """
+    formato = shard_format(ruta)
+    if formato is None:
+        raise ValueError("Formato no soportado para carga en paralelo. Use CSV, Parquet o XLSX")
+    filas_por_fragmento = filas_por_fragmento or settings.CREDIT_BATCH_SHARD_ROWS
+    planificar = {'csv': _plan_csv, 'parquet': _plan_parquet, 'xlsx': _plan_xlsx}[formato]
+    columnas, filas, fragmentos = planificar(ruta, n_workers, filas_por_fragmento)
+    return {'formato': formato, 'columnas': columnas, 'filas': filas, 'fragmentos': fragmentos}
+
+
+# =========================
+# WORKER
+# =========================
+def read_shard(formato, ruta, columnas, inicio, fin):
+    if formato == 'csv':
+        with open(ruta, 'rb') as f:
+            f.seek(inicio)
+            contenido = f.read(fin - inicio)
+        return pd.read_csv(io.BytesIO(contenido), header=None, names=columnas, dtype=str, keep_default_na=False)
+
+    import pyarrow.parquet as pq
+    archivo = pq.ParquetFile(ruta)
+    grupos, desde, primera = [], 0, None
+    for g in range(archivo.metadata.num_row_groups):
+        hasta = desde + archivo.metadata.row_group(g).num_rows
+        if hasta > inicio and desde < fin:
+            grupos.append(g)
+            primera = desde if primera is None else primera
+        desde = hasta
+    tabla = archivo.read_row_groups(grupos).slice(inicio - primera, fin - inicio)
+    return tabla.to_pandas()
+
+
+def xlsx_to_csv(ruta, destino):
+    """Copia la hoja activa de `ruta` a un CSV `destino` en una sola pasada."""
+    from openpyxl import load_workbook
+    libro = load_workbook(ruta, read_only=True)
+    try:
+        with open(destino, 'w', encoding='utf-8', newline='') as out:
+            csv.writer(out, lineterminator='\n').writerows(libro.active.iter_rows(values_only=True))
+    finally:
+        libro.close()
+    return destino
+
+
+def score_shard(fragmento):
+    """Puntúa un fragmento y lo escribe (sin encabezado) en fragmento['salida']."""
+    df = read_shard(fragmento['formato'], fragmento['ruta'], fragmento['columnas'],
+                    fragmento['inicio'], fragmento['fin'])
+    probs = inference.predict_proba(inference.encode(df))
+    add_result_columns(df, probs).to_csv(fragmento['salida'], header=False, index=False, lineterminator='\n')
+    return inference.model_version, len(df)
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+def score_file(ruta, salida, n_workers=None, filas_por_fragmento=None, plan=None, progreso=None,
+               pool=None, reservar=None):
+    """
+    Puntúa el archivo `ruta` en `n_workers` procesos y escribe en `salida` un
+    CSV con las columnas originales más RESULT_COLUMNS, en el mismo orden.
+    `pool` y `reservar` se pasan a imap_ordered (pool compartido y turno por
+    fragmento). Devuelve {'filas', 'fragmentos', 'segundos'}.
+    """
+    inicio = time.perf_counter()
+    n_workers = n_workers or settings.CREDIT_BATCH_WORKERS
+    plan = plan or plan_shards(ruta, n_workers, filas_por_fragmento)
+    faltan = [c for c in inference.INPUT_FIELDS if c not in plan['columnas']]
+    if faltan:
+        raise ValueError(f"Faltan columnas: {', '.join(faltan)}")
+
+    directorio = tempfile.mkdtemp(prefix='lote_', dir=os.path.dirname(os.path.abspath(salida)))
+    total = 0
+    try:
+        if plan['formato'] == 'xlsx':
+            ruta = xlsx_to_csv(ruta, os.path.join(directorio, 'hoja.csv'))
+            plan = plan_shards(ruta, n_workers, filas_por_fragmento)
+        fragmentos = [
+            {'formato': plan['formato'], 'ruta': ruta, 'columnas': plan['columnas'],
+             'inicio': a, 'fin': b, 'salida': os.path.join(directorio, f'{i:05d}.csv')}
+            for i, (a, b) in enumerate(plan['fragmentos'])
+        ]
+        with open(salida, 'w', encoding='utf-8', newline='') as out:
+            columnas = list(dict.fromkeys(plan['columnas'] + RESULT_COLUMNS))
+            csv.writer(out, lineterminator='\n').writerow(columnas)
+            puntuados = imap_ordered(score_shard, fragmentos, n_workers, pool=pool, reservar=reservar)
+            for fragmento, (version, filas) in puntuados:
+                if version != inference.model_version:
+                    raise RuntimeError(
+                        f"Los workers cargaron el modelo {version} y este proceso usa "
+                        f"{inference.model_version}; reinicie el servidor"
+                    )
+                with open(fragmento['salida'], 'r', encoding='utf-8', newline='') as parte:
+                    shutil.copyfileobj(parte, out, 1 << 20)
+                os.remove(fragmento['salida'])
+                total += filas
+                if progreso:
+                    progreso(total)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return {'filas': total, 'fragmentos': len(fragmentos), 'segundos': round(time.perf_counter() - inicio, 2)}
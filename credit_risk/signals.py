@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .applicant_history import forget_evaluation, record_evaluation, refresh_last_state
+from .models import CreditEvaluation
+
+
+@receiver(post_save, sender=CreditEvaluation)
+def update_applicant_history(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_evaluation(instance)
+    else:
+        refresh_last_state(instance)
+
+
+@receiver(post_delete, sender=CreditEvaluation)
+def remove_from_applicant_history(sender, instance, **kwargs):
+    forget_evaluation(instance)
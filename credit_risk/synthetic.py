@@ -0,0 +1,117 @@
+"""
+Versión vectorizada de las reglas de data/generar_dataset.py.
+
+Genera millones de solicitantes en segundos (sin bucle por fila) para pruebas
+de escala; las distribuciones y la lógica de riesgo son las mismas del script
+original.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+OPCIONES_SEGMENTO = ['Consumo', 'Microcrédito', 'Inmobiliario', 'Ahorros Suficientes']
+OPCIONES_CIVIL = ['Soltero', 'Casado', 'Divorciado', 'Viudo', 'Unión Libre']
+OPCIONES_PLAZO = [12, 24, 36, 48, 60, 84]
+
+PRODUCTOS = {
+    'Microcrédito': ['Mi Negocio', 'Agrícola-Ganadero', 'Vehicular Trabajo'],
+    'Consumo': ['Consumo General', 'Sueldo', 'Digital'],
+    'Inmobiliario': ['Vivienda'],
+    'Ahorros Suficientes': ['Back-to-back'],
+}
+RANGOS_MONTO = {
+    'Microcrédito': (1000, 20000),
+    'Consumo': (500, 15000),
+    'Inmobiliario': (15000, 80000),
+    'Ahorros Suficientes': (500, 50000),
+}
+
+
+def _categorica(rng, opciones, n, p=None):
+    codigos = rng.choice(len(opciones), size=n, p=p)
+    return pd.Categorical.from_codes(codigos, categories=opciones)
+
+
+def generate_applicants(n, seed=42):
+    rng = np.random.default_rng(seed)
+
+    # 1. Variables personales
+    edad = rng.triangular(19, 35, 75, size=n).astype(np.int64)
+    estado_civil = _categorica(rng, OPCIONES_CIVIL, n)
+
+    # 2. Variables económicas
+    ingreso_mensual = np.round(rng.lognormal(mean=6.5, sigma=0.5, size=n), 2)
+
+    # 3. Variables del crédito
+    seg_codigo = rng.integers(0, len(OPCIONES_SEGMENTO), size=n)
+    segmento = pd.Categorical.from_codes(seg_codigo, categories=OPCIONES_SEGMENTO)
+
+    es_micro = seg_codigo == OPCIONES_SEGMENTO.index('Microcrédito')
+    es_inmob = seg_codigo == OPCIONES_SEGMENTO.index('Inmobiliario')
+    es_ahorro = seg_codigo == OPCIONES_SEGMENTO.index('Ahorros Suficientes')
+
+    ventas_anuales = np.where(es_micro, np.round(ingreso_mensual * 12 * 1.5, 2), 0.0)
+
+    productos = [p for s in OPCIONES_SEGMENTO for p in PRODUCTOS[s]]
+    offset = np.cumsum([0] + [len(PRODUCTOS[s]) for s in OPCIONES_SEGMENTO])[:-1]
+    tam = np.array([len(PRODUCTOS[s]) for s in OPCIONES_SEGMENTO])
+    prod_codigo = offset[seg_codigo] + (rng.random(n) * tam[seg_codigo]).astype(np.int64)
+    producto = pd.Categorical.from_codes(prod_codigo, categories=productos)
+
+    bajo = np.array([RANGOS_MONTO[s][0] for s in OPCIONES_SEGMENTO], dtype=float)
+    alto = np.array([RANGOS_MONTO[s][1] for s in OPCIONES_SEGMENTO], dtype=float)
+    monto = np.round(rng.uniform(bajo[seg_codigo], alto[seg_codigo]), 2)
+
+    plazo = rng.choice(OPCIONES_PLAZO, size=n)
+
+    # 4. Variables de riesgo
+    dias_mora_prom = rng.exponential(scale=5, size=n).astype(np.int64)
+
+    score_codigo = np.where(
+        dias_mora_prom == 0,
+        np.where(rng.random(n) < 0.6, 0, 1),
+        np.where(dias_mora_prom <= 10, 2, 3),
+    )
+    score = pd.Categorical.from_codes(score_codigo, categories=['AAA', 'AA', 'A', 'Rechazado'])
+
+    estado_legal = (rng.random(n) < 0.05).astype(np.int64)
+    propiedad_completa = (rng.random(n) < 0.8).astype(np.int64)
+    tiene_garante = rng.integers(0, 2, size=n)
+
+    # 5. Garantía
+    garantias = ['Personal', 'Prendaria', 'Hipotecaria', 'Autoliquidable']
+    gar_codigo = np.where(es_inmob, 2, np.where(es_ahorro, 3, rng.integers(0, 2, size=n)))
+    garantia = pd.Categorical.from_codes(gar_codigo, categories=garantias)
+
+    es_vehicular = prod_codigo == productos.index('Vehicular Trabajo')
+    rastreo = (es_vehicular & (rng.random(n) < 0.9)).astype(np.int64)
+
+    # 6. Variable objetivo
+    prob = np.full(n, 0.1)
+    prob += 0.4 * (dias_mora_prom > 10)
+    prob += 0.5 * (score_codigo == 3)
+    prob += 0.8 * (estado_legal == 1)
+    prob += 0.3 * ((edad < 21) & (monto > 3000))
+    prob += 0.2 * ((gar_codigo == 0) & (monto > 10000))
+    prob += 0.3 * (es_inmob & (propiedad_completa == 0))
+    riesgo_real = (rng.random(n) < prob).astype(np.int64)
+
+    return pd.DataFrame({
+        'score_interno': score,
+        'dias_mora_prom': dias_mora_prom,
+        'edad': edad,
+        'ingreso_mensual': ingreso_mensual,
+        'ventas_anuales': ventas_anuales,
+        'segmento_credito': segmento,
+        'producto': producto,
+        'monto_solicitado': monto,
+        'plazo_meses': plazo,
+        'garantia': garantia,
+        'propiedad_completa': propiedad_completa,
+        'estado_civil': estado_civil,
+        'estado_legal': estado_legal,
+        'tiene_garante': tiene_garante,
+        'rastreo_instalado': rastreo,
+        'riesgo_real': riesgo_real,
+    })
@@ -1,3 +1,905 @@
-from django.test import TestCase
+import copy
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from threadpoolctl import threadpool_info
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from . import explanations, inference, parallel, refresh, review_queue, views
+from .applicant_history import rebuild_applicant_history
+from .archive import archive_batch, archive_evaluations, get_evaluation_or_404
+from .backends import load_backend, make_backend, save_model, xgb
+from .model_validation import _tareas, band_confusion, calibration_table, fold_assignments
+from .models import ApplicantHistory, CreditEvaluation, CreditEvaluationArchive, ModelVersion
+from .refresh import (
+    activate_version, decision_holdout, incremental_update, new_decisions, new_version_name, refresh_model,
+)
+from .rescoring import rescore
+from .review_queue import bulk_decide, claim_next_case, lease_holder
+from .scoring import UMBRAL_RIESGO_MEDIO, risk_band
+from .scheduler import INTERACTIVA, LOTE, InferenceScheduler, Overloaded, score_frame
+from .seeding import seed_evaluations
+from .sharding import score_file
+from .synthetic import generate_applicants
+from .whatif import amount_grid, score_grid
+
+
+CAMPOS_HISTORIAL = [
+    'cliente_cedula', 'total_evaluaciones', 'ultima_evaluacion_id', 'ultima_evaluacion_at',
+    'ultima_prob_riesgo', 'ultimo_estado', 'ultima_decision', 'max_prob_riesgo',
+]
+
+
+def crear_evaluacion(cedula='0102030405', prob=0.3, **extra):
+    datos = {
+        'edad': 40, 'estado_civil': 'Casado', 'ingreso_mensual': 1500, 'ventas_anuales': 20000,
+        'monto_solicitado': 5000, 'plazo_meses': 24, 'dias_mora_prom': 0, 'garantia': 'Hipotecaria',
+        'prob_riesgo': prob, 'prediccion': int(prob > 0.5), 'recomendacion': 'BAJO',
+        'cliente_cedula': cedula,
+    }
+    datos.update(extra)
+    return CreditEvaluation.objects.create(**datos)
+
+
+# =========================
+# HISTORIAL POR CÉDULA
+# =========================
+class ApplicantHistoryTests(TestCase):
+    def foto(self):
+        return list(ApplicantHistory.objects.order_by('pk').values(*CAMPOS_HISTORIAL))
+
+    def assertIgualAReconstruccion(self):
+        incremental = self.foto()
+        rebuild_applicant_history()
+        self.assertEqual(incremental, self.foto())
+
+    def test_alta(self):
+        crear_evaluacion('0000000001', 0.2)
+        crear_evaluacion('0000000001', 0.8)
+        crear_evaluacion('0000000001', 0.5)
+        crear_evaluacion('0000000002', 0.1)
+        crear_evaluacion(None, 0.9)
+
+        h = ApplicantHistory.objects.get(pk='0000000001')
+        self.assertEqual(h.total_evaluaciones, 3)
+        self.assertEqual(h.max_prob_riesgo, 0.8)
+        self.assertEqual(h.ultima_prob_riesgo, 0.5)
+        self.assertIgualAReconstruccion()
+
+    def test_decision(self):
+        crear_evaluacion('0000000001', 0.2)
+        ultima = crear_evaluacion('0000000001', 0.6)
+        otra = crear_evaluacion('0000000002', 0.4)
+
+        ultima.estado_caso = ultima.decision_final = 'RECHAZADO'
+        ultima.save()
+        self.assertEqual(bulk_decide([otra.pk], 'APROBADO', None), 1)
+
+        self.assertEqual(ApplicantHistory.objects.get(pk='0000000001').ultima_decision, 'RECHAZADO')
+        self.assertEqual(ApplicantHistory.objects.get(pk='0000000002').ultimo_estado, 'APROBADO')
+        self.assertIgualAReconstruccion()
+
+    def test_decision_actualiza_updated_at(self):
+        e = crear_evaluacion('0000000001', 0.2)
+        antes = ApplicantHistory.objects.get(pk='0000000001').updated_at
+        e.estado_caso = e.decision_final = 'APROBADO'
+        e.save()
+        self.assertGreater(ApplicantHistory.objects.get(pk='0000000001').updated_at, antes)
+
+    def test_borrado(self):
+        primera = crear_evaluacion('0000000001', 0.9)
+        ultima = crear_evaluacion('0000000001', 0.3)
+        unica = crear_evaluacion('0000000002', 0.4)
+
+        ultima.delete()
+        h = ApplicantHistory.objects.get(pk='0000000001')
+        self.assertEqual((h.total_evaluaciones, h.ultima_evaluacion_id), (1, primera.pk))
+        self.assertIgualAReconstruccion()
+
+        CreditEvaluation.objects.filter(pk__in=[primera.pk, unica.pk]).delete()
+        self.assertFalse(ApplicantHistory.objects.exists())
+        self.assertIgualAReconstruccion()
+
+    def test_archivo_no_cambia_el_historial(self):
+        e = crear_evaluacion('0000000001', 0.7, estado_caso='APROBADO', decision_final='APROBADO')
+        crear_evaluacion('0000000001', 0.1)
+        antes = self.foto()
+
+        self.assertEqual(archive_batch([e.pk], dias=0), 1)
+        self.assertEqual(antes, self.foto())
+        self.assertIgualAReconstruccion()
+
+    def test_rescore_actualiza_el_historial(self):
+        archivada = crear_evaluacion('0000000001', 0.95, monto_solicitado=1000,
+                                     estado_caso='APROBADO', decision_final='APROBADO')
+        crear_evaluacion('0000000001', 0.2, monto_solicitado=3000)
+        crear_evaluacion('0000000002', 0.9, monto_solicitado=1000)
+        crear_evaluacion('0000000002', 0.1, monto_solicitado=6000)
+        crear_evaluacion('0000000003', 0.5, monto_solicitado=5000)
+        archive_batch([archivada.pk], dias=0)
+
+        def puntuar(entrada):
+            X = inference.encode(entrada)
+            probs = entrada['monto_solicitado'].to_numpy() / 10000
+            return inference.model_version, probs, explanations.contribution_values(X)
+
+        with mock.patch('credit_risk.rescoring.score_explain_chunk', puntuar):
+            rescore(n_workers=1)
+
+        h1, h2 = ApplicantHistory.objects.filter(pk__in=['0000000001', '0000000002']).order_by('pk')
+        self.assertEqual((h1.ultima_prob_riesgo, h1.max_prob_riesgo), (0.3, 0.95))
+        self.assertEqual((h2.ultima_prob_riesgo, h2.max_prob_riesgo), (0.6, 0.6))
+        self.assertIgualAReconstruccion()
+
+
+# =========================
+# ARCHIVO
+# =========================
+class ArchiveTests(TestCase):
+    def setUp(self):
+        hace_un_anio = timezone.now() - timedelta(days=400)
+        self.cerrada = crear_evaluacion('0000000001', 0.2, estado_caso='APROBADO', decision_final='APROBADO')
+        self.reabierta = crear_evaluacion('0000000002', 0.6, estado_caso='RECHAZADO', decision_final='RECHAZADO')
+        self.pendiente = crear_evaluacion('0000000003', 0.5)
+        self.reciente = crear_evaluacion('0000000004', 0.1, estado_caso='APROBADO', decision_final='APROBADO')
+        CreditEvaluation.objects.exclude(pk=self.reciente.pk).update(created_at=hace_un_anio)
+
+    def test_revalida_estado_y_antiguedad_al_bloquear(self):
+        ids = [self.cerrada.pk, self.reabierta.pk, self.pendiente.pk, self.reciente.pk]
+        # Reabierto entre el listado y el bloqueo
+        CreditEvaluation.objects.filter(pk=self.reabierta.pk).update(estado_caso='OBSERVADO', decision_final=None)
+
+        self.assertEqual(archive_batch(ids, dias=180), 1)
+        self.assertEqual(list(CreditEvaluationArchive.objects.values_list('pk', flat=True)), [self.cerrada.pk])
+        self.assertEqual(
+            set(CreditEvaluation.objects.values_list('pk', flat=True)),
+            {self.reabierta.pk, self.pendiente.pk, self.reciente.pk},
+        )
+
+    def test_archive_evaluations(self):
+        self.assertEqual(archive_evaluations(dias=180, batch_size=1), 2)
+        self.assertEqual(
+            set(CreditEvaluationArchive.objects.values_list('pk', flat=True)),
+            {self.cerrada.pk, self.reabierta.pk},
+        )
+
+    def test_detalle_busca_en_el_archivo(self):
+        archive_batch([self.cerrada.pk], dias=180)
+        self.assertIsInstance(get_evaluation_or_404(self.cerrada.pk), CreditEvaluationArchive)
+        self.assertIsInstance(get_evaluation_or_404(self.pendiente.pk), CreditEvaluation)
+        with self.assertRaises(Http404):
+            get_evaluation_or_404(10**9)
+
+
+# =========================
+# EXPLICACIONES
+# =========================
+def datos_sinteticos(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(inference.model_columns)))
+    X[:, 3] = rng.integers(0, 2, size=n)
+    y = (X[:, 0] + X[:, 1] * X[:, 3] + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    return X, y
+
+
+class TreeShapTests(TestCase):
+    def assertAditivo(self, modelo, X):
+        X = X.astype(np.float32)
+        base, phi = explanations.explain_tree_ensemble(modelo, X)
+        np.testing.assert_allclose(base + phi.sum(axis=1), modelo.predict_proba(X)[:, 1], atol=1e-9)
+
+    def test_random_forest(self):
+        X, y = datos_sinteticos()
+        self.assertAditivo(RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y), X)
+
+    def test_arboles_poco_profundos_y_variables_repetidas(self):
+        X, y = datos_sinteticos()
+        self.assertAditivo(ExtraTreesClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X, y), X)
+        # Un árbol de una sola hoja solo aporta a la base
+        X1, y1 = X[:20], np.zeros(20, dtype=int)
+        y1[0] = 1
+        self.assertAditivo(RandomForestClassifier(n_estimators=3, max_depth=1, random_state=0).fit(X1, y1), X1)
+
+    def test_tablas_en_cache_por_backend(self):
+        X, y = datos_sinteticos()
+        backend = make_backend(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y),
+                               inference.model_columns)
+        tablas = explanations.tree_tables(backend)
+        self.assertIs(explanations.tree_tables(backend), tablas)
+
+        otro = make_backend(RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y),
+                            inference.model_columns)
+        self.assertIsNot(explanations.tree_tables(otro), tablas)
+
+        base, phi = explanations.explain_tree_ensemble(backend.estimador, X.astype(np.float32), tablas=tablas)
+        np.testing.assert_allclose(base + phi.sum(axis=1), backend.predict_proba(X.astype(np.float32)), atol=1e-9)
+
+    def test_bloques_pequenos(self):
+        X, y = datos_sinteticos()
+        modelo = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+        with mock.patch.object(explanations, 'MAX_BLOCK_ELEMENTS', 50), \
+                mock.patch.object(explanations, 'MAX_BLOCK_ROWS', 7):
+            self.assertAditivo(modelo, X)
+
+    def test_lineal(self):
+        X, y = datos_sinteticos()
+        modelo = LogisticRegression().fit(X, y)
+        base, phi = explanations.explain_linear(modelo, X)
+        np.testing.assert_allclose(base + phi.sum(axis=1), modelo.decision_function(X))
+
+    @skipIf(xgb is None, "xgboost no instalado")
+    def test_xgboost(self):
+        X, y = datos_sinteticos()
+        modelo = xgb.XGBClassifier(n_estimators=20, max_depth=3).fit(X, y)
+        base, phi = explanations.explain_xgboost(modelo, X)
+        logit = modelo.predict(X, output_margin=True)
+        np.testing.assert_allclose(base + phi.sum(axis=1), logit, atol=1e-4)
+
+
+class StoredContributionsTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('analista')
+        self.client.force_login(self.usuario)
+
+    def predecir(self, **extra):
+        datos = {**SOLICITANTE, 'monto_solicitado': 8000, 'plazo_meses': 24, **extra}
+        self.assertEqual(self.client.post(reverse('home'), datos).status_code, 200)
+        return CreditEvaluation.objects.latest('pk')
+
+    def test_prediccion_guarda_las_contribuciones(self):
+        e = self.predecir()
+        fila = {campo: getattr(e, campo) for campo in inference.INPUT_FIELDS}
+        base, contrib = explanations.explain(inference.encode(pd.DataFrame([fila])))
+        np.testing.assert_allclose(explanations.unpack_contributions(e.contribuciones), contrib[0], rtol=1e-6)
+        self.assertAlmostEqual(e.contribucion_base, base)
+        self.assertEqual(e.contribucion_unidad, explanations.contribution_units())
+
+        # Un modelo nuevo con otras unidades no cambia la etiqueta de lo guardado
+        with mock.patch.object(explanations, 'contribution_units', return_value='otra'):
+            self.assertEqual(explanations.stored_units(e), e.contribucion_unidad)
+
+    def test_detalle_solo_lee(self):
+        e = self.predecir()
+        with mock.patch.object(explanations, 'explain', side_effect=AssertionError("no debe explicar")):
+            respuesta = self.client.get(reverse('evaluacion_detalle', args=[e.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['unidad_contribucion'], e.contribucion_unidad)
+        self.assertTrue(respuesta.context['contribuciones'])
+
+        # Una fila antigua sin contribuciones se muestra sin ellas y no se escribe
+        antigua = crear_evaluacion('0000000001', 0.3)
+        with mock.patch.object(explanations, 'explain', side_effect=AssertionError("no debe explicar")):
+            respuesta = self.client.get(reverse('evaluacion_detalle', args=[antigua.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['contribuciones'], [])
+        self.assertIsNone(CreditEvaluation.objects.get(pk=antigua.pk).contribuciones)
+
+    def test_rescore_y_relleno_guardan_contribuciones(self):
+        antigua = crear_evaluacion('0000000001', 0.3)
+        self.assertEqual(explanations.explain_missing(CreditEvaluation), 1)
+        relleno = CreditEvaluation.objects.get(pk=antigua.pk)
+        self.assertIsNotNone(relleno.contribuciones)
+
+        # rescore reescribe las contribuciones de las filas cuya probabilidad cambia
+        CreditEvaluation.objects.filter(pk=antigua.pk).update(prob_riesgo=0.999, contribuciones=None)
+        rescore(n_workers=1)
+        reescrita = CreditEvaluation.objects.get(pk=antigua.pk)
+        self.assertEqual(reescrita.contribuciones, relleno.contribuciones)
+        self.assertEqual(reescrita.contribucion_unidad, explanations.contribution_units())
+
+
+# =========================
+# PRIORIDAD DE INFERENCIA
+# =========================
+def esperar(condicion, segundos=5):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        if time.monotonic() > limite:
+            raise AssertionError("Tiempo de espera agotado")
+        time.sleep(0.005)
+
+
+class SchedulerTests(TestCase):
+    def planificador(self, **extra):
+        datos = {'slots': 1, 'batch_slots': 1, 'max_batch_rows': 10**6, 'interactive_p99_ms': 10**6}
+        datos.update(extra)
+        return InferenceScheduler(**datos)
+
+    def en_hilo(self, planificador, clase, orden, liberar=None):
+        def trabajo():
+            with planificador.slot(clase):
+                orden.append(clase)
+                if liberar is not None:
+                    liberar.wait(5)
+        hilo = threading.Thread(target=trabajo)
+        hilo.start()
+        return hilo
+
+    def test_interactiva_pasa_antes_que_lote(self):
+        p = self.planificador()
+        orden, liberar = [], threading.Event()
+        ocupado = self.en_hilo(p, LOTE, orden, liberar)
+        esperar(lambda: orden == [LOTE])
+
+        lote = self.en_hilo(p, LOTE, orden)
+        esperar(lambda: p.metrics()[LOTE]['en_cola'] == 1)
+        interactiva = self.en_hilo(p, INTERACTIVA, orden)
+        esperar(lambda: p.metrics()[INTERACTIVA]['en_cola'] == 1)
+
+        liberar.set()
+        for hilo in (ocupado, lote, interactiva):
+            hilo.join(5)
+        self.assertEqual(orden, [LOTE, INTERACTIVA, LOTE])
+
+    def test_tope_de_turnos_de_lote(self):
+        p = self.planificador(slots=3, batch_slots=1)
+        orden, liberar = [], threading.Event()
+        hilos = [self.en_hilo(p, LOTE, orden, liberar)]
+        esperar(lambda: orden == [LOTE])
+
+        hilos.append(self.en_hilo(p, LOTE, orden, liberar))
+        esperar(lambda: p.metrics()[LOTE]['en_cola'] == 1)
+        # Quedan turnos libres, pero solo para trabajo interactivo
+        hilos.append(self.en_hilo(p, INTERACTIVA, orden))
+        hilos[-1].join(5)
+        self.assertEqual(orden, [LOTE, INTERACTIVA])
+        self.assertEqual(p.metrics()[LOTE]['en_ejecucion'], 1)
+
+        liberar.set()
+        for hilo in hilos:
+            hilo.join(5)
+        self.assertEqual(orden, [LOTE, INTERACTIVA, LOTE])
+
+    def test_admision_por_filas_y_latencia(self):
+        p = self.planificador(max_batch_rows=100)
+        with p.admit_batch(80):
+            with self.assertRaises(Overloaded):
+                with p.admit_batch(30):
+                    pass
+            with p.admit_batch(20):
+                self.assertEqual(p.metrics()['filas_lote_admitidas'], 100)
+        self.assertEqual(p.metrics()['filas_lote_admitidas'], 0)
+
+        lento = self.planificador(interactive_p99_ms=0)
+        for _ in range(20):
+            with lento.slot(INTERACTIVA):
+                time.sleep(0.001)
+        with self.assertRaises(Overloaded):
+            with lento.admit_batch(1):
+                pass
+        self.assertEqual(lento.metrics()[LOTE]['rechazadas'], 1)
+
+    def test_lote_rechazado_responde_503(self):
+        self.client.force_login(User.objects.create_user('analista'))
+        df = generate_applicants(10, seed=0)[inference.INPUT_FIELDS]
+        archivo = SimpleUploadedFile('lote.csv', df.to_csv(index=False).encode())
+        with mock.patch.object(views, 'scheduler', self.planificador(max_batch_rows=5)):
+            respuesta = self.client.post(reverse('batch_predict'), {'file': archivo})
+        self.assertEqual(respuesta.status_code, 503)
+
+    def test_score_frame_por_bloques(self):
+        df = generate_applicants(53, seed=2)[inference.INPUT_FIELDS]
+        p = self.planificador()
+        np.testing.assert_allclose(
+            score_frame(df, chunk_rows=10, planificador=p),
+            inference.predict_proba(inference.encode(df)),
+        )
+        self.assertEqual(p.metrics()[LOTE]['completadas'], 6)
+
+
+# =========================
+# VALIDACIÓN CRUZADA
+# =========================
+class ModelValidationTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = (rng.random(500) < 0.3).astype(int)
+
+    def test_kfold_estratificado(self):
+        asignacion = fold_assignments(self.y, 'kfold', n_splits=5)
+        self.assertEqual(asignacion.shape, (1, 500))
+        self.assertEqual(np.bincount(asignacion[0]).tolist(), [100] * 5)
+        tasas = [self.y[asignacion[0] == k].mean() for k in range(5)]
+        self.assertLess(max(tasas) - min(tasas), 0.02)
+
+    def test_repetido(self):
+        asignacion = fold_assignments(self.y, 'repetido', n_splits=5, n_repeats=3)
+        self.assertEqual(asignacion.shape, (3, 500))
+        for fila in asignacion:
+            self.assertEqual(np.bincount(fila).tolist(), [100] * 5)
+        # Cada repetición es una partición distinta
+        self.assertFalse(np.array_equal(asignacion[0], asignacion[1]))
+        self.assertEqual(len(_tareas(asignacion, 'repetido', ['logistica'])), 15)
+
+    def test_temporal_sin_filas_futuras_en_entrenamiento(self):
+        dias = np.datetime64('2020-01-01') + np.arange(500)
+        fechas = np.random.default_rng(1).permutation(dias)
+        asignacion = fold_assignments(self.y, 'temporal', n_splits=4, fechas=fechas)[0]
+        self.assertEqual(sorted(set(asignacion.tolist())), [0, 1, 2, 3, 4])
+
+        tareas = _tareas(asignacion[np.newaxis], 'temporal', ['logistica'])
+        self.assertEqual([fold for _, _, fold in tareas], [1, 2, 3, 4])
+        for _, _, fold in tareas:
+            entrenamiento, validacion = fechas[asignacion < fold], fechas[asignacion == fold]
+            self.assertLess(entrenamiento.max(), validacion.min())
+
+        with self.assertRaises(ValueError):
+            fold_assignments(self.y, 'temporal')
+        with self.assertRaises(ValueError):
+            fold_assignments(self.y, 'otro')
+
+    def test_bandas_por_clase(self):
+        y_prob = np.array([0.1, 0.39, 0.40, 0.69, 0.70, 0.95])
+        y_true = np.array([0, 1, 0, 0, 1, 1])
+        self.assertEqual(band_confusion(y_true, y_prob).tolist(), [[1, 1], [2, 0], [0, 2]])
+
+    def test_calibracion(self):
+        y_prob = np.array([0.05, 0.15, 0.12, 0.95, 1.0])
+        y_true = np.array([0, 1, 0, 1, 1])
+        tabla = calibration_table(y_true, y_prob, bins=10)
+        self.assertEqual(tabla['conteo'], [1, 2, 0, 0, 0, 0, 0, 0, 0, 2])
+        self.assertEqual(tabla['prob_media'][:3], [0.05, 0.135, None])
+        self.assertEqual(tabla['tasa_real'][:3], [0.0, 0.5, None])
+        self.assertEqual(tabla['prob_media'][9], 0.975)
+        # |0.05 - 0| + 2 * |0.135 - 0.5| + 2 * |0.975 - 1| sobre 5 filas
+        self.assertAlmostEqual(tabla['ece'], round((0.05 + 2 * 0.365 + 2 * 0.025) / 5, 4))
+
+
+# =========================
+# WHAT-IF
+# =========================
+SOLICITANTE = {
+    'edad': 45, 'estado_civil': 'Casado', 'ingreso_mensual': 3000, 'ventas_anuales': 60000,
+    'dias_mora_prom': 0, 'garantia': 'Hipotecaria', 'tiene_garante': True,
+    'propiedad_completa': True, 'estado_legal': True,
+}
+
+
+class WhatIfTests(TestCase):
+    def test_superficie_igual_a_puntuar_cada_celda(self):
+        montos, plazos, garantias = amount_grid(1000, 40000, 4), [12, 36, 60], ['Personal', 'Hipotecaria']
+        analisis = score_grid(SOLICITANTE, montos, plazos, garantias)
+
+        for g, garantia in enumerate(garantias):
+            for i, monto in enumerate(montos):
+                for j, plazo in enumerate(plazos):
+                    fila = {**SOLICITANTE, 'garantia': garantia, 'monto_solicitado': monto, 'plazo_meses': plazo}
+                    prob = inference.predict_proba(inference.encode(pd.DataFrame([fila])))[0]
+                    self.assertAlmostEqual(analisis['superficie'][g][i][j], round(prob, 4), places=4)
+                    self.assertEqual(analisis['bandas'][g][i][j], risk_band(prob))
+
+    def test_orden_de_las_mejores_ofertas(self):
+        montos, plazos, garantias = [1000, 2000, 3000], [12, 24, 36], ['Personal', 'Hipotecaria']
+        columnas = {c: i for i, c in enumerate(inference.model_columns)}
+
+        def riesgo(X):
+            # Sube con el monto y el plazo; la garantía hipotecaria lo baja
+            return (X[:, columnas['monto_solicitado']] / 10000 + X[:, columnas['plazo_meses']] / 1000
+                    - 0.05 * X[:, columnas['garantia_Hipotecaria']] + 0.05)
+
+        with mock.patch.object(inference, 'predict_proba', side_effect=riesgo):
+            ofertas = score_grid(SOLICITANTE, montos, plazos, garantias, max_ofertas=4)['ofertas']
+
+        celdas = []
+        for garantia in garantias:
+            for monto in montos:
+                for plazo in plazos:
+                    prob = monto / 10000 + plazo / 1000 - 0.05 * (garantia == 'Hipotecaria') + 0.05
+                    if prob < UMBRAL_RIESGO_MEDIO:
+                        celdas.append((-monto, plazo, round(prob, 4), garantia))
+        esperado = [(g, float(-m), p, prob) for m, p, prob, g in sorted(celdas)[:4]]
+        self.assertEqual(
+            [(o['garantia'], o['monto_solicitado'], o['plazo_meses'], o['prob_riesgo']) for o in ofertas],
+            esperado,
+        )
+
+    def test_endpoint_json_sin_guardar_evaluaciones(self):
+        self.client.force_login(User.objects.create_user('analista'))
+        datos = {
+            **SOLICITANTE, 'monto_min': 1000, 'monto_max': 20000, 'monto_pasos': 5,
+            'plazos': [12, 24], 'garantias': ['Personal', 'Prendaria'],
+        }
+        url = reverse('whatif')
+
+        respuesta = self.client.post(f'{url}?format=json', datos)
+        self.assertEqual(respuesta.status_code, 200)
+        analisis = respuesta.json()
+        self.assertEqual(analisis['plazos'], [12, 24])
+        self.assertEqual(analisis['garantias'], ['Personal', 'Prendaria'])
+        self.assertEqual(len(analisis['superficie'][0]), 5)
+
+        self.assertEqual(self.client.post(url, datos).status_code, 200)
+        invalido = self.client.post(f'{url}?format=json', {**datos, 'monto_min': 30000})
+        self.assertEqual(invalido.status_code, 400)
+        self.assertIn('errores', invalido.json())
+
+        self.assertFalse(CreditEvaluation.objects.exists())
+        self.assertFalse(ApplicantHistory.objects.exists())
+
+
+# =========================
+# PRESUPUESTO DE HILOS
+# =========================
+class ThreadBudgetTests(TestCase):
+    def hilos_nativos(self):
+        return [pool['num_threads'] for pool in threadpool_info()]
+
+    def test_bloques_concurrentes_que_salen_en_otro_orden(self):
+        antes = self.hilos_nativos()
+        dentro = [threading.Event(), threading.Event()]
+        salir = [threading.Event(), threading.Event()]
+        salio = [threading.Event(), threading.Event()]
+
+        def bloque(i, hilos):
+            with inference.thread_budget(hilos):
+                dentro[i].set()
+                salir[i].wait(5)
+            salio[i].set()
+
+        hilos = [threading.Thread(target=bloque, args=(0, 3)), threading.Thread(target=bloque, args=(1, 2))]
+        for h in hilos:
+            h.start()
+        for evento in dentro:
+            evento.wait(5)
+        self.assertEqual(inference._budget_state['hilos'], 3)
+
+        # El primero en entrar sale primero: rige el presupuesto del que sigue
+        salir[0].set()
+        salio[0].wait(5)
+        self.assertEqual(inference._budget_state['hilos'], 2)
+
+        salir[1].set()
+        for h in hilos:
+            h.join(5)
+        self.assertIsNone(inference._budget_state['hilos'])
+        self.assertEqual(self.hilos_nativos(), antes)
+
+    def test_sin_limite(self):
+        antes = self.hilos_nativos()
+        with inference.thread_budget(0):
+            self.assertIsNone(inference._budget_state['hilos'])
+        self.assertEqual(self.hilos_nativos(), antes)
+
+
+# =========================
+# COLA DE REVISIÓN
+# =========================
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.beto = User.objects.create_user('beto')
+        self.casos = [crear_evaluacion(f'00000000{i:02d}', 0.5) for i in range(3)]
+
+    def test_reserva_vigente_y_vencida(self):
+        caso = claim_next_case(self.ana)
+        self.assertEqual(caso.pk, self.casos[0].pk)
+        self.assertEqual(lease_holder(caso, self.beto), self.ana)
+        # Mientras la reserva está vigente, otro analista recibe el siguiente
+        self.assertEqual(claim_next_case(self.beto).pk, self.casos[1].pk)
+
+        CreditEvaluation.objects.filter(pk=caso.pk).update(asignado_hasta=timezone.now() - timedelta(seconds=1))
+        caso.refresh_from_db()
+        self.assertIsNone(lease_holder(caso, self.beto))
+
+        # Vencida, el caso vuelve a la cola en su lugar
+        carla = User.objects.create_user('carla')
+        self.assertEqual(claim_next_case(carla).pk, self.casos[0].pk)
+        self.assertEqual(CreditEvaluation.objects.get(pk=caso.pk).asignado_a, carla)
+
+    def test_renovar_reserva_propia(self):
+        caso = claim_next_case(self.ana, minutos=1)
+        renovado = claim_next_case(self.ana, minutos=30)
+        self.assertEqual(renovado.pk, caso.pk)
+        self.assertGreater(renovado.asignado_hasta, caso.asignado_hasta)
+
+    def test_renovacion_no_pisa_una_reserva_ajena(self):
+        caso = claim_next_case(self.ana)
+        original = review_queue.claimed_case
+
+        def reserva_perdida(user):
+            # Entre la lectura y la renovación, la reserva de Ana vence y Beto la toma
+            propio = original(user)
+            CreditEvaluation.objects.filter(pk=caso.pk).update(
+                asignado_a=self.beto, asignado_hasta=timezone.now() + timedelta(minutes=5),
+            )
+            return propio
+
+        limite_beto = timezone.now() + timedelta(minutes=5)
+        with mock.patch.object(review_queue, 'claimed_case', side_effect=reserva_perdida):
+            siguiente = claim_next_case(self.ana, minutos=30)
+
+        self.assertEqual(siguiente.pk, self.casos[1].pk)
+        beto = CreditEvaluation.objects.get(pk=caso.pk)
+        self.assertEqual(beto.asignado_a, self.beto)
+        self.assertLess(beto.asignado_hasta, limite_beto + timedelta(minutes=1))
+
+    def test_renovacion_de_un_caso_ya_decidido(self):
+        caso = claim_next_case(self.ana)
+        original = review_queue.claimed_case
+
+        def decidido(user):
+            propio = original(user)
+            CreditEvaluation.objects.filter(pk=caso.pk).update(estado_caso='APROBADO', decision_final='APROBADO')
+            return propio
+
+        with mock.patch.object(review_queue, 'claimed_case', side_effect=decidido):
+            siguiente = claim_next_case(self.ana)
+        self.assertEqual(siguiente.pk, self.casos[1].pk)
+
+    def test_carrera_entre_dos_analistas(self):
+        """
+        Beto lee el mismo caso libre que Ana, pero Ana lo reserva antes de que
+        llegue el UPDATE condicional de Beto: Beto no lo pisa y toma el siguiente.
+        """
+        original = review_queue.pending_cases
+        llamadas = []
+
+        def pendientes_con_carrera():
+            llamadas.append(1)
+            # 1: claimed_case, 2: SELECT del candidato, 3: UPDATE condicional
+            if len(llamadas) == 3:
+                CreditEvaluation.objects.filter(pk=self.casos[0].pk).update(
+                    asignado_a=self.ana, asignado_hasta=timezone.now() + timedelta(minutes=15),
+                )
+            return original()
+
+        with mock.patch.object(review_queue, 'pending_cases', side_effect=pendientes_con_carrera):
+            caso = claim_next_case(self.beto)
+
+        # El UPDATE del primer intento no tocó filas: hubo un segundo intento
+        self.assertEqual(len(llamadas), 5)
+        self.assertEqual(caso.pk, self.casos[1].pk)
+        self.assertEqual(CreditEvaluation.objects.get(pk=self.casos[0].pk).asignado_a, self.ana)
+        self.assertEqual(CreditEvaluation.objects.get(pk=self.casos[1].pk).asignado_a, self.beto)
+
+    def test_decision_en_bloque_respeta_reservas(self):
+        claim_next_case(self.ana)
+        total = bulk_decide([c.pk for c in self.casos], 'APROBADO', self.beto)
+        self.assertEqual(total, 2)
+        self.assertEqual(CreditEvaluation.objects.get(pk=self.casos[0].pk).estado_caso, 'PENDIENTE')
+
+
+# =========================
+# ACTUALIZACIÓN INCREMENTAL
+# =========================
+@override_settings(CREDIT_REFRESH_HOLDOUT_MOD=5, CREDIT_REFRESH_MIN_ROWS=10, CREDIT_REFRESH_MAX_AUC_DROP=0.01)
+class RefreshTests(TestCase):
+    def setUp(self):
+        # Artefactos del modelo en un directorio temporal: las pruebas publican versiones
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        directorio = os.path.join(temporal.name, 'ml_models')
+        shutil.copytree(inference.MODEL_DIR, directorio, ignore=shutil.ignore_patterns('versions', 'version.json'))
+        rutas = {
+            nombre: os.path.join(directorio, os.path.basename(getattr(inference, nombre)))
+            for nombre in ('MODEL_PATH', 'XGB_MODEL_PATH', 'SCALER_PATH', 'FEATURES_PATH', 'VERSION_PATH')
+        }
+        rutas['VERSIONS_DIR'] = os.path.join(directorio, 'versions')
+        for nombre, ruta in rutas.items():
+            parche = mock.patch.object(inference, nombre, ruta)
+            parche.start()
+            self.addCleanup(parche.stop)
+        for parche in (
+            mock.patch.object(refresh, 'ARTEFACTOS', tuple(rutas[n] for n in (
+                'MODEL_PATH', 'XGB_MODEL_PATH', 'SCALER_PATH', 'FEATURES_PATH'))),
+            mock.patch.object(refresh, 'reference_holdout', return_value=None),
+            mock.patch.object(inference, 'model_version', 'base'),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+        # Decisiones que siguen al modelo activo: rechazado si la probabilidad es alta
+        df = generate_applicants(200, seed=3)[inference.INPUT_FIELDS]
+        probs = inference.predict_proba(inference.encode(df))
+        decisiones = np.where(probs > np.median(probs), 'RECHAZADO', 'APROBADO')
+        inicio = timezone.now() - timedelta(days=1)
+        for i, (fila, decision) in enumerate(zip(df.to_dict('records'), decisiones)):
+            e = crear_evaluacion(f'{i:010d}', float(probs[i]), estado_caso=decision, decision_final=decision, **fila)
+            CreditEvaluation.objects.filter(pk=e.pk).update(updated_at=inicio + timedelta(seconds=i))
+        self.evaluaciones = list(CreditEvaluation.objects.order_by('updated_at', 'pk').values('pk', 'updated_at'))
+
+    def test_marca_de_agua_y_holdout_por_pk(self):
+        marca = self.evaluaciones[99]
+        X, y, (marca_at, marca_id) = new_decisions(marca['updated_at'], marca['pk'])
+
+        posteriores = [e['pk'] for e in self.evaluaciones[100:]]
+        self.assertEqual(len(y), sum(1 for pk in posteriores if pk % 5))
+        self.assertEqual(marca_id, max(pk for pk in posteriores if pk % 5))
+        self.assertEqual(len(new_decisions()[1]), sum(1 for e in self.evaluaciones if e['pk'] % 5))
+        # Sin filas nuevas la marca no se mueve
+        self.assertEqual(new_decisions(marca_at, marca_id)[2], (marca_at, marca_id))
+
+        X_holdout, y_holdout = decision_holdout()
+        self.assertEqual(len(y_holdout), sum(1 for e in self.evaluaciones if e['pk'] % 5 == 0))
+
+    def test_publica_si_el_holdout_no_empeora(self):
+        with open(inference.MODEL_PATH, 'rb') as f:
+            original = f.read()
+
+        registro = refresh_model()
+
+        self.assertTrue(registro.publicado, registro.motivo)
+        self.assertEqual(inference.read_model_version(), registro.version)
+        self.assertTrue(os.path.isdir(os.path.join(inference.VERSIONS_DIR, registro.version)))
+        self.assertEqual(registro.watermark_id, max(e['pk'] for e in self.evaluaciones if e['pk'] % 5))
+        self.assertTrue(ModelVersion.objects.filter(version=registro.version, publicado=True).exists())
+
+        # Rollback a la versión anterior (guardada al publicar)
+        activate_version('base')
+        self.assertEqual(inference.read_model_version(), 'base')
+        with open(inference.MODEL_PATH, 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+    def test_rechaza_si_el_auc_cae(self):
+        def invertir(estimador, X, y):
+            candidato = copy.deepcopy(estimador)
+            candidato.coef_ = -candidato.coef_
+            candidato.intercept_ = -candidato.intercept_
+            return candidato
+
+        with mock.patch.object(refresh, 'incremental_update', side_effect=invertir):
+            registro = refresh_model()
+
+        self.assertFalse(registro.publicado)
+        self.assertIn('AUC decisiones', registro.motivo)
+        self.assertEqual(inference.read_model_version(), 'base')
+        self.assertFalse(os.path.exists(inference.VERSIONS_DIR))
+
+    def test_dos_versiones_en_el_mismo_segundo(self):
+        instante = timezone.now()
+        with mock.patch.object(refresh.timezone, 'now', return_value=instante):
+            primera = new_version_name()
+            os.makedirs(os.path.join(inference.VERSIONS_DIR, primera))
+            segunda = new_version_name()
+            ModelVersion.objects.create(version=segunda, tipo_modelo='LogisticRegression', version_anterior='base')
+            tercera = new_version_name()
+        self.assertEqual([segunda, tercera], [f'{primera}-2', f'{primera}-3'])
+
+
+@skipIf(xgb is None, "xgboost no instalado")
+class XGBoostRefreshTests(TestCase):
+    def test_arboles_nuevos_con_los_parametros_del_modelo(self):
+        X, y = datos_sinteticos()
+        modelo = xgb.XGBClassifier(n_estimators=5, max_depth=2, learning_rate=0.05, tree_method='hist', n_jobs=1)
+        modelo.fit(X, y)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            save_model(modelo, directorio)
+            cargado = load_backend(directorio, inference.model_columns).estimador
+
+        candidato = incremental_update(cargado, X, y)
+        entrenamiento = json.loads(candidato.save_config())['learner']['gradient_booster']['tree_train_param']
+        self.assertAlmostEqual(float(entrenamiento['eta']), 0.05, places=6)
+        self.assertEqual(int(entrenamiento['max_depth']), 2)
+        # Se conservan para la siguiente actualización
+        self.assertEqual(json.loads(candidato.attr('parametros_entrenamiento'))['max_depth'], 2)
+
+
+# =========================
+# CARGA MASIVA EN PARALELO
+# =========================
+class ShardedUploadTests(TestCase):
+    def setUp(self):
+        self.df = generate_applicants(120, seed=1)[inference.INPUT_FIELDS].reset_index(drop=True)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def puntuar(self, nombre, escribir):
+        ruta = os.path.join(self.directorio.name, nombre)
+        escribir(ruta)
+        salida = os.path.join(self.directorio.name, f'{nombre}.out.csv')
+        score_file(ruta, salida, n_workers=1, filas_por_fragmento=25)
+        return salida
+
+    def test_fragmentos_csv_con_los_mismos_tipos(self):
+        # Enteros en las primeras filas y decimales al final: sin tipos fijos
+        # cada fragmento inferiría un tipo distinto para la misma columna
+        df = self.df.copy()
+        df['ingreso_mensual'] = df['ingreso_mensual'].round().astype(int).astype(object)
+        df.loc[100:, 'ingreso_mensual'] = df.loc[100:, 'ingreso_mensual'] + 0.5
+        df['referencia'] = [f'{i:04d}' for i in range(len(df))]
+        salida = self.puntuar('lote.csv', lambda ruta: df.to_csv(ruta, index=False))
+
+        with open(salida, encoding='utf-8') as f:
+            resultado = pd.read_csv(f, dtype=str)
+        self.assertEqual(resultado['ingreso_mensual'].tolist(), df['ingreso_mensual'].astype(str).tolist())
+        self.assertEqual(resultado['referencia'].tolist(), df['referencia'].tolist())
+
+    def test_xlsx_se_convierte_una_vez(self):
+        esperado = pd.read_csv(self.puntuar('lote.csv', lambda ruta: self.df.to_csv(ruta, index=False)))
+        with mock.patch('openpyxl.load_workbook', wraps=__import__('openpyxl').load_workbook) as abrir:
+            salida = self.puntuar('lote.xlsx', lambda ruta: self.df.to_excel(ruta, index=False))
+        # Una apertura para planificar y otra para convertir, no una por fragmento
+        self.assertEqual(abrir.call_count, 2)
+        np.testing.assert_allclose(pd.read_csv(salida)['Probabilidad_Impago'], esperado['Probabilidad_Impago'])
+
+    def test_parquet_en_el_proceso_web(self):
+        usuario = User.objects.create_user('analista')
+        self.client.force_login(usuario)
+        contenido = io.BytesIO()
+        self.df.to_parquet(contenido, index=False)
+        archivo = SimpleUploadedFile('lote.parquet', contenido.getvalue())
+
+        with override_settings(CREDIT_BATCH_WORKERS=1):
+            respuesta = self.client.post(reverse('batch_predict'), {'file': archivo})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['results']), len(self.df))
+
+    def test_fragmentos_con_turno_de_lote_y_pool_compartido(self):
+        n = 300
+        df = generate_applicants(n, seed=0)[inference.INPUT_FIELDS]
+        esperado = np.round(inference.predict_proba(inference.encode(df)) * 100, 2)
+
+        planificador = InferenceScheduler(slots=3, batch_slots=2, max_batch_rows=10**6, interactive_p99_ms=10**6)
+        turnos, en_curso, maximo = [], [0], [0]
+        acquire, release = planificador.acquire, planificador.release
+
+        def reservar(clase):
+            turno = acquire(clase)
+            turnos.append(clase)
+            en_curso[0] += 1
+            maximo[0] = max(maximo[0], en_curso[0])
+            return turno
+
+        def liberar(turno):
+            en_curso[0] -= 1
+            release(turno)
+
+        contenido = df.to_csv(index=False).encode()
+        with override_settings(CREDIT_BATCH_WORKERS=4, CREDIT_BATCH_SHARD_ROWS=50), \
+                mock.patch.object(views, 'scheduler', planificador), \
+                mock.patch.object(planificador, 'acquire', reservar), \
+                mock.patch.object(planificador, 'release', liberar), \
+                mock.patch.object(parallel, '_nuevo_pool', wraps=parallel._nuevo_pool) as nuevo_pool:
+            resultado, total = views._score_upload_sharded(SimpleUploadedFile('lote.csv', contenido), n)
+            views._score_upload_sharded(SimpleUploadedFile('lote.csv', contenido), n)
+
+        self.assertEqual(total, n)
+        np.testing.assert_allclose(resultado['Probabilidad_Impago'], esperado)
+        # Un turno de lote por fragmento, nunca más fragmentos en curso que turnos de lote
+        self.assertEqual(turnos, ['lote'] * 12)
+        self.assertLessEqual(maximo[0], 2)
+        self.assertEqual(planificador.metrics()['lote']['en_ejecucion'], 0)
+        # Las dos cargas usan el mismo pool de min(workers, turnos de lote) procesos
+        self.assertLessEqual(nuevo_pool.call_count, 1)
+        self.assertIn(2, parallel._pools)
+
+
+# =========================
+# DATOS DE PRUEBA A ESCALA
+# =========================
+class SeedEvaluationsTests(TestCase):
+    def test_probabilidades_reproducibles_con_rescore(self):
+        seed_evaluations(500, batch_size=200)
+        run = rescore(dry_run=True, n_workers=1)
+        self.assertEqual((run.filas, run.actualizadas), (500, 0))
+
+    def test_contribuciones_como_al_puntuar(self):
+        seed_evaluations(50, batch_size=20)
+        self.assertFalse(CreditEvaluation.objects.filter(contribuciones__isnull=True).exists())
+        e = CreditEvaluation.objects.order_by('?').first()
+        fila = {campo: getattr(e, campo) for campo in inference.INPUT_FIELDS}
+        base, contrib = explanations.explain(inference.encode(pd.DataFrame([fila])))
+        np.testing.assert_allclose(explanations.unpack_contributions(e.contribuciones), contrib[0], rtol=1e-5)
+        self.assertEqual(e.contribucion_unidad, explanations.contribution_units())
+
+        CreditEvaluation.objects.all().delete()
+        seed_evaluations(20, contribuciones=False, historial=False)
+        self.assertEqual(CreditEvaluation.objects.filter(contribuciones__isnull=True).count(), 20)
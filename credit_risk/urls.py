@@ -4,8 +4,13 @@ from . import views
 urlpatterns = [
     path('', views.predict_view, name='home'),
     path('batch/', views.batch_predict_view, name='batch_predict'),
+    path('whatif/', views.whatif_view, name='whatif'),
     path('historial/', views.historial_view, name='historial'),
+    path('cola/', views.review_queue_view, name='cola_revision'),
+    path('cola/siguiente/', views.review_next_view, name='cola_siguiente'),
     path('evaluacion/<int:pk>/', views.evaluation_detail_view, name='evaluacion_detalle'),
     path('evaluacion/<int:pk>/editar/', views.evaluation_update_view, name='evaluacion_editar'),
+    path('api/cliente/<str:cedula>/', views.applicant_history_api, name='api_historial_cliente'),
+    path('api/inferencia/metricas/', views.scheduler_metrics_api, name='api_metricas_inferencia'),
 
 ]
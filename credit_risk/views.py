@@ -1,32 +1,38 @@
 import os
-import json
-import joblib
+import tempfile
+
 import pandas as pd
-import numpy as np
 
 from django.conf import settings
-from django.shortcuts import render
+from django.db import transaction
+from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.http import JsonResponse
 
-from .forms import CreditForm, FileUploadForm
+from .applicant_history import get_applicant_history
+from .explanations import contribution_values, stored_units, top_contributions
+from .forms import CreditForm, FileUploadForm, WhatIfForm
+from .inference import INPUT_FIELDS, encode, predict_labels, predict_proba
 from .models import CreditEvaluation
+from .parallel import shared_pool
+from .scheduler import INTERACTIVA, LOTE, Overloaded, scheduler, score_frame
+from .scoring import risk_band
+from .sharding import (
+    add_result_columns, plan_shards, read_table, score_file, shard_format, upload_format,
+)
+from .whatif import amount_grid, score_grid
 
 
-# =========================
-# CARGA DE MODELO AL INICIAR
-# =========================
-MODEL_PATH = os.path.join(settings.BASE_DIR, 'credit_risk', 'ml_models', 'modelo_riesgo.pkl')
-SCALER_PATH = os.path.join(settings.BASE_DIR, 'credit_risk', 'ml_models', 'scaler.pkl')
-FEATURES_PATH = os.path.join(settings.BASE_DIR, 'credit_risk', 'ml_models', 'features.json')
-
-modelo = joblib.load(MODEL_PATH)
-scaler = joblib.load(SCALER_PATH) if os.path.exists(SCALER_PATH) else None
-
-with open(FEATURES_PATH, 'r', encoding='utf-8') as f:
-    model_columns = json.load(f)
+# Texto del resultado por banda (umbrales en scoring.py)
+RESULTADOS = {
+    'ALTO': "RIESGO ALTO (Rechazar / Revisar estrictamente)",
+    'MEDIO': "RIESGO MEDIO (Revisión manual)",
+    'BAJO': "RIESGO BAJO (Aprobar)",
+}
 
 
 # =========================
@@ -40,57 +46,6 @@ class CustomLoginView(LoginView):
         return reverse_lazy('home')
 
 
-# =========================
-# UTIL: ARMAR INPUT DEL MODELO
-# =========================
-def build_model_input(data: dict) -> pd.DataFrame:
-    df_input = pd.DataFrame(0, index=[0], columns=model_columns)
-
-    # Numéricas
-    cols_num = ['dias_mora_prom', 'edad', 'ingreso_mensual', 'ventas_anuales', 'monto_solicitado', 'plazo_meses']
-    for col in cols_num:
-        if col in df_input.columns:
-            df_input[col] = float(data.get(col, 0) or 0)
-
-    # Booleanas
-    bool_map = {
-        'tiene_garante': data.get('tiene_garante', False),
-        'propiedad_completa': data.get('propiedad_completa', False),
-        'estado_legal': data.get('estado_legal', False),
-        'rastreo_instalado': data.get('rastreo_instalado', 0),
-    }
-    for col, val in bool_map.items():
-        if col in df_input.columns:
-            df_input[col] = 1 if val else 0
-
-    # Estado civil (one-hot)
-    estado_civil = data.get('estado_civil')
-    if estado_civil:
-        key_direct = f"estado_civil_{estado_civil}"
-        if key_direct in df_input.columns:
-            df_input[key_direct] = 1
-        else:
-            map_ec = {'UnionLibre': 'Unión Libre'}
-            estado_civil_norm = map_ec.get(estado_civil, estado_civil)
-            key_norm = f"estado_civil_{estado_civil_norm}"
-            if key_norm in df_input.columns:
-                df_input[key_norm] = 1
-
-    # Garantía (one-hot)
-    garantia = data.get('garantia')
-    if garantia:
-        key = f"garantia_{garantia}"
-        if key in df_input.columns:
-            df_input[key] = 1
-
-    # Escalado (si aplica)
-    if scaler is not None:
-        df_scaled = scaler.transform(df_input)
-        df_input = pd.DataFrame(df_scaled, index=df_input.index, columns=df_input.columns)
-
-    return df_input
-
-
 # =========================
 # VISTA PRINCIPAL: PREDICCIÓN
 # =========================
@@ -98,27 +53,27 @@ def build_model_input(data: dict) -> pd.DataFrame:
 def predict_view(request):
     resultado = None
     probabilidad = None
+    historial_cliente = None
 
     if request.method == 'POST':
         form = CreditForm(request.POST)
         if form.is_valid():
             data = form.cleaned_data
+            cedula = data.get('cliente_cedula') or None
 
-            df_input = build_model_input(data)
+            # Resumen de evaluaciones previas (antes de registrar la actual)
+            historial_cliente = get_applicant_history(cedula)
 
-            pred = int(modelo.predict(df_input)[0])
-            prob = float(modelo.predict_proba(df_input)[0][1])
+            with scheduler.slot(INTERACTIVA):
+                X = encode(pd.DataFrame([data]))
+                prob = float(predict_proba(X)[0])
+                pred = int(predict_labels([prob])[0])
+                # Se guardan con la evaluación; el detalle solo las lee
+                contribuciones, base, unidad = contribution_values(X)
             probabilidad = round(prob * 100, 2)
 
-            if prob >= 0.70:
-                recomendacion = "ALTO"
-                resultado = "RIESGO ALTO (Rechazar / Revisar estrictamente)"
-            elif prob >= 0.40:
-                recomendacion = "MEDIO"
-                resultado = "RIESGO MEDIO (Revisión manual)"
-            else:
-                recomendacion = "BAJO"
-                resultado = "RIESGO BAJO (Aprobar)"
+            recomendacion = risk_band(prob)
+            resultado = RESULTADOS[recomendacion]
 
             # Guardar evaluación en BD
             CreditEvaluation.objects.create(
@@ -136,7 +91,13 @@ def predict_view(request):
                 estado_legal=bool(data.get('estado_legal', False)),
                 prob_riesgo=prob,
                 prediccion=pred,
-                recomendacion=recomendacion
+                recomendacion=recomendacion,
+                contribuciones=contribuciones[0],
+                contribucion_base=base,
+                contribucion_unidad=unidad,
+                cliente_cedula=cedula,
+                cliente_nombres=data.get('cliente_nombres') or None,
+                cliente_apellidos=data.get('cliente_apellidos') or None,
             )
         else:
             messages.error(request, "Formulario inválido. Revisa los datos ingresados.")
@@ -146,13 +107,94 @@ def predict_view(request):
     return render(request, 'credit_risk/home.html', {
         'form': form,
         'resultado': resultado,
-        'probabilidad': probabilidad
+        'probabilidad': probabilidad,
+        'historial_cliente': historial_cliente,
+    })
+
+
+# =========================
+# WHAT-IF: GRILLA DE MONTOS x PLAZOS
+# =========================
+@login_required
+def whatif_view(request):
+    analisis = None
+
+    if request.method == 'POST':
+        form = WhatIfForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            with scheduler.slot(INTERACTIVA):
+                analisis = score_grid(
+                    data,
+                    montos=amount_grid(data['monto_min'], data['monto_max'], data['monto_pasos']),
+                    plazos=data['plazos'],
+                    garantias=data['garantias'] or None,
+                )
+            if request.GET.get('format') == 'json':
+                return JsonResponse(analisis)
+        else:
+            if request.GET.get('format') == 'json':
+                return JsonResponse({'errores': form.errors}, status=400)
+            messages.error(request, "Formulario inválido. Revisa los datos ingresados.")
+    else:
+        form = WhatIfForm()
+
+    # Filas de la tabla: (monto, [(prob %, banda), ...]) por cada garantía
+    superficies = None
+    if analisis:
+        superficies = [
+            {
+                'garantia': garantia,
+                'filas': [
+                    (monto, [(round(p * 100, 1), b) for p, b in zip(probs, bandas)])
+                    for monto, probs, bandas in zip(analisis['montos'], capa, capa_bandas)
+                ],
+            }
+            for garantia, capa, capa_bandas in zip(
+                analisis['garantias'], analisis['superficie'], analisis['bandas']
+            )
+        ]
+
+    return render(request, 'credit_risk/whatif.html', {
+        'form': form,
+        'analisis': analisis,
+        'superficies': superficies,
     })
 
 
 # =========================
 # PREDICCIÓN POR LOTES
 # =========================
+def _score_upload_sharded(file, limite):
+    """
+    Guarda el archivo subido en disco y lo puntúa con sharding.score_file en
+    el pool compartido (a lo sumo CREDIT_BATCH_WORKERS procesos y no más que
+    los turnos de lote). Cada fragmento ocupa
+    un turno de lote mientras se puntúa, así que nunca hay más fragmentos en
+    curso que turnos de lote libres y las predicciones individuales pasan
+    primero. Devuelve (primeras `limite` filas, total).
+    """
+    with tempfile.TemporaryDirectory(prefix='carga_') as directorio:
+        ruta = os.path.join(directorio, os.path.basename(file.name))
+        with open(ruta, 'wb') as destino:
+            for parte in file.chunks():
+                destino.write(parte)
+
+        n_workers = min(settings.CREDIT_BATCH_WORKERS, scheduler.batch_slots)
+        plan = plan_shards(ruta, n_workers)
+        salida = os.path.join(directorio, 'resultado.csv')
+
+        def reservar():
+            turno = scheduler.acquire(LOTE)
+            return lambda: scheduler.release(turno)
+
+        # En CSV las filas admitidas son una estimación por tamaño
+        with scheduler.admit_batch(plan['filas']):
+            resumen = score_file(ruta, salida, n_workers, plan=plan,
+                                 pool=shared_pool(n_workers), reservar=reservar)
+        return pd.read_csv(salida, nrows=limite), resumen['filas']
+
+
 @login_required
 def batch_predict_view(request):
     results = None
@@ -163,50 +205,42 @@ def batch_predict_view(request):
             file = request.FILES['file']
 
             try:
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                elif file.name.endswith(('.xls', '.xlsx')):
-                    df = pd.read_excel(file)
+                limite = settings.CREDIT_BATCH_PREVIEW_ROWS
+                if (settings.CREDIT_BATCH_WORKERS > 1 and shard_format(file.name)
+                        and file.size >= settings.CREDIT_BATCH_SHARD_MIN_BYTES):
+                    # Archivo grande: fragmentos puntuados en varios procesos
+                    try:
+                        df, total = _score_upload_sharded(file, limite)
+                    except Overloaded as e:
+                        messages.error(request, f"⏳ Servidor ocupado, intente más tarde. {e}")
+                        return render(request, 'credit_risk/batch_predict.html', {'form': form}, status=503)
                 else:
-                    messages.error(request, "Formato no soportado. Use CSV (.csv) o Excel (.xlsx)")
-                    return render(request, 'credit_risk/batch_predict.html', {'form': form})
-
-                required_columns = [
-                    'dias_mora_prom', 'edad', 'ingreso_mensual', 'ventas_anuales',
-                    'monto_solicitado', 'plazo_meses',
-                    'garantia', 'tiene_garante', 'propiedad_completa', 'estado_legal',
-                    'estado_civil'
-                ]
-                missing = [c for c in required_columns if c not in df.columns]
-                if missing:
-                    messages.error(request, f"Faltan columnas: {', '.join(missing)}")
-                    return render(request, 'credit_risk/batch_predict.html', {'form': form})
-
-                predictions = []
-                probabilities = []
-                recs = []
-
-                for _, row in df.iterrows():
-                    df_input = build_model_input(row.to_dict())
-                    pred = int(modelo.predict(df_input)[0])
-                    prob = float(modelo.predict_proba(df_input)[0][1])
-
-                    predictions.append("RIESGO ALTO" if pred == 1 else "RIESGO BAJO")
-                    probabilities.append(round(prob * 100, 2))
-
-                    if prob >= 0.70:
-                        recs.append("ALTO")
-                    elif prob >= 0.40:
-                        recs.append("MEDIO")
-                    else:
-                        recs.append("BAJO")
-
-                df['Prediccion_Riesgo'] = predictions
-                df['Probabilidad_Impago_%'] = probabilities
-                df['Recomendacion'] = recs
-
-                results = df.to_dict(orient='records')
-                messages.success(request, f"✅ Se procesaron {len(df)} registros exitosamente.")
+                    formato = upload_format(file.name)
+                    if formato is None:
+                        messages.error(request, "Formato no soportado. Use CSV (.csv), Excel (.xlsx) o Parquet (.parquet)")
+                        return render(request, 'credit_risk/batch_predict.html', {'form': form})
+                    df = read_table(file, formato)
+
+                    missing = [c for c in INPUT_FIELDS if c not in df.columns]
+                    if missing:
+                        messages.error(request, f"Faltan columnas: {', '.join(missing)}")
+                        return render(request, 'credit_risk/batch_predict.html', {'form': form})
+
+                    # Trabajo de lote: por bloques y cediendo el turno a las predicciones individuales
+                    try:
+                        with scheduler.admit_batch(len(df)):
+                            probs = score_frame(df)
+                    except Overloaded as e:
+                        messages.error(request, f"⏳ Servidor ocupado, intente más tarde. {e}")
+                        return render(request, 'credit_risk/batch_predict.html', {'form': form}, status=503)
+
+                    add_result_columns(df, probs)
+                    total = len(df)
+
+                results = df.head(limite).to_dict(orient='records')
+                messages.success(request, f"✅ Se procesaron {total} registros exitosamente.")
+                if total > limite:
+                    messages.info(request, f"Se muestran los primeros {limite} registros.")
 
             except Exception as e:
                 messages.error(request, f"❌ Error procesando el archivo: {str(e)}")
@@ -225,28 +259,137 @@ def historial_view(request):
     return render(request, 'credit_risk/historial.html', {'evaluaciones': evaluaciones})
 
 
-from django.shortcuts import get_object_or_404
+from .archive import get_evaluation_or_404
+
+def render_detail(request, evaluacion):
+    # Solo lectura: las contribuciones se guardaron al puntuar (las filas
+    # antiguas sin ellas se rellenan con explain_evaluations)
+    return render(request, 'credit_risk/evaluacion_detalle.html', {
+        'e': evaluacion,
+        'historial_cliente': get_applicant_history(evaluacion.cliente_cedula),
+        'contribuciones': top_contributions(evaluacion),
+        'unidad_contribucion': stored_units(evaluacion),
+    })
+
 
 @login_required
 def evaluation_detail_view(request, pk):
-    evaluacion = get_object_or_404(CreditEvaluation, pk=pk)
-    return render(request, 'credit_risk/evaluacion_detalle.html', {'e': evaluacion})
+    return render_detail(request, get_evaluation_or_404(pk))
+
 
+@login_required
+def applicant_history_api(request, cedula):
+    h = get_applicant_history(cedula)
+    if h is None:
+        return JsonResponse({'error': 'Sin evaluaciones para la cédula indicada'}, status=404)
+    return JsonResponse({
+        'cliente_cedula': h.cliente_cedula,
+        'total_evaluaciones': h.total_evaluaciones,
+        'ultima_evaluacion_id': h.ultima_evaluacion_id,
+        'ultima_evaluacion_at': h.ultima_evaluacion_at,
+        'ultima_prob_riesgo': h.ultima_prob_riesgo,
+        'max_prob_riesgo': h.max_prob_riesgo,
+        'ultimo_estado': h.ultimo_estado,
+        'ultima_decision': h.ultima_decision,
+    })
 
-from .forms import DecisionForm
+
+from .forms import BulkDecisionForm, DecisionForm
+from .review_queue import (
+    available_cases, bulk_decide, claim_next_case, claimed_case, lease_holder, pending_cases, release_case,
+)
 
 @login_required
 def evaluation_update_view(request, pk):
-    evaluacion = get_object_or_404(CreditEvaluation, pk=pk)
+    evaluacion = get_evaluation_or_404(pk)
+
+    # Los casos archivados están cerrados: solo lectura
+    if evaluacion.is_archived:
+        return render_detail(request, evaluacion)
+
+    titular = lease_holder(evaluacion, request.user)
+    if titular is not None:
+        messages.error(
+            request,
+            f"🔒 Caso reservado por {titular.username} hasta "
+            f"{timezone.localtime(evaluacion.asignado_hasta):%H:%M}.",
+        )
+        return render_detail(request, evaluacion)
 
     if request.method == 'POST':
-        form = DecisionForm(request.POST, instance=evaluacion)
-        if form.is_valid():
-            form.save()
+        with transaction.atomic():
+            # Bloquea la fila: dos analistas no pisan la decisión del otro
+            evaluacion = CreditEvaluation.objects.select_for_update().get(pk=pk)
+            titular = lease_holder(evaluacion, request.user)
+            form = DecisionForm(request.POST, instance=evaluacion)
+            guardado = titular is None and form.is_valid()
+            if guardado:
+                evaluacion = form.save(commit=False)
+                if evaluacion.estado_caso != 'PENDIENTE':
+                    evaluacion.asignado_a = None
+                    evaluacion.asignado_hasta = None
+                evaluacion.save()
+
+        if titular is not None:
+            messages.error(request, f"🔒 El caso fue reservado por {titular.username}; no se guardaron cambios.")
+            return render_detail(request, evaluacion)
+        if guardado:
             messages.success(request, "✅ Caso actualizado.")
-            return render(request, 'credit_risk/evaluacion_detalle.html', {'e': evaluacion})
+            if 'siguiente' in request.POST:
+                return redirect('cola_siguiente')
+            return render_detail(request, evaluacion)
     else:
         form = DecisionForm(instance=evaluacion)
 
-    return render(request, 'credit_risk/evaluacion_editar.html', {'form': form, 'e': evaluacion})
+    return render(request, 'credit_risk/evaluacion_editar.html', {
+        'form': form,
+        'e': evaluacion,
+        'en_cola': evaluacion.asignado_a_id == request.user.pk,
+    })
+
+
+# =========================
+# COLA DE REVISIÓN
+# =========================
+@login_required
+def review_queue_view(request):
+    if request.method == 'POST':
+        if request.POST.get('accion') == 'liberar':
+            caso = claimed_case(request.user)
+            if caso is not None:
+                release_case(caso, request.user)
+            return redirect('cola_revision')
+
+        form = BulkDecisionForm(request.POST)
+        ids = [int(pk) for pk in request.POST.getlist('casos') if pk.isdigit()]
+        if form.is_valid() and ids:
+            total = bulk_decide(ids, form.cleaned_data['decision'], request.user, form.cleaned_data['comentario'])
+            messages.success(request, f"✅ {total} caso(s) marcados como {form.cleaned_data['decision']}.")
+            if total < len(ids):
+                messages.warning(request, f"{len(ids) - total} caso(s) omitidos: ya decididos o reservados por otro analista.")
+        else:
+            messages.error(request, "Selecciona al menos un caso y una decisión.")
+        return redirect('cola_revision')
+
+    ahora = timezone.now()
+    return render(request, 'credit_risk/cola_revision.html', {
+        'form': BulkDecisionForm(),
+        'total_pendientes': pending_cases().count(),
+        'reservados': pending_cases().filter(asignado_hasta__gte=ahora).count(),
+        'mi_caso': claimed_case(request.user),
+        'casos': available_cases()[:settings.CREDIT_REVIEW_PAGE_SIZE],
+    })
+
 
+@login_required
+def review_next_view(request):
+    caso = claim_next_case(request.user)
+    if caso is None:
+        messages.info(request, "No hay casos pendientes libres.")
+        return redirect('cola_revision')
+    return redirect('evaluacion_editar', pk=caso.pk)
+
+
+@login_required
+def scheduler_metrics_api(request):
+    return JsonResponse(scheduler.metrics())
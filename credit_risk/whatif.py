@@ -0,0 +1,74 @@
+"""
+Análisis what-if: un solicitante evaluado sobre una grilla de montos x plazos
+(y opcionalmente tipos de garantía).
+
+La grilla completa se arma como una sola matriz de diseño a partir de la fila
+codificada del solicitante y se puntúa con una única llamada al modelo. No se
+guardan evaluaciones en el historial.
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import inference
+from .scoring import RISK_BANDS, UMBRAL_RIESGO_MEDIO, risk_band_codes
+
+
+def amount_grid(monto_min, monto_max, pasos):
+    return np.round(np.linspace(monto_min, monto_max, pasos), 2)
+
+
+def score_grid(data: dict, montos, plazos, garantias=None, max_ofertas=5):
+    """
+    Devuelve la superficie de riesgo y las mejores ofertas aprobables.
+
+    superficie[g][i][j] = probabilidad para garantias[g], montos[i], plazos[j].
+    Una oferta es aprobable si cae en la banda BAJO (< UMBRAL_RIESGO_MEDIO).
+    """
+    montos = np.asarray(montos, dtype=np.float64)
+    plazos = np.asarray(plazos, dtype=np.float64)
+    garantias = list(garantias) if garantias else [data.get('garantia')]
+
+    columnas = inference.model_columns
+    idx = {c: i for i, c in enumerate(columnas)}
+    base = inference.encode(pd.DataFrame([data]))[0]
+
+    # Grilla (garantía, monto, plazo) en orden C sobre una copia de la fila base
+    n_g, n_m, n_p = len(garantias), len(montos), len(plazos)
+    X = np.repeat(base[np.newaxis, :], n_g * n_m * n_p, axis=0)
+    X[:, idx['monto_solicitado']] = np.tile(np.repeat(montos, n_p), n_g)
+    X[:, idx['plazo_meses']] = np.tile(plazos, n_g * n_m)
+
+    cols_garantia = [i for c, i in idx.items() if c.startswith('garantia_')]
+    for g, garantia in enumerate(garantias):
+        bloque = slice(g * n_m * n_p, (g + 1) * n_m * n_p)
+        X[bloque, cols_garantia] = 0
+        col = idx.get(f'garantia_{garantia}')
+        if col is not None:
+            X[bloque, col] = 1
+
+    probs = inference.predict_proba(X)
+    superficie = probs.reshape(n_g, n_m, n_p)
+    bandas = risk_band_codes(probs).reshape(n_g, n_m, n_p)
+
+    # Mejores ofertas: mayor monto aprobable, luego menor plazo, luego menor riesgo
+    g_idx, m_idx, p_idx = np.nonzero(superficie < UMBRAL_RIESGO_MEDIO)
+    orden = np.lexsort((superficie[g_idx, m_idx, p_idx], plazos[p_idx], -montos[m_idx]))[:max_ofertas]
+    ofertas = [
+        {
+            'garantia': garantias[g_idx[k]],
+            'monto_solicitado': float(montos[m_idx[k]]),
+            'plazo_meses': int(plazos[p_idx[k]]),
+            'prob_riesgo': round(float(superficie[g_idx[k], m_idx[k], p_idx[k]]), 4),
+        }
+        for k in orden
+    ]
+
+    return {
+        'montos': montos.tolist(),
+        'plazos': plazos.astype(int).tolist(),
+        'garantias': garantias,
+        'superficie': np.round(superficie, 4).tolist(),
+        'bandas': [[[RISK_BANDS[b] for b in fila] for fila in capa] for capa in bandas],
+        'ofertas': ofertas,
+    }